@@ -0,0 +1,63 @@
+"""
+Mide la escalabilidad de la clasificación paralela de ServicioAnalisisEvaluacion
+de 1 a N procesos sobre comentarios de ejemplo replicados.
+
+Ejecutar:
+    python benchmarks/bench_clasificacion_paralela.py --filas 500000 --max-procesos 8
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(RAIZ, 'src', 'main'))
+
+from negocio.ServicioAnalisisEvaluacion import ServicioAnalisisEvaluacion  # noqa: E402
+
+RUTA_MODELO = os.path.join(RAIZ, 'src', 'main', 'clasificador_sentimiento_final.pkl')
+RUTA_COMENTARIOS = os.path.join(RAIZ, 'datos_excel', 'comentarios_sin_duplicados.csv')
+
+
+def generar_datos(filas: int) -> pd.DataFrame:
+    base = pd.read_csv(RUTA_COMENTARIOS)[['comentarios', 'calificacion']].dropna()
+    return base.sample(n=filas, replace=True, random_state=42).reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=200000)
+    parser.add_argument('--max-procesos', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--tamano-lote', type=int, default=None)
+    args = parser.parse_args()
+
+    datos = generar_datos(args.filas)
+    servicio = ServicioAnalisisEvaluacion(RUTA_MODELO, db_config={})
+    print(f"Clasificando {len(datos)} filas ({os.cpu_count()} núcleos disponibles)\n")
+
+    inicio = time.perf_counter()
+    referencia = servicio.realizar_analisis_sentimientos(datos, tamano_lote=args.tamano_lote)
+    base = time.perf_counter() - inicio
+
+    print(f"{'procesos':>8} {'segundos':>10} {'aceleración':>12}")
+    print(f"{1:>8} {base:>10.2f} {1.0:>11.2f}x")
+    for n in range(2, args.max_procesos + 1):
+        # Primera llamada para arrancar los procesos y cargar el modelo en cada uno
+        servicio.realizar_analisis_sentimientos(datos.head(n), tamano_lote=1, n_procesos=n)
+
+        inicio = time.perf_counter()
+        resultado = servicio.realizar_analisis_sentimientos(
+            datos, tamano_lote=args.tamano_lote, n_procesos=n
+        )
+        duracion = time.perf_counter() - inicio
+        assert resultado['Clasificacion'].equals(referencia['Clasificacion'])
+        print(f"{n:>8} {duracion:>10.2f} {base / duracion:>11.2f}x")
+
+    servicio.cerrar_procesos()
+
+
+if __name__ == '__main__':
+    main()
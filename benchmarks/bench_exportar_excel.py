@@ -0,0 +1,70 @@
+"""
+Compara la exportación a Excel con `DataFrame.to_excel` (todo el libro en
+memoria) y con la escritura por filas en modo `constant_memory`: tiempo y pico
+de memoria de Python (tracemalloc, que además hace más lentas ambas).
+
+Ejecutar:
+    python benchmarks/bench_exportar_excel.py --filas 300000
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(RAIZ, 'src', 'main'))
+
+from negocio.ResumenAnalisis import ResumenAnalisis  # noqa: E402
+from presentacion.logica.exportador_excel import generar_excel  # noqa: E402
+
+RUTA_COMENTARIOS = os.path.join(RAIZ, 'datos_excel', 'comentarios_sin_duplicados.csv')
+
+
+def generar_datos(filas: int) -> pd.DataFrame:
+    base = pd.read_csv(RUTA_COMENTARIOS)[['comentarios', 'calificacion']].dropna()
+    datos = base.sample(n=filas, replace=True, random_state=42).reset_index(drop=True)
+    datos['Clasificacion'] = np.random.default_rng(0).choice(['Promotor', 'Neutro', 'Detractor'], filas)
+    datos['longitud'] = datos['comentarios'].str.len()
+    return datos
+
+
+def excel_con_to_excel(datos: pd.DataFrame, resumen: ResumenAnalisis) -> bytes:
+    salida = io.BytesIO()
+    with pd.ExcelWriter(salida, engine='xlsxwriter') as writer:
+        datos.to_excel(writer, index=False, sheet_name='Datos')
+        resumen.por_clase.to_excel(writer, index=False, sheet_name='Resumen')
+    return salida.getvalue()
+
+
+def medir(funcion) -> tuple[float, float]:
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    funcion()
+    segundos = time.perf_counter() - inicio
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return segundos, pico / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=100000)
+    args = parser.parse_args()
+
+    datos = generar_datos(args.filas)
+    resumen = ResumenAnalisis(datos)
+    print(f"{len(datos)} filas\n")
+    print(f"{'método':>16} {'tiempo':>9} {'pico MB':>9}")
+    for nombre, funcion in [('to_excel', excel_con_to_excel), ('constant_memory', generar_excel)]:
+        segundos, megas = medir(lambda: funcion(datos, resumen))
+        print(f"{nombre:>16} {segundos:>8.2f}s {megas:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Compara CSV y Parquet para guardar, recargar (completo y solo 'Clasificacion') y
+validar un análisis, con comentarios de ejemplo replicados.
+
+Ejecutar:
+    python benchmarks/bench_formato_archivo.py --filas 500000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(RAIZ, 'src', 'main'))
+
+from datos.GuardarDatosArchivo import GuardarDatosArchivo  # noqa: E402
+
+RUTA_COMENTARIOS = os.path.join(RAIZ, 'datos_excel', 'comentarios_sin_duplicados.csv')
+
+
+def generar_datos(filas: int) -> pd.DataFrame:
+    base = pd.read_csv(RUTA_COMENTARIOS)[['comentarios', 'calificacion']].dropna()
+    datos = base.sample(n=filas, replace=True, random_state=42).reset_index(drop=True)
+    datos['Clasificacion'] = np.random.default_rng(0).choice(['Promotor', 'Neutro', 'Detractor'], filas)
+    datos['longitud'] = datos['comentarios'].str.len()
+    return datos
+
+
+def medir(funcion) -> float:
+    inicio = time.perf_counter()
+    funcion()
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=200000)
+    args = parser.parse_args()
+
+    datos = generar_datos(args.filas)
+    print(f"{len(datos)} filas\n")
+    print(f"{'formato':>8} {'guardar':>9} {'cargar':>9} {'1 col':>9} {'validar':>9} {'MB':>8}")
+    with tempfile.TemporaryDirectory() as directorio:
+        for formato in ['csv', 'parquet']:
+            guardado = GuardarDatosArchivo(directorio_base=directorio, formato=formato)
+            ruta = guardado.ruta_archivo('bench')
+            t_guardar = medir(lambda: guardado.guardar_datos_limpios(datos, 'bench'))
+            t_cargar = medir(lambda: guardado.cargar_datos('bench'))
+            t_columna = medir(lambda: guardado.cargar_datos('bench', columnas=['Clasificacion']))
+            t_validar = medir(lambda: guardado.validar_integridad_datos(ruta))
+            megas = os.path.getsize(ruta) / 1e6
+            print(f"{formato:>8} {t_guardar:>8.2f}s {t_cargar:>8.2f}s {t_columna:>8.2f}s "
+                  f"{t_validar:>8.2f}s {megas:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Compara el guardado fila por fila (iterrows + execute) con el guardado por lotes
+(executemany) y con LOAD DATA LOCAL INFILE de ServicioAlmacenamiento.
+
+Requiere un servidor MySQL o MariaDB local con `local_infile=1`, por ejemplo:
+
+    docker run -d -p 3306:3306 -e MARIADB_ROOT_PASSWORD=root \
+        -e MARIADB_DATABASE=cosmitos_bench mariadb:11 --local-infile=1
+
+Ejecutar:
+    python benchmarks/bench_guardado_mysql.py --filas 200000 --password root
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import mysql.connector
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'main'))
+
+from negocio.ServicioAlmacenamiento import ServicioAlmacenamiento  # noqa: E402
+
+
+def generar_datos(filas: int) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    frases = np.array([
+        'excelente servicio muy amables',
+        'tardaron demasiado en entregar la unidad',
+        'todo bien gracias',
+        'no respetaron la cita y el asesor no contesta',
+        'buena atencion pero el precio es alto',
+    ])
+    return pd.DataFrame({
+        'comentarios': frases[rng.integers(0, len(frases), filas)],
+        'calificacion': rng.integers(0, 11, filas).astype(float),
+        'Clasificacion': np.array(['Detractor', 'Neutro', 'Promotor'])[rng.integers(0, 3, filas)],
+    })
+
+
+def guardar_fila_por_fila(db_config: dict, datos: pd.DataFrame, nombre_tabla: str) -> None:
+    """Reproduce el guardado anterior: un execute por fila y un solo commit."""
+    with mysql.connector.connect(**db_config) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {nombre_tabla} ("
+                "id INT AUTO_INCREMENT PRIMARY KEY, comentarios TEXT, "
+                "calificacion FLOAT, Clasificacion VARCHAR(255))"
+            )
+            for _, row in datos.iterrows():
+                cursor.execute(
+                    f"INSERT INTO {nombre_tabla} (comentarios, calificacion, Clasificacion) "
+                    "VALUES (%s, %s, %s)",
+                    (row['comentarios'], row['calificacion'], row['Clasificacion'])
+                )
+            conn.commit()
+
+
+def eliminar_tabla(db_config: dict, nombre_tabla: str) -> None:
+    with mysql.connector.connect(**db_config) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {nombre_tabla}")
+
+
+def medir(nombre: str, funcion) -> float:
+    inicio = time.perf_counter()
+    funcion()
+    duracion = time.perf_counter() - inicio
+    print(f"{nombre:<28} {duracion:>10.2f} s")
+    return duracion
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=50000)
+    parser.add_argument('--tamano-lote', type=int, default=ServicioAlmacenamiento.TAMANO_LOTE)
+    parser.add_argument('--host', default=os.environ.get('GSSP_DB_HOST', 'localhost'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('GSSP_DB_PORT', 3306)))
+    parser.add_argument('--user', default=os.environ.get('GSSP_DB_USER', 'root'))
+    parser.add_argument('--password', default=os.environ.get('GSSP_DB_PASSWORD', ''))
+    parser.add_argument('--database', default=os.environ.get('GSSP_DB_DATABASE', 'cosmitos_bench'))
+    parser.add_argument('--omitir-fila-por-fila', action='store_true',
+                        help='No ejecutar el método anterior (es lento con muchas filas).')
+    args = parser.parse_args()
+
+    db_config = {
+        'host': args.host, 'port': args.port, 'user': args.user,
+        'password': args.password, 'database': args.database,
+    }
+    datos = generar_datos(args.filas)
+    servicio = ServicioAlmacenamiento(db_config, directorio_base_csv=os.path.join('benchmarks', 'salida'))
+    print(f"Guardando {args.filas} filas (lote de {args.tamano_lote})\n")
+
+    resultados = {}
+    if not args.omitir_fila_por_fila:
+        eliminar_tabla(db_config, 'bench_fila_por_fila')
+        resultados['fila por fila'] = medir(
+            'iterrows + execute', lambda: guardar_fila_por_fila(db_config, datos, 'bench_fila_por_fila')
+        )
+
+    eliminar_tabla(db_config, 'bench_executemany')
+    resultados['executemany'] = medir('executemany por lotes', lambda: servicio.guardar_analisis_mysql(
+        datos, 'bench_executemany', tamano_lote=args.tamano_lote
+    ))
+
+    eliminar_tabla(db_config, 'bench_load_data')
+    resultados['load data'] = medir('LOAD DATA LOCAL INFILE', lambda: servicio.guardar_analisis_mysql(
+        datos, 'bench_load_data', usar_load_data=True
+    ))
+
+    if 'fila por fila' in resultados:
+        base = resultados['fila por fila']
+        print()
+        for nombre in ('executemany', 'load data'):
+            print(f"Aceleración {nombre}: {base / resultados[nombre]:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
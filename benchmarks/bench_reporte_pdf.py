@@ -0,0 +1,88 @@
+"""
+Compara el reporte PDF generado en el proceso (presentacion.logica.exportador_pdf)
+con la conversión de HTML a PDF de pdfkit (un proceso wkhtmltopdf por reporte).
+Mide el tiempo por reporte, el pico de memoria de Python (tracemalloc) y la
+memoria máxima de los procesos hijos (wkhtmltopdf). El HTML de pdfkit solo lleva
+las tablas, sin gráficas, así que su tiempo es una cota inferior.
+
+Ejecutar:
+    python benchmarks/bench_reporte_pdf.py --filas 100000 --repeticiones 5
+"""
+
+import argparse
+import os
+import resource
+import shutil
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(RAIZ, 'src', 'main'))
+
+from negocio.ResumenAnalisis import ResumenAnalisis  # noqa: E402
+from presentacion.logica.exportador_pdf import COMENTARIOS_POR_CLASE, generar_pdf  # noqa: E402
+
+RUTA_COMENTARIOS = os.path.join(RAIZ, 'datos_excel', 'comentarios_sin_duplicados.csv')
+
+
+def generar_datos(filas: int) -> pd.DataFrame:
+    base = pd.read_csv(RUTA_COMENTARIOS)[['comentarios', 'calificacion']].dropna()
+    datos = base.sample(n=filas, replace=True, random_state=42).reset_index(drop=True)
+    datos['Clasificacion'] = np.random.default_rng(0).choice(['Promotor', 'Neutro', 'Detractor'], filas)
+    datos['longitud'] = datos['comentarios'].str.len()
+    return datos
+
+
+def html_reporte(datos: pd.DataFrame, resumen: ResumenAnalisis) -> str:
+    partes = ["<html><head><meta charset='utf-8'></head><body>",
+              "<h1>Reporte de comentarios</h1>", resumen.por_clase.to_html(index=False)]
+    for clase in resumen.clases:
+        posiciones = resumen.indices_ordenados.get(clase, [])[:COMENTARIOS_POR_CLASE]
+        partes.append(f"<h3>{clase}</h3>")
+        partes.append(datos.iloc[posiciones][['calificacion', 'comentarios']].to_html(index=False))
+    partes.append("</body></html>")
+    return ''.join(partes)
+
+
+def medir(funcion, repeticiones: int) -> tuple[float, float]:
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    segundos = (time.perf_counter() - inicio) / repeticiones
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return segundos, pico / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=100000)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    datos = generar_datos(args.filas)
+    resumen = ResumenAnalisis(datos)
+    print(f"{len(datos)} filas, {args.repeticiones} reportes por método\n")
+    print(f"{'método':>10} {'por reporte':>12} {'pico MB':>9} {'hijos MB':>9}")
+
+    segundos, megas = medir(lambda: generar_pdf(datos, resumen), args.repeticiones)
+    print(f"{'nativo':>10} {segundos * 1000:>10.1f}ms {megas:>9.1f} {'-':>9}")
+
+    if shutil.which('wkhtmltopdf') is None:
+        print(f"{'pdfkit':>10} omitido: wkhtmltopdf no está instalado")
+        return
+    import pdfkit
+    html = html_reporte(datos, resumen)
+    segundos, megas = medir(lambda: pdfkit.from_string(html, False), args.repeticiones)
+    # ru_maxrss está en KB en Linux
+    hijos = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    print(f"{'pdfkit':>10} {segundos * 1000:>10.1f}ms {megas:>9.1f} {hijos:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
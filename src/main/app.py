@@ -1,13 +1,15 @@
-from presentacion.vista.charts import mostrar_graficos
+from presentacion.vista.charts import mostrar_graficos, mostrar_graficos_agregados
 import streamlit as st
-from presentacion.controlador.loader import get_services, process_uploaded_file
-from presentacion.vista.layout import show_header, show_tables, show_comments_table, show_export_button
+from presentacion.controlador.loader import get_services, get_datasets_compartidos, get_guardado_segundo_plano, process_uploaded_file
+from presentacion.vista.layout import show_header, show_tables, show_comments_table, show_export_button, show_saved_comments_table, show_save_jobs, show_session_memory, show_diagnostics
 import presentacion.vista.config_app_ui as cau
 from presentacion.vista.layout import upload_file_view
 from presentacion.vista.utils import color_discrete_map
+from negocio.Instrumentacion import Instrumentacion
 import pandas as pd
 
 
+Instrumentacion.configurar_registro()
 cau.config_page()
 show_header()
 
@@ -25,30 +27,32 @@ else:
         "Seleccionar un análisis para ver", lista_analisis
     )
     if st.sidebar.button("Cargar Análisis"):
-        df_cargado = sae.cargar_analisis_por_nombre(analisis_seleccionado)
-        if df_cargado is not None and not df_cargado.empty:
-            st.session_state['df_actual'] = df_cargado
-            st.session_state['analisis_actual'] = analisis_seleccionado
-        else:
-            st.sidebar.error("No se pudieron cargar los datos del análisis.")
+        # Solo se guarda el nombre: los datos se consultan por páginas y agregados
+        st.session_state['analisis_actual'] = analisis_seleccionado
 
 # Display loaded analysis from sidebar
-if 'df_actual' in st.session_state:
-    st.subheader(f"Mostrando análisis: {st.session_state['analisis_actual']}")
-    df_display = st.session_state['df_actual']
-    if 'comentarios' in df_display.columns:
-        df_display['longitud'] = df_display['comentarios'].str.len()
+if 'analisis_actual' in st.session_state:
+    analisis = sae.abrir_analisis(st.session_state['analisis_actual'])
+    if analisis.total() == 0:
+        st.sidebar.error("No se pudieron cargar los datos del análisis.")
+        st.session_state.pop('analisis_actual')
     else:
-        df_display['longitud'] = 0
-    show_comments_table(df_display)
-    mostrar_graficos(df_display, color_discrete_map)
-    show_export_button(df_display)
+        st.subheader(f"Mostrando análisis: {analisis.nombre}")
+        show_saved_comments_table(analisis)
+        mostrar_graficos_agregados(
+            analisis.conteo_por_clase(), analisis.histograma_longitud(), color_discrete_map
+        )
+        # Las filas del análisis guardado solo se traen de la base al exportar;
+        # la copia compacta queda en la caché compartida entre sesiones
+        if st.button("Preparar reportes Excel y PDF"):
+            show_export_button(sae.cargar_analisis_por_nombre(analisis.nombre), bajo_demanda=False)
 
 
 #st.markdown("---")
 
 # File uploader
 archivo = upload_file_view()
+datos_mostrados = []
 if archivo:
     datos, mensaje, valido = process_uploaded_file(archivo, sld, sae)
 
@@ -58,6 +62,7 @@ if archivo:
         df = datos
         if df is not None and not df.empty:
             #st.dataframe(df.head(5), use_container_width=True, hide_index=True)
+            datos_mostrados.append(df)
             show_comments_table(df)
             mostrar_graficos(df, color_discrete_map)
             show_export_button(df)
@@ -65,17 +70,11 @@ if archivo:
             if st.button("Guardar Resultados"):
                 file_name_base = archivo.name.split('.')[0]
                 table_name = f"analisis_{file_name_base}"
-                guardado_exitoso, mensaje_guardado = sae.guardar_analisis(
-                    df, file_name_base, table_name
-                )
-                if guardado_exitoso:
-                    st.success("Resultados guardados exitosamente.")
-                    st.info(mensaje_guardado)
-                    # Refresh saved analyses list
-                    st.rerun()
-                else:
-                    st.error("Error al guardar los resultados.")
-                    st.warning(mensaje_guardado)
+                # El guardado sigue en segundo plano; su estado se muestra abajo
+                id_trabajo = get_guardado_segundo_plano().encolar(df, file_name_base, table_name)
+                trabajos = st.session_state.setdefault('trabajos_guardado', [])
+                if id_trabajo not in trabajos:  # Ya en curso: encolar devuelve el mismo id
+                    trabajos.append(id_trabajo)
 
 
 
@@ -85,4 +84,8 @@ if archivo:
         else:
             st.warning("No se pudieron cargar los datos correctamente.")
     else:
-        st.sidebar.error(mensaje)
\ No newline at end of file
+        st.sidebar.error(mensaje)
+
+show_save_jobs(get_guardado_segundo_plano(), st.session_state.get('trabajos_guardado', []))
+show_session_memory(get_datasets_compartidos(), list(st.session_state.values()) + datos_mostrados)
+show_diagnostics(Instrumentacion.compartida())
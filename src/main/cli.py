@@ -0,0 +1,93 @@
+"""
+Procesamiento por lotes sin interfaz gráfica.
+
+Ejemplo:
+    gssp-lotes "datos_excel/c_*_2025.xlsx" --procesos 4 --mysql
+    gssp-migrar --eliminar-originales
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+from negocio.ServicioProcesamientoLotes import ServicioProcesamientoLotes
+from negocio.ServicioAlmacenamiento import ServicioAlmacenamiento
+from negocio.Instrumentacion import Instrumentacion
+from datos.ConfiguracionBD import cargar_configuracion_bd
+from datos.AlmacenAnalisis import crear_almacen
+
+RUTA_MODELO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'clasificador_sentimiento_final.pkl')
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='gssp-lotes',
+        description="Valida, limpia, clasifica y guarda archivos Excel de encuestas.",
+        epilog=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('patrones', nargs='+', help="Archivos o patrones glob (p. ej. 'datos_excel/c_*.xlsx').")
+    parser.add_argument('--salida', default='datos_analizados', help="Carpeta de los archivos resultantes.")
+    parser.add_argument('--formato', choices=['csv', 'parquet'], default='csv',
+                        help="Formato de los archivos resultantes.")
+    parser.add_argument('--procesos', type=int, default=1, help="Archivos procesados en paralelo.")
+    parser.add_argument('--mysql', action='store_true', help="Guardar también cada análisis en MySQL.")
+    parser.add_argument('--modelo', default=RUTA_MODELO, help="Ruta del clasificador entrenado.")
+    parser.add_argument('--cache-predicciones', default=None,
+                        help="Archivo SQLite de la caché de predicciones (opcional).")
+    parser.add_argument('--forzar', action='store_true', help="Reprocesar archivos ya procesados.")
+    args = parser.parse_args(argv)
+    Instrumentacion.configurar_registro()
+
+    rutas = []
+    for patron in args.patrones:
+        coincidencias = sorted(glob.glob(patron)) or ([patron] if os.path.isfile(patron) else [])
+        rutas.extend(r for r in coincidencias if r not in rutas)
+    if not rutas:
+        print("No se encontraron archivos para procesar.", file=sys.stderr)
+        return 1
+
+    servicio = ServicioProcesamientoLotes(
+        args.modelo,
+        directorio_salida=args.salida,
+        guardar_mysql=args.mysql,
+        db_config=cargar_configuracion_bd() if args.mysql else None,
+        ruta_cache_predicciones=args.cache_predicciones,
+        formato_archivo=args.formato
+    )
+
+    inicio = time.perf_counter()
+    resultados = servicio.procesar(rutas, n_procesos=max(1, args.procesos), forzar=args.forzar)
+    duracion = time.perf_counter() - inicio
+
+    print()
+    print(ServicioProcesamientoLotes.resumen_tiempos(resultados))
+    fallidos = [r for r in resultados if not r['exito']]
+    print(f"\n{len(resultados) - len(fallidos)} de {len(resultados)} archivos correctos "
+          f"en {duracion:.2f} s.")
+    return 1 if fallidos else 0
+
+
+def migrar(argv=None) -> int:
+    """Copia las tablas antiguas 'analisis_*' al esquema con catálogo y tabla de hechos."""
+    parser = argparse.ArgumentParser(
+        prog='gssp-migrar',
+        description="Migra las tablas 'analisis_*' (una por archivo) al catálogo y la tabla de hechos."
+    )
+    parser.add_argument('--eliminar-originales', action='store_true',
+                        help="Eliminar cada tabla antigua después de copiarla.")
+    args = parser.parse_args(argv)
+    Instrumentacion.configurar_registro()
+
+    # Las tablas antiguas solo existen en MySQL, sea cual sea GSSP_ALMACEN
+    almacenamiento = ServicioAlmacenamiento(
+        almacen=crear_almacen(cargar_configuracion_bd(), motor='mysql')
+    )
+    migradas = almacenamiento.migrar_tablas_antiguas(eliminar_originales=args.eliminar_originales)
+    print(f"\n{len(migradas)} tablas migradas ({sum(f for _, f in migradas)} filas).")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,220 @@
+import os
+from abc import ABC, abstractmethod
+from typing import Callable, Optional
+
+import pandas as pd
+
+from datos.EsquemaBD import TABLA_CATALOGO, TABLA_COMENTARIOS
+from datos.HuellaFilas import COLUMNA_HUELLA, calcular_delta, calcular_huellas
+
+
+class AlmacenAnalisis(ABC):
+    """
+    Interfaz de los motores donde se guardan los análisis (MySQL o SQLite).
+
+    Todos usan el mismo esquema lógico: un catálogo con un lote por análisis y
+    una tabla de hechos con los comentarios de todos los lotes. Los métodos
+    lanzan las excepciones de `ERRORES`; los servicios de negocio las capturan.
+    """
+    nombre = ''
+    ERRORES: tuple = (Exception,)
+    COLUMNAS_PERSISTIDAS = ['comentarios', 'calificacion', 'Clasificacion']
+    MARCADOR = '%s'  # Marcador de parámetros del conector
+
+    # --- Escritura ---
+    @abstractmethod
+    def guardar(self, datos: pd.DataFrame, nombre_analisis: str, tamano_lote: int,
+                progreso: Optional[Callable[[int, int], None]] = None,
+                usar_load_data: bool = False) -> None:
+        """Agrega `datos` al lote de `nombre_analisis`, confirmando cada lote de filas."""
+
+    @abstractmethod
+    def combinar(self, datos: pd.DataFrame, nombre_analisis: str, tamano_lote: int,
+                 progreso: Optional[Callable[[int, int], None]] = None) -> dict:
+        """
+        Deja el lote de `nombre_analisis` igual a `datos` escribiendo solo la
+        diferencia (ver datos.HuellaFilas.calcular_delta): inserta las filas
+        nuevas, actualiza la clase de las que cambiaron y borra las que ya no
+        están. Devuelve el número de filas 'insertadas', 'actualizadas',
+        'eliminadas' y 'sin_cambios'. `progreso` recibe (operaciones hechas, total).
+        """
+
+    # --- Catálogo ---
+    @abstractmethod
+    def listar(self) -> list[str]:
+        """Nombres de los análisis guardados, del más antiguo al más reciente."""
+
+    @abstractmethod
+    def lote_id(self, nombre_analisis: str) -> Optional[int]:
+        """Id del lote de `nombre_analisis`, o None si no existe."""
+
+    # --- Lectura ---
+    @abstractmethod
+    def cargar(self, nombre_analisis: str) -> pd.DataFrame:
+        """'comentarios', 'calificacion' y 'Clasificacion' de un análisis, en orden de id."""
+
+    @abstractmethod
+    def cargar_lote(self, lote_id: int) -> pd.DataFrame:
+        """Como `cargar`, más 'longitud', a partir del id de lote."""
+
+    @abstractmethod
+    def pagina(self, lote_id: int, tamano: int, despues_de: Optional[int] = None,
+               clase: Optional[str] = None) -> list[tuple]:
+        """Filas (id, comentarios, calificacion, Clasificacion, longitud) con id > `despues_de`."""
+
+    # --- Agregados ---
+    @abstractmethod
+    def conteo_por_clase(self, lote_id: int) -> list[tuple]:
+        """(Clasificacion, cantidad), de mayor a menor."""
+
+    @abstractmethod
+    def resumen_por_clase(self, lote_id: int) -> list[tuple]:
+        """(Clasificacion, comentarios, longitud promedio), por orden de clase."""
+
+    @abstractmethod
+    def histograma_longitud(self, lote_id: int, contenedores: int) -> list[tuple]:
+        """(Clasificacion, contenedor, conteo, longitud mínima, longitud máxima)."""
+
+    @abstractmethod
+    def tendencia(self) -> list[tuple]:
+        """(análisis, creado, Clasificacion, cantidad, longitud promedio) de todos los lotes."""
+
+    # --- Errores ---
+    def es_transitorio(self, error: Exception) -> bool:
+        """True si vale la pena reintentar la operación que lanzó `error`."""
+        return False
+
+    # --- Utilidades comunes ---
+    def columnas_para_insertar(self, datos: pd.DataFrame, huellas=None) -> pd.DataFrame:
+        """
+        Columnas persistidas más 'longitud' (caracteres del comentario) y
+        'huella'. Si `datos` es un subconjunto, las huellas deben venir de los
+        datos completos: en `huellas` o en una columna 'huella' de `datos`.
+        """
+        columnas = datos[self.COLUMNAS_PERSISTIDAS].copy()
+        columnas['longitud'] = datos['comentarios'].str.len().astype('Int64')
+        if huellas is None:
+            huellas = (datos[COLUMNA_HUELLA].to_numpy() if COLUMNA_HUELLA in datos.columns
+                       else calcular_huellas(datos))
+        columnas[COLUMNA_HUELLA] = huellas
+        return columnas
+
+    def filas_para_insertar(self, datos: pd.DataFrame, lote_id: int, huellas=None) -> list[tuple]:
+        """
+        Convierte las columnas a insertar en tuplas (lote_id, comentarios,
+        calificacion, Clasificacion, longitud, huella) de tipos nativos de
+        Python, con None en lugar de valores nulos.
+        """
+        columnas = self.columnas_para_insertar(datos, huellas).astype(object)
+        columnas = columnas.where(columnas.notna(), None)
+        return [(lote_id,) + fila for fila in columnas.itertuples(index=False, name=None)]
+
+    def _sql_insertar(self) -> str:
+        m = self.MARCADOR
+        return (
+            f"INSERT INTO {TABLA_COMENTARIOS} "
+            "(lote_id, comentarios, calificacion, Clasificacion, longitud, huella) "
+            f"VALUES ({m}, {m}, {m}, {m}, {m}, {m})"
+        )
+
+    def _completar_huellas(self, cursor, lote_id: int) -> int:
+        """
+        Calcula la huella de las filas del lote que no la tienen (p. ej. las
+        migradas de tablas antiguas) con una sola pasada de UPDATE, sin
+        confirmar. Devuelve el número de filas completadas.
+        """
+        m = self.MARCADOR
+        cursor.execute(
+            f"SELECT id, comentarios, calificacion, huella FROM {TABLA_COMENTARIOS} "
+            f"WHERE lote_id = {m} ORDER BY id", (lote_id,)
+        )
+        filas = pd.DataFrame(cursor.fetchall(), columns=['id', 'comentarios', 'calificacion', COLUMNA_HUELLA],
+                             dtype=object)
+        sin_huella = filas[COLUMNA_HUELLA].isna().to_numpy()
+        if not sin_huella.any():
+            return 0
+        # El número de aparición de cada fila depende de todo el lote, en orden de id
+        huellas = calcular_huellas(filas)
+        cursor.executemany(
+            f"UPDATE {TABLA_COMENTARIOS} SET huella = {m} WHERE lote_id = {m} AND id = {m}",
+            [(int(huella), lote_id, int(id_fila))
+             for huella, id_fila in zip(huellas[sin_huella], filas['id'].to_numpy()[sin_huella])]
+        )
+        return int(sin_huella.sum())
+
+    def _aplicar_delta(self, conn, cursor, datos: pd.DataFrame, lote_id: int, tamano_lote: int,
+                       progreso: Optional[Callable[[int, int], None]] = None) -> dict:
+        """
+        Implementación común de `combinar` sobre una conexión DB-API: lee las
+        huellas guardadas del lote (índice (lote_id, huella)), calcula la
+        diferencia y ejecuta borrados, actualizaciones e inserciones por lotes,
+        confirmando cada lote junto con el contador de filas del catálogo.
+        """
+        m = self.MARCADOR
+        cursor.execute(
+            f"SELECT id, huella, Clasificacion FROM {TABLA_COMENTARIOS} WHERE lote_id = {m}", (lote_id,)
+        )
+        existentes = pd.DataFrame(cursor.fetchall(), columns=['id', COLUMNA_HUELLA, 'Clasificacion'],
+                                  dtype=object)
+        huellas = calcular_huellas(datos)
+        delta = calcular_delta(existentes, datos, huellas)
+        insertar = delta['insertar']
+
+        operaciones = [
+            # (sentencia, filas, cambio en el contador de filas por fila)
+            (f"DELETE FROM {TABLA_COMENTARIOS} WHERE lote_id = {m} AND id = {m}",
+             [(lote_id, id_fila) for id_fila in delta['eliminar']], -1),
+            (f"UPDATE {TABLA_COMENTARIOS} SET Clasificacion = {m} WHERE lote_id = {m} AND id = {m}",
+             [(clase, lote_id, id_fila) for clase, id_fila in delta['actualizar']], 0),
+            (self._sql_insertar(),
+             self.filas_para_insertar(datos.iloc[insertar], lote_id, huellas[insertar]), 1),
+        ]
+        total = sum(len(filas) for _, filas, _ in operaciones)
+        hechas = 0
+        for sql, filas, cambio in operaciones:
+            for inicio in range(0, len(filas), tamano_lote):
+                lote = filas[inicio:inicio + tamano_lote]
+                cursor.executemany(sql, lote)
+                if cambio:
+                    cursor.execute(
+                        f"UPDATE {TABLA_CATALOGO} SET filas = filas + {m} WHERE id = {m}",
+                        (cambio * len(lote), lote_id)
+                    )
+                conn.commit()
+                hechas += len(lote)
+                if progreso:
+                    progreso(hechas, total)
+
+        return {
+            'insertadas': len(insertar),
+            'actualizadas': len(delta['actualizar']),
+            'eliminadas': len(delta['eliminar']),
+            'sin_cambios': delta['sin_cambios'],
+        }
+
+
+def crear_almacen(db_config: Optional[dict] = None, pool=None, motor: Optional[str] = None,
+                  ruta_sqlite: Optional[str] = None) -> AlmacenAnalisis:
+    """
+    Crea el almacén indicado por `motor` o por la variable de entorno GSSP_ALMACEN
+    ('mysql', por defecto, o 'sqlite').
+
+    Args:
+        db_config (Optional[dict]): Configuración de MySQL si no se recibe `pool`.
+        pool (Optional[PoolConexiones]): Pool de MySQL ya creado.
+        motor (Optional[str]): 'mysql' o 'sqlite'.
+        ruta_sqlite (Optional[str]): Archivo SQLite; por defecto GSSP_SQLITE o
+            'datos_analizados/analisis.sqlite'.
+    """
+    motor = (motor or os.environ.get('GSSP_ALMACEN') or 'mysql').lower()
+    if motor == 'sqlite':
+        from datos.AlmacenSQLite import AlmacenSQLite
+        return AlmacenSQLite(
+            ruta_sqlite or os.environ.get('GSSP_SQLITE')
+            or os.path.join('datos_analizados', 'analisis.sqlite')
+        )
+    if motor == 'mysql':
+        from datos.AlmacenMySQL import AlmacenMySQL
+        from datos.PoolConexiones import PoolConexiones
+        return AlmacenMySQL(pool if pool is not None else PoolConexiones(db_config or {}))
+    raise ValueError(f"Motor de almacenamiento no soportado: '{motor}'. Opciones: mysql, sqlite")
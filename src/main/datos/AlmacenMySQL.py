@@ -0,0 +1,251 @@
+import logging
+import os
+import tempfile
+from typing import Callable, Iterator, Optional
+
+import pandas as pd
+from mysql.connector import Error, errors
+
+from datos.AlmacenAnalisis import AlmacenAnalisis
+from datos.EsquemaBD import TABLA_CATALOGO, TABLA_COMENTARIOS, crear_esquema
+from datos.PoolConexiones import PoolConexiones
+
+logger = logging.getLogger(__name__)
+
+
+class AlmacenMySQL(AlmacenAnalisis):
+    """
+    Almacén de análisis en MySQL: tabla de hechos particionada por lote y
+    catálogo (ver datos.EsquemaBD), a través de un pool de conexiones compartido.
+    """
+    nombre = 'MySQL'
+    ERRORES = (Error,)
+    # Conexión rechazada o perdida, servidor caído, espera de bloqueo e interbloqueo
+    ERRNOS_TRANSITORIOS = {2003, 2006, 2013, 1205, 1213}
+
+    def __init__(self, pool: PoolConexiones):
+        """
+        Args:
+            pool (PoolConexiones): Pool compartido de conexiones.
+        """
+        self.pool = pool
+        self._esquema_creado = False
+
+    def _asegurar_esquema(self, cursor) -> None:
+        """Crea las tablas del esquema la primera vez que se usan."""
+        if not self._esquema_creado:
+            crear_esquema(cursor)
+            self._esquema_creado = True
+
+    def es_transitorio(self, error: Exception) -> bool:
+        return (
+            getattr(error, 'errno', None) in self.ERRNOS_TRANSITORIOS
+            or isinstance(error, (errors.OperationalError, errors.InterfaceError, errors.PoolError))
+        )
+
+    def _consultar(self, sql: str, parametros: tuple = ()) -> list[tuple]:
+        with self.pool.conexion() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(sql, parametros)
+                return cursor.fetchall()
+
+    @staticmethod
+    def _registrar_lote(cursor, nombre_analisis: str) -> int:
+        """Devuelve el id de lote del análisis, creándolo en el catálogo si no existe."""
+        cursor.execute(
+            f"INSERT INTO {TABLA_CATALOGO} (nombre) VALUES (%s) "
+            "ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)",
+            (nombre_analisis,)
+        )
+        return cursor.lastrowid
+
+    def guardar(self, datos: pd.DataFrame, nombre_analisis: str, tamano_lote: int,
+                progreso: Optional[Callable[[int, int], None]] = None,
+                usar_load_data: bool = False) -> None:
+        total = len(datos)
+        sql_filas = f"UPDATE {TABLA_CATALOGO} SET filas = filas + %s WHERE id = %s"
+        conexion = (
+            self.pool.conexion_directa(allow_local_infile=True)
+            if usar_load_data else self.pool.conexion()
+        )
+        with conexion as conn:
+            with conn.cursor() as cursor:
+                self._asegurar_esquema(cursor)
+                lote_id = self._registrar_lote(cursor, nombre_analisis)
+
+                if usar_load_data:
+                    self._cargar_con_load_data(cursor, datos, lote_id)
+                    cursor.execute(sql_filas, (total, lote_id))
+                    conn.commit()
+                    if progreso:
+                        progreso(total, total)
+                    return
+
+                sql = self._sql_insertar()
+                filas = self.filas_para_insertar(datos, lote_id)
+                for inicio in range(0, total, tamano_lote):
+                    lote = filas[inicio:inicio + tamano_lote]
+                    cursor.executemany(sql, lote)
+                    # El contador del catálogo se confirma junto con cada lote
+                    cursor.execute(sql_filas, (len(lote), lote_id))
+                    conn.commit()
+                    if progreso:
+                        progreso(min(inicio + tamano_lote, total), total)
+
+    def combinar(self, datos: pd.DataFrame, nombre_analisis: str, tamano_lote: int,
+                 progreso: Optional[Callable[[int, int], None]] = None) -> dict:
+        with self.pool.conexion() as conn:
+            with conn.cursor() as cursor:
+                self._asegurar_esquema(cursor)
+                lote_id = self._registrar_lote(cursor, nombre_analisis)
+                conn.commit()
+                return self._aplicar_delta(conn, cursor, datos, lote_id, tamano_lote, progreso)
+
+    def _cargar_con_load_data(self, cursor, datos: pd.DataFrame, lote_id: int) -> None:
+        """
+        Serializa los datos a CSV y los carga con LOAD DATA LOCAL INFILE.
+        mysql-connector solo acepta una ruta para LOCAL INFILE, así que el CSV se
+        escribe en un archivo temporal que se elimina al terminar.
+        """
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', encoding='utf-8', newline='', delete=False) as tmp:
+            self.columnas_para_insertar(datos).to_csv(
+                tmp, index=False, header=False, na_rep='NULL', lineterminator='\n'
+            )
+            ruta_tmp = tmp.name
+        try:
+            cursor.execute(
+                f"LOAD DATA LOCAL INFILE %s INTO TABLE {TABLA_COMENTARIOS} "
+                "CHARACTER SET utf8mb4 "
+                "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' "
+                "LINES TERMINATED BY '\\n' "
+                "(comentarios, calificacion, Clasificacion, longitud, huella) "
+                "SET lote_id = %s",
+                (ruta_tmp, lote_id)
+            )
+        finally:
+            os.remove(ruta_tmp)
+
+    def listar(self) -> list[str]:
+        with self.pool.conexion() as conn:
+            with conn.cursor() as cursor:
+                self._asegurar_esquema(cursor)
+                cursor.execute(f"SELECT nombre FROM {TABLA_CATALOGO} ORDER BY creado, id")
+                return [row[0] for row in cursor.fetchall()]
+
+    def lote_id(self, nombre_analisis: str) -> Optional[int]:
+        filas = self._consultar(f"SELECT id FROM {TABLA_CATALOGO} WHERE nombre = %s", (nombre_analisis,))
+        return filas[0][0] if filas else None
+
+    def cargar(self, nombre_analisis: str) -> pd.DataFrame:
+        with self.pool.conexion() as conn:
+            query = (
+                "SELECT c.comentarios, c.calificacion, c.Clasificacion "
+                f"FROM {TABLA_COMENTARIOS} c JOIN {TABLA_CATALOGO} k ON k.id = c.lote_id "
+                "WHERE k.nombre = %s ORDER BY c.id"
+            )
+            return pd.read_sql(query, conn, params=(nombre_analisis,))
+
+    def cargar_lote(self, lote_id: int) -> pd.DataFrame:
+        with self.pool.conexion() as conn:
+            return pd.read_sql(
+                "SELECT comentarios, calificacion, Clasificacion, longitud "
+                f"FROM {TABLA_COMENTARIOS} WHERE lote_id = %s ORDER BY id",
+                conn, params=(lote_id,)
+            )
+
+    def pagina(self, lote_id: int, tamano: int, despues_de: Optional[int] = None,
+               clase: Optional[str] = None) -> list[tuple]:
+        condiciones, parametros = ["lote_id = %s"], [lote_id]
+        if despues_de is not None:
+            condiciones.append("id > %s")
+            parametros.append(int(despues_de))
+        if clase is not None:
+            condiciones.append("Clasificacion = %s")
+            parametros.append(clase)
+        return self._consultar(
+            f"SELECT id, comentarios, calificacion, Clasificacion, longitud FROM {TABLA_COMENTARIOS} "
+            f"WHERE {' AND '.join(condiciones)} ORDER BY id LIMIT %s",
+            tuple(parametros) + (int(tamano),)
+        )
+
+    def conteo_por_clase(self, lote_id: int) -> list[tuple]:
+        return self._consultar(
+            f"SELECT Clasificacion, COUNT(*) AS cantidad FROM {TABLA_COMENTARIOS} "
+            "WHERE lote_id = %s AND Clasificacion IS NOT NULL "
+            "GROUP BY Clasificacion ORDER BY cantidad DESC",
+            (lote_id,)
+        )
+
+    def resumen_por_clase(self, lote_id: int) -> list[tuple]:
+        return self._consultar(
+            "SELECT Clasificacion, COUNT(comentarios), AVG(longitud) "
+            f"FROM {TABLA_COMENTARIOS} WHERE lote_id = %s AND Clasificacion IS NOT NULL "
+            "GROUP BY Clasificacion ORDER BY Clasificacion",
+            (lote_id,)
+        )
+
+    def histograma_longitud(self, lote_id: int, contenedores: int) -> list[tuple]:
+        return self._consultar(
+            "SELECT t.Clasificacion, "
+            "LEAST(FLOOR((t.longitud - m.minimo) * %s / GREATEST(m.maximo - m.minimo, 1)), %s) "
+            "AS contenedor, COUNT(*), MIN(m.minimo), MIN(m.maximo) "
+            f"FROM {TABLA_COMENTARIOS} t CROSS JOIN ("
+            "SELECT MIN(longitud) AS minimo, MAX(longitud) AS maximo "
+            f"FROM {TABLA_COMENTARIOS} WHERE lote_id = %s AND longitud IS NOT NULL) m "
+            "WHERE t.lote_id = %s AND t.longitud IS NOT NULL AND t.Clasificacion IS NOT NULL "
+            "GROUP BY t.Clasificacion, contenedor",
+            (contenedores, contenedores - 1, lote_id, lote_id)
+        )
+
+    def tendencia(self) -> list[tuple]:
+        return self._consultar(
+            "SELECT k.nombre, k.creado, c.Clasificacion, COUNT(*), AVG(c.longitud) "
+            f"FROM {TABLA_COMENTARIOS} c JOIN {TABLA_CATALOGO} k ON k.id = c.lote_id "
+            "WHERE c.Clasificacion IS NOT NULL "
+            "GROUP BY k.id, k.nombre, k.creado, c.Clasificacion "
+            "ORDER BY k.creado, k.id, c.Clasificacion"
+        )
+
+    def migrar_tablas_antiguas(self, eliminar_originales: bool = False) -> Iterator[tuple[str, int]]:
+        """
+        Copia cada tabla antigua 'analisis_<archivo>' a la tabla de hechos con un
+        lote propio en el catálogo (mismo nombre) y produce (tabla, filas) por
+        cada una. Las filas copiadas reciben su huella en la misma transacción,
+        así el primer `combinar` del análisis solo escribe la diferencia. Las
+        tablas que ya figuran en el catálogo se omiten, aunque antes se
+        completan las huellas que les falten (migraciones anteriores).
+        """
+        with self.pool.conexion() as conn:
+            with conn.cursor() as cursor:
+                self._asegurar_esquema(cursor)
+                cursor.execute("SHOW TABLES LIKE 'analisis\\_%'")
+                tablas = [row[0] for row in cursor.fetchall()]
+                cursor.execute(f"SELECT nombre, id FROM {TABLA_CATALOGO}")
+                existentes = dict(cursor.fetchall())
+
+                for tabla in tablas:
+                    if tabla in existentes:
+                        completadas = self._completar_huellas(cursor, existentes[tabla])
+                        if completadas:
+                            conn.commit()
+                            logger.info("Se completaron %d huellas de '%s'.", completadas, tabla)
+                        logger.info("Se omite '%s': ya está en el catálogo.", tabla)
+                        continue
+                    lote_id = self._registrar_lote(cursor, tabla)
+                    cursor.execute(
+                        f"INSERT INTO {TABLA_COMENTARIOS} "
+                        "(lote_id, comentarios, calificacion, Clasificacion, longitud) "
+                        "SELECT %s, comentarios, calificacion, Clasificacion, CHAR_LENGTH(comentarios) "
+                        f"FROM `{tabla}` ORDER BY id",
+                        (lote_id,)
+                    )
+                    filas = cursor.rowcount
+                    self._completar_huellas(cursor, lote_id)
+                    cursor.execute(
+                        f"UPDATE {TABLA_CATALOGO} SET filas = %s WHERE id = %s", (filas, lote_id)
+                    )
+                    conn.commit()
+                    if eliminar_originales:
+                        cursor.execute(f"DROP TABLE `{tabla}`")
+                    logger.info("Tabla '%s' migrada (%d filas).", tabla, filas)
+                    yield tabla, filas
@@ -0,0 +1,234 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+import pandas as pd
+
+from datos.AlmacenAnalisis import AlmacenAnalisis
+from datos.EsquemaBD import TABLA_CATALOGO, TABLA_COMENTARIOS
+
+SENTENCIAS_ESQUEMA_SQLITE = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {TABLA_CATALOGO} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nombre TEXT NOT NULL UNIQUE,
+        creado TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        filas INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS {TABLA_COMENTARIOS} (
+        id INTEGER PRIMARY KEY,
+        lote_id INTEGER NOT NULL,
+        comentarios TEXT,
+        calificacion REAL,
+        Clasificacion TEXT,
+        longitud INTEGER,
+        huella INTEGER
+    )
+    """,
+    f"CREATE INDEX IF NOT EXISTS idx_lote_id ON {TABLA_COMENTARIOS} (lote_id, id)",
+    f"CREATE INDEX IF NOT EXISTS idx_lote_clasificacion ON {TABLA_COMENTARIOS} (lote_id, Clasificacion)",
+    f"CREATE INDEX IF NOT EXISTS idx_lote_longitud ON {TABLA_COMENTARIOS} (lote_id, longitud)",
+]
+INDICE_HUELLA = f"CREATE INDEX IF NOT EXISTS idx_lote_huella ON {TABLA_COMENTARIOS} (lote_id, huella)"
+
+
+class AlmacenSQLite(AlmacenAnalisis):
+    """
+    Almacén de análisis en un archivo SQLite local, para usar la aplicación sin
+    servidor MySQL. Usa el mismo catálogo y tabla de hechos que MySQL, con los
+    mismos índices por lote, en modo WAL para que las lecturas de otras
+    sesiones no se bloqueen mientras se guarda: las escrituras usan una sola
+    conexión serializada con un lock y las lecturas, conexiones propias que
+    no esperan ese lock.
+    """
+    nombre = 'SQLite'
+    ERRORES = (sqlite3.Error,)
+    MARCADOR = '?'
+
+    def __init__(self, ruta: str):
+        """
+        Args:
+            ruta (str): Archivo de la base de datos; se crea si no existe.
+        """
+        self.ruta = ruta
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        # Una sola conexión de escritura compartida por los hilos de Streamlit,
+        # serializada con un lock; las lecturas toman una de `_lecturas_libres`
+        self._conn = sqlite3.connect(ruta, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._lecturas_libres = []
+        self._lock_lecturas = threading.Lock()
+        self._cerrado = False
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            for sentencia in SENTENCIAS_ESQUEMA_SQLITE:
+                self._conn.execute(sentencia)
+            # Archivos creados antes de la columna 'huella'
+            columnas = {fila[1] for fila in self._conn.execute(f"PRAGMA table_info({TABLA_COMENTARIOS})")}
+            if 'huella' not in columnas:
+                self._conn.execute(f"ALTER TABLE {TABLA_COMENTARIOS} ADD COLUMN huella INTEGER")
+            self._conn.execute(INDICE_HUELLA)
+            self._conn.commit()
+
+    def es_transitorio(self, error: Exception) -> bool:
+        # Otro proceso tiene el archivo bloqueado para escritura
+        return isinstance(error, sqlite3.OperationalError) and 'locked' in str(error)
+
+    @contextmanager
+    def _conexion_lectura(self) -> Iterator[sqlite3.Connection]:
+        """
+        Presta una conexión de solo lectura. En modo WAL varias pueden leer a la
+        vez, incluso mientras la conexión de escritura guarda un análisis; solo
+        se crean tantas como lecturas simultáneas haya habido.
+        """
+        with self._lock_lecturas:
+            conn = self._lecturas_libres.pop() if self._lecturas_libres else None
+        if conn is None:
+            conn = sqlite3.connect(self.ruta, check_same_thread=False)
+            conn.execute("PRAGMA query_only=ON")
+        try:
+            yield conn
+        finally:
+            with self._lock_lecturas:
+                if self._cerrado:
+                    conn.close()
+                else:
+                    self._lecturas_libres.append(conn)
+
+    def _consultar(self, sql: str, parametros: tuple = ()) -> list[tuple]:
+        with self._conexion_lectura() as conn:
+            return conn.execute(sql, parametros).fetchall()
+
+    def _leer_sql(self, sql: str, parametros: tuple) -> pd.DataFrame:
+        with self._conexion_lectura() as conn:
+            return pd.read_sql(sql, conn, params=parametros)
+
+    def cerrar(self) -> None:
+        with self._lock_lecturas:
+            self._cerrado = True
+            for conn in self._lecturas_libres:
+                conn.close()
+            self._lecturas_libres.clear()
+        self._conn.close()
+
+    def guardar(self, datos: pd.DataFrame, nombre_analisis: str, tamano_lote: int,
+                progreso: Optional[Callable[[int, int], None]] = None,
+                usar_load_data: bool = False) -> None:
+        # SQLite no tiene carga masiva desde archivo; `usar_load_data` se ignora
+        total = len(datos)
+        with self._lock:
+            cursor = self._conn.cursor()
+            lote_id = self._registrar_lote(cursor, nombre_analisis)
+            filas = self.filas_para_insertar(datos, lote_id)
+
+            sql = self._sql_insertar()
+            for inicio in range(0, total, tamano_lote):
+                lote = filas[inicio:inicio + tamano_lote]
+                cursor.executemany(sql, lote)
+                cursor.execute(
+                    f"UPDATE {TABLA_CATALOGO} SET filas = filas + ? WHERE id = ?", (len(lote), lote_id)
+                )
+                self._conn.commit()
+                if progreso:
+                    progreso(min(inicio + tamano_lote, total), total)
+
+    def _registrar_lote(self, cursor, nombre_analisis: str) -> int:
+        """Devuelve el id de lote del análisis, creándolo en el catálogo si no existe."""
+        cursor.execute(
+            f"INSERT INTO {TABLA_CATALOGO} (nombre) VALUES (?) ON CONFLICT(nombre) DO NOTHING",
+            (nombre_analisis,)
+        )
+        cursor.execute(f"SELECT id FROM {TABLA_CATALOGO} WHERE nombre = ?", (nombre_analisis,))
+        lote_id = cursor.fetchone()[0]
+        self._conn.commit()
+        return lote_id
+
+    def combinar(self, datos: pd.DataFrame, nombre_analisis: str, tamano_lote: int,
+                 progreso: Optional[Callable[[int, int], None]] = None) -> dict:
+        with self._lock:
+            cursor = self._conn.cursor()
+            lote_id = self._registrar_lote(cursor, nombre_analisis)
+            return self._aplicar_delta(self._conn, cursor, datos, lote_id, tamano_lote, progreso)
+
+    def listar(self) -> list[str]:
+        return [row[0] for row in self._consultar(f"SELECT nombre FROM {TABLA_CATALOGO} ORDER BY creado, id")]
+
+    def lote_id(self, nombre_analisis: str) -> Optional[int]:
+        filas = self._consultar(f"SELECT id FROM {TABLA_CATALOGO} WHERE nombre = ?", (nombre_analisis,))
+        return filas[0][0] if filas else None
+
+    def cargar(self, nombre_analisis: str) -> pd.DataFrame:
+        return self._leer_sql(
+            "SELECT c.comentarios, c.calificacion, c.Clasificacion "
+            f"FROM {TABLA_COMENTARIOS} c JOIN {TABLA_CATALOGO} k ON k.id = c.lote_id "
+            "WHERE k.nombre = ? ORDER BY c.id",
+            (nombre_analisis,)
+        )
+
+    def cargar_lote(self, lote_id: int) -> pd.DataFrame:
+        return self._leer_sql(
+            "SELECT comentarios, calificacion, Clasificacion, longitud "
+            f"FROM {TABLA_COMENTARIOS} WHERE lote_id = ? ORDER BY id",
+            (lote_id,)
+        )
+
+    def pagina(self, lote_id: int, tamano: int, despues_de: Optional[int] = None,
+               clase: Optional[str] = None) -> list[tuple]:
+        condiciones, parametros = ["lote_id = ?"], [lote_id]
+        if despues_de is not None:
+            condiciones.append("id > ?")
+            parametros.append(int(despues_de))
+        if clase is not None:
+            condiciones.append("Clasificacion = ?")
+            parametros.append(clase)
+        return self._consultar(
+            f"SELECT id, comentarios, calificacion, Clasificacion, longitud FROM {TABLA_COMENTARIOS} "
+            f"WHERE {' AND '.join(condiciones)} ORDER BY id LIMIT ?",
+            tuple(parametros) + (int(tamano),)
+        )
+
+    def conteo_por_clase(self, lote_id: int) -> list[tuple]:
+        return self._consultar(
+            f"SELECT Clasificacion, COUNT(*) AS cantidad FROM {TABLA_COMENTARIOS} "
+            "WHERE lote_id = ? AND Clasificacion IS NOT NULL "
+            "GROUP BY Clasificacion ORDER BY cantidad DESC",
+            (lote_id,)
+        )
+
+    def resumen_por_clase(self, lote_id: int) -> list[tuple]:
+        return self._consultar(
+            "SELECT Clasificacion, COUNT(comentarios), AVG(longitud) "
+            f"FROM {TABLA_COMENTARIOS} WHERE lote_id = ? AND Clasificacion IS NOT NULL "
+            "GROUP BY Clasificacion ORDER BY Clasificacion",
+            (lote_id,)
+        )
+
+    def histograma_longitud(self, lote_id: int, contenedores: int) -> list[tuple]:
+        # MIN/MAX de dos argumentos son escalares en SQLite (LEAST/GREATEST en MySQL)
+        return self._consultar(
+            "SELECT t.Clasificacion, "
+            "MIN(CAST((t.longitud - m.minimo) * ? / MAX(m.maximo - m.minimo, 1) AS INTEGER), ?) "
+            "AS contenedor, COUNT(*), MIN(m.minimo), MIN(m.maximo) "
+            f"FROM {TABLA_COMENTARIOS} t CROSS JOIN ("
+            "SELECT MIN(longitud) AS minimo, MAX(longitud) AS maximo "
+            f"FROM {TABLA_COMENTARIOS} WHERE lote_id = ? AND longitud IS NOT NULL) m "
+            "WHERE t.lote_id = ? AND t.longitud IS NOT NULL AND t.Clasificacion IS NOT NULL "
+            "GROUP BY t.Clasificacion, contenedor",
+            (contenedores, contenedores - 1, lote_id, lote_id)
+        )
+
+    def tendencia(self) -> list[tuple]:
+        return self._consultar(
+            "SELECT k.nombre, k.creado, c.Clasificacion, COUNT(*), AVG(c.longitud) "
+            f"FROM {TABLA_COMENTARIOS} c JOIN {TABLA_CATALOGO} k ON k.id = c.lote_id "
+            "WHERE c.Clasificacion IS NOT NULL "
+            "GROUP BY k.id, k.nombre, k.creado, c.Clasificacion "
+            "ORDER BY k.creado, k.id, c.Clasificacion"
+        )
@@ -0,0 +1,138 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable, Optional
+
+
+class CachePredicciones:
+    """
+    Caché persistente de predicciones en SQLite. Cada entrada se identifica con el
+    hash de (comentario limpio, calificación, versión del modelo); cuando se supera
+    `max_entradas` se eliminan las entradas usadas hace más tiempo.
+    """
+    LOTE_CONSULTA = 900  # por debajo del límite de parámetros de SQLite
+
+    def __init__(self, ruta_archivo: str, max_entradas: int = 1_000_000):
+        """
+        Args:
+            ruta_archivo (str): Archivo SQLite (se crea si no existe).
+            max_entradas (int): Número máximo de predicciones guardadas.
+        """
+        self.ruta_archivo = ruta_archivo
+        self.max_entradas = max_entradas
+        self._aciertos = 0
+        self._fallos = 0
+        self._lock = threading.Lock()
+
+        directorio = os.path.dirname(ruta_archivo)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        self._conn = sqlite3.connect(ruta_archivo, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # 'clasificacion' sin tipo declarado conserva enteros y textos tal cual
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS predicciones ("
+            "clave TEXT PRIMARY KEY, clasificacion, confianza REAL, ultimo_uso REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_predicciones_uso ON predicciones (ultimo_uso)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def calcular_claves(comentarios: Iterable, calificaciones: Iterable, version_modelo: str) -> list[str]:
+        """Calcula la clave SHA-256 de cada par (comentario, calificación)."""
+        claves = []
+        for comentario, calificacion in zip(comentarios, calificaciones):
+            if isinstance(calificacion, float) and calificacion.is_integer():
+                calificacion = int(calificacion)
+            texto = f"{version_modelo}\x1f{calificacion}\x1f{comentario}"
+            claves.append(hashlib.sha256(texto.encode('utf-8')).hexdigest())
+        return claves
+
+    def buscar(self, claves: list[str]) -> dict:
+        """
+        Devuelve {clave: (clasificacion, confianza)} para las claves encontradas y
+        actualiza su último uso.
+        """
+        encontrados = {}
+        ahora = time.time()
+        unicas = list(dict.fromkeys(claves))
+        with self._lock:
+            for inicio in range(0, len(unicas), self.LOTE_CONSULTA):
+                lote = unicas[inicio:inicio + self.LOTE_CONSULTA]
+                marcadores = ','.join('?' * len(lote))
+                filas = self._conn.execute(
+                    f"SELECT clave, clasificacion, confianza FROM predicciones WHERE clave IN ({marcadores})",
+                    lote
+                ).fetchall()
+                for clave, clasificacion, confianza in filas:
+                    encontrados[clave] = (clasificacion, confianza)
+                if filas:
+                    marcadores = ','.join('?' * len(filas))
+                    self._conn.execute(
+                        f"UPDATE predicciones SET ultimo_uso = ? WHERE clave IN ({marcadores})",
+                        [ahora] + [f[0] for f in filas]
+                    )
+            self._conn.commit()
+            self._aciertos += len(encontrados)
+            self._fallos += len(unicas) - len(encontrados)
+        return encontrados
+
+    def guardar(self, claves: list[str], clasificaciones: Iterable, confianzas: Optional[Iterable] = None) -> None:
+        """Guarda (o reemplaza) predicciones y aplica el límite de entradas."""
+        if confianzas is None:
+            confianzas = [None] * len(claves)
+        ahora = time.time()
+        registros = [
+            (clave, self._valor_nativo(clasificacion), self._valor_nativo(confianza), ahora)
+            for clave, clasificacion, confianza in zip(claves, clasificaciones, confianzas)
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO predicciones (clave, clasificacion, confianza, ultimo_uso) "
+                "VALUES (?, ?, ?, ?)",
+                registros
+            )
+            self._desalojar()
+            self._conn.commit()
+
+    def _desalojar(self) -> None:
+        total = self._conn.execute("SELECT COUNT(*) FROM predicciones").fetchone()[0]
+        exceso = total - self.max_entradas
+        if exceso > 0:
+            self._conn.execute(
+                "DELETE FROM predicciones WHERE clave IN ("
+                "SELECT clave FROM predicciones ORDER BY ultimo_uso LIMIT ?)",
+                (exceso,)
+            )
+
+    @staticmethod
+    def _valor_nativo(valor):
+        """Convierte escalares de numpy a tipos nativos que sqlite3 puede guardar."""
+        return valor.item() if hasattr(valor, 'item') else valor
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            entradas = self._conn.execute("SELECT COUNT(*) FROM predicciones").fetchone()[0]
+            consultas = self._aciertos + self._fallos
+            return {
+                'entradas': entradas,
+                'aciertos': self._aciertos,
+                'fallos': self._fallos,
+                'tasa_aciertos': self._aciertos / consultas if consultas else 0.0,
+            }
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM predicciones")
+            self._conn.commit()
+            self._aciertos = 0
+            self._fallos = 0
+
+    def cerrar(self) -> None:
+        with self._lock:
+            self._conn.close()
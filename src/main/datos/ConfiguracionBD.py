@@ -0,0 +1,51 @@
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+# Valores usados cuando no hay archivo de configuración ni variables de entorno.
+CONFIGURACION_POR_DEFECTO = {
+    'host': 'localhost',
+    'user': 'user',
+    'password': 'password',
+    'database': 'cosmitos_imperiales_db'
+}
+
+# Variable de entorno -> (clave de configuración, conversión)
+VARIABLES_ENTORNO = {
+    'GSSP_DB_HOST': ('host', str),
+    'GSSP_DB_PORT': ('port', int),
+    'GSSP_DB_USER': ('user', str),
+    'GSSP_DB_PASSWORD': ('password', str),
+    'GSSP_DB_DATABASE': ('database', str),
+    'GSSP_DB_POOL_SIZE': ('pool_size', int),
+}
+
+
+def cargar_configuracion_bd(ruta_archivo: str = None) -> dict:
+    """
+    Construye la configuración de la base de datos a partir de, en orden de prioridad:
+    las variables de entorno GSSP_DB_*, un archivo JSON (argumento `ruta_archivo`
+    o variable GSSP_DB_CONFIG) y los valores por defecto.
+
+    Returns:
+        dict: Parámetros para mysql.connector; puede incluir 'pool_size'.
+    """
+    configuracion = dict(CONFIGURACION_POR_DEFECTO)
+
+    ruta_archivo = ruta_archivo or os.environ.get('GSSP_DB_CONFIG')
+    if ruta_archivo:
+        try:
+            with open(ruta_archivo, encoding='utf-8') as archivo:
+                configuracion.update(json.load(archivo))
+        except (OSError, ValueError) as e:
+            logger.warning("No se pudo leer la configuración de BD '%s': %s", ruta_archivo, e)
+
+    for variable, (clave, conversion) in VARIABLES_ENTORNO.items():
+        valor = os.environ.get(variable)
+        if valor is not None and valor != '':
+            configuracion[clave] = conversion(valor)
+
+    return configuracion
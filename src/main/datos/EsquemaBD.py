@@ -0,0 +1,63 @@
+"""
+Esquema normalizado de los análisis en MySQL.
+
+Todos los análisis comparten una tabla de hechos (`comentarios_analisis`) que se
+particiona por lote, y un catálogo (`catalogo_analisis`) con una fila por
+análisis guardado. Los nombres no empiezan con 'analisis_' para no confundirse
+con las tablas antiguas de una tabla por archivo.
+"""
+
+TABLA_CATALOGO = 'catalogo_analisis'
+TABLA_COMENTARIOS = 'comentarios_analisis'
+PARTICIONES = 16
+
+SENTENCIAS_ESQUEMA = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {TABLA_CATALOGO} (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        nombre VARCHAR(255) NOT NULL,
+        creado DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        filas INT NOT NULL DEFAULT 0,
+        UNIQUE KEY uk_catalogo_nombre (nombre),
+        KEY idx_catalogo_creado (creado)
+    )
+    """,
+    # La llave de partición debe formar parte de la llave primaria, y MySQL no
+    # admite llaves foráneas en tablas particionadas.
+    f"""
+    CREATE TABLE IF NOT EXISTS {TABLA_COMENTARIOS} (
+        lote_id INT NOT NULL,
+        id BIGINT NOT NULL AUTO_INCREMENT,
+        comentarios TEXT,
+        calificacion FLOAT,
+        Clasificacion VARCHAR(32),
+        longitud INT,
+        huella BIGINT,
+        PRIMARY KEY (lote_id, id),
+        KEY idx_comentarios_id (id),
+        KEY idx_lote_clasificacion (lote_id, Clasificacion),
+        KEY idx_lote_longitud (lote_id, longitud),
+        KEY idx_lote_huella (lote_id, huella)
+    )
+    PARTITION BY KEY (lote_id) PARTITIONS {PARTICIONES}
+    """,
+]
+
+# Cambios para tablas creadas con una versión anterior del esquema, con los
+# códigos de error que indican que ya se aplicaron (1060: columna duplicada).
+ACTUALIZACIONES_ESQUEMA = [
+    (f"ALTER TABLE {TABLA_COMENTARIOS} ADD COLUMN huella BIGINT, "
+     "ADD KEY idx_lote_huella (lote_id, huella)", {1060}),
+]
+
+
+def crear_esquema(cursor) -> None:
+    """Crea las tablas del esquema si todavía no existen y las actualiza."""
+    for sentencia in SENTENCIAS_ESQUEMA:
+        cursor.execute(sentencia)
+    for sentencia, ya_aplicada in ACTUALIZACIONES_ESQUEMA:
+        try:
+            cursor.execute(sentencia)
+        except Exception as e:
+            if getattr(e, 'errno', None) not in ya_aplicada:
+                raise
@@ -0,0 +1,208 @@
+"""
+Formatos de archivo para los análisis guardados en disco.
+
+Cada formato sabe escribir, leer (opcionalmente solo algunas columnas) y
+validar un archivo. `GuardarDatosArchivo` elige uno por nombre con
+`obtener_formato`.
+"""
+import hashlib
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import Optional
+
+import pandas as pd
+
+
+class FormatoArchivo(ABC):
+    """Interfaz común de los formatos de archivo."""
+    nombre = ''
+    extension = ''
+
+    @abstractmethod
+    def escribir(self, datos: pd.DataFrame, ruta: str) -> None:
+        """Escribe `datos` en `ruta`, reemplazando el archivo si existe."""
+
+    @abstractmethod
+    def leer(self, ruta: str, columnas: Optional[list[str]] = None) -> pd.DataFrame:
+        """Lee el archivo completo o solo `columnas`."""
+
+    def agregar(self, datos: pd.DataFrame, ruta: str) -> None:
+        """Agrega filas al final del archivo (por defecto lo reescribe completo)."""
+        self.escribir(pd.concat([self.leer(ruta), datos], ignore_index=True), ruta)
+
+    @abstractmethod
+    def validar(self, ruta: str, profundo: bool = False) -> tuple[bool, str]:
+        """
+        Comprueba que el archivo sea legible; devuelve (es_valido, mensaje).
+        Con `profundo` se hacen además las comprobaciones costosas del formato.
+        """
+
+
+class FormatoCSV(FormatoArchivo):
+    """CSV UTF-8 con BOM, legible directamente en Excel."""
+    nombre = 'csv'
+    extension = 'csv'
+
+    def escribir(self, datos: pd.DataFrame, ruta: str) -> None:
+        datos.to_csv(ruta, index=False, encoding='utf-8-sig')
+
+    def leer(self, ruta: str, columnas: Optional[list[str]] = None) -> pd.DataFrame:
+        return pd.read_csv(ruta, usecols=columnas, encoding='utf-8-sig')
+
+    def agregar(self, datos: pd.DataFrame, ruta: str) -> None:
+        # Solo se escriben las filas nuevas, en el orden de columnas del encabezado
+        columnas = pd.read_csv(ruta, nrows=0, encoding='utf-8-sig').columns.tolist()
+        if set(columnas) != set(datos.columns):
+            raise ValueError("Las columnas no coinciden con las del archivo.")
+        datos[columnas].to_csv(ruta, mode='a', header=False, index=False, encoding='utf-8')
+
+    def validar(self, ruta: str, profundo: bool = False) -> tuple[bool, str]:
+        # El CSV no tiene metadatos: la única validación posible es leerlo completo
+        try:
+            pd.read_csv(ruta)
+            return True, "El CSV se leyó correctamente."
+        except Exception as e:
+            return False, str(e)
+
+
+class FormatoParquet(FormatoArchivo):
+    """
+    Parquet comprimido con zstd: 'Clasificacion' con codificación de diccionario,
+    'calificacion' como Int8 cuando sus valores lo permiten y sumas de
+    verificación por página. Junto a cada archivo se escribe `<archivo>.sha256`
+    para la validación profunda.
+    La lectura usa memoria mapeada y solo decodifica las columnas pedidas.
+    """
+    nombre = 'parquet'
+    extension = 'parquet'
+    CLAVE_METADATOS = b'gssp'
+    COMPRESION = 'zstd'
+
+    @staticmethod
+    def _pyarrow():
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError(
+                "El formato Parquet requiere pyarrow (pip install pyarrow)."
+            ) from e
+        return pyarrow, pyarrow.parquet
+
+    @staticmethod
+    def _tipos_compactos(datos: pd.DataFrame) -> pd.DataFrame:
+        compacto = datos.copy(deep=False)
+        if 'Clasificacion' in compacto.columns:
+            compacto['Clasificacion'] = compacto['Clasificacion'].astype('category')
+        if 'calificacion' in compacto.columns:
+            calificacion = pd.to_numeric(compacto['calificacion'], errors='coerce')
+            validas = calificacion.dropna()
+            if validas.between(-128, 127).all() and (validas % 1 == 0).all():
+                compacto['calificacion'] = calificacion.astype('Int8')
+        if 'longitud' in compacto.columns and pd.api.types.is_numeric_dtype(compacto['longitud']):
+            compacto['longitud'] = compacto['longitud'].astype('Int32')
+        return compacto
+
+    @staticmethod
+    def calcular_sha256(ruta: str) -> str:
+        digest = hashlib.sha256()
+        with open(ruta, 'rb') as archivo:
+            for bloque in iter(lambda: archivo.read(1024 * 1024), b''):
+                digest.update(bloque)
+        return digest.hexdigest()
+
+    def escribir(self, datos: pd.DataFrame, ruta: str) -> None:
+        pa, pq = self._pyarrow()
+        tabla = pa.Table.from_pandas(self._tipos_compactos(datos), preserve_index=False)
+        metadatos = dict(tabla.schema.metadata or {})
+        metadatos[self.CLAVE_METADATOS] = json.dumps({
+            'filas': tabla.num_rows,
+            'columnas': tabla.column_names,
+        }).encode('utf-8')
+        tabla = tabla.replace_schema_metadata(metadatos)
+
+        ruta_temporal = f"{ruta}.tmp"
+        pq.write_table(
+            tabla, ruta_temporal,
+            compression=self.COMPRESION,
+            use_dictionary=['Clasificacion'] if 'Clasificacion' in tabla.column_names else False,
+            write_page_checksum=True
+        )
+        os.replace(ruta_temporal, ruta)
+        with open(f"{ruta}.sha256", 'w', encoding='utf-8') as archivo:
+            archivo.write(self.calcular_sha256(ruta))
+
+    def leer(self, ruta: str, columnas: Optional[list[str]] = None) -> pd.DataFrame:
+        _, pq = self._pyarrow()
+        return pq.read_table(
+            ruta, columns=columnas, memory_map=True, page_checksum_verification=True
+        ).to_pandas()
+
+    def validar(self, ruta: str, profundo: bool = False) -> tuple[bool, str]:
+        """
+        Comprueba el pie del archivo (esquema y número de filas contra los
+        metadatos escritos) y las sumas de verificación de cada página, grupo
+        de filas por grupo de filas. Las sumas por página solo cubren los datos,
+        no los encabezados de página ni las estadísticas; para eso `profundo`
+        compara además el SHA-256 del archivo completo con `<archivo>.sha256`.
+        """
+        _, pq = self._pyarrow()
+        try:
+            archivo = pq.ParquetFile(ruta, memory_map=True, page_checksum_verification=True)
+        except Exception as e:
+            return False, f"Pie de Parquet ilegible: {e}"
+
+        with archivo:
+            metadatos = archivo.metadata
+            propios = (metadatos.metadata or {}).get(self.CLAVE_METADATOS)
+            if propios is None:
+                return False, "El archivo no tiene metadatos de GSSP."
+            try:
+                propios = json.loads(propios)
+                filas, columnas = propios['filas'], propios['columnas']
+            except (ValueError, KeyError, TypeError) as e:
+                return False, f"Metadatos de GSSP ilegibles: {e}"
+            if filas != metadatos.num_rows:
+                return False, (f"El pie indica {metadatos.num_rows} filas, "
+                               f"pero se escribieron {filas}.")
+            if columnas != archivo.schema_arrow.names:
+                return False, "Las columnas del archivo no coinciden con las escritas."
+
+            try:
+                for grupo in range(archivo.num_row_groups):
+                    archivo.read_row_group(grupo)
+            except Exception as e:
+                return False, f"Página dañada: {e}"
+
+        if profundo:
+            ruta_suma = f"{ruta}.sha256"
+            if not os.path.exists(ruta_suma):
+                return False, f"No existe '{ruta_suma}' para la validación profunda."
+            with open(ruta_suma, encoding='utf-8') as suma:
+                esperado = suma.read().strip()
+            if esperado != self.calcular_sha256(ruta):
+                return False, "La suma SHA-256 no coincide: el archivo cambió o está dañado."
+        return True, f"Parquet válido ({metadatos.num_rows} filas)."
+
+
+FORMATOS = {formato.nombre: formato for formato in (FormatoCSV(), FormatoParquet())}
+
+
+def obtener_formato(nombre: str) -> FormatoArchivo:
+    """Devuelve el formato registrado con `nombre` ('csv' o 'parquet')."""
+    try:
+        return FORMATOS[nombre.lower()]
+    except KeyError:
+        raise ValueError(
+            f"Formato de archivo no soportado: '{nombre}'. Opciones: {', '.join(FORMATOS)}"
+        ) from None
+
+
+def formato_por_ruta(ruta: str) -> FormatoArchivo:
+    """Devuelve el formato correspondiente a la extensión de `ruta`."""
+    extension = os.path.splitext(ruta)[1].lstrip('.').lower()
+    for formato in FORMATOS.values():
+        if formato.extension == extension:
+            return formato
+    raise ValueError(f"Extensión de archivo no soportada: '{extension}'")
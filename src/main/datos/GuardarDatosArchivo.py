@@ -1,26 +1,43 @@
 # persistencia_servicio.py
+import logging
+import numpy as np
 import pandas as pd
 import os
 from datetime import datetime
+from typing import Optional
+from datos.FormatosArchivo import obtener_formato, formato_por_ruta
+from datos.HuellaFilas import COLUMNA_HUELLA, calcular_delta, calcular_huellas
+
+logger = logging.getLogger(__name__)
+
 
 class GuardarDatosArchivo:
     """
     Se encarga de la persistencia y almacenamiento de datos en archivos.
+
+    El archivo conserva las columnas de siempre ('calificacion', 'comentarios',
+    'Clasificacion', 'longitud'): las columnas internas no se escriben y las
+    huellas de las filas (ver datos.HuellaFilas) van aparte, en
+    `<archivo>.huellas.npy`, en el mismo orden que las filas del archivo.
     """
-    def __init__(self, directorio_base: str = 'datos_procesados'):
+    COLUMNAS_INTERNAS = [COLUMNA_HUELLA, 'Confianza', 'palabras']
+    SUFIJO_HUELLAS = '.huellas.npy'
+    def __init__(self, directorio_base: str = 'datos_procesados', formato: str = 'csv'):
         """
         Inicializa el servicio de guardado.
 
         Args:
             directorio_base (str): La carpeta donde se guardarán los archivos.
+            formato (str): Formato de los archivos: 'csv' o 'parquet'.
         """
         self.directorio_base = directorio_base
+        self.formato = obtener_formato(formato)
         os.makedirs(self.directorio_base, exist_ok=True)
-        print(f"Servicio de Guardado inicializado. Los archivos se guardarán en '{self.directorio_base}/'")
+        logger.debug("Servicio de Guardado inicializado. Los archivos se guardarán en '%s/'", self.directorio_base)
 
     def guardar_datos_limpios(self, datos: pd.DataFrame, nombre_base_archivo: str) -> tuple[bool, str]:
         """
-        Guarda los datos limpios en formato CSV, usando un nombre de archivo dinámico.
+        Guarda los datos limpios en el formato configurado, usando un nombre de archivo dinámico.
 
         Args:
             datos (pd.DataFrame): El DataFrame con los datos limpios.
@@ -32,45 +49,167 @@ class GuardarDatosArchivo:
         """
         if not isinstance(datos, pd.DataFrame) or datos.empty:
             msg = "Error: No se proporcionaron datos válidos para guardar."
-            print(msg)
+            logger.error(msg)
             return False, msg
             
         # Construir la ruta completa del archivo
-        ruta_completa = os.path.join(self.directorio_base, f"{nombre_base_archivo}_limpio.csv")
+        ruta_completa = self.ruta_archivo(nombre_base_archivo)
         
-        print(f"Intentando guardar datos en: '{ruta_completa}'")
+        logger.debug("Intentando guardar datos en: '%s'", ruta_completa)
         try:
-            datos.to_csv(ruta_completa, index=False, encoding='utf-8-sig')
+            self._escribir(datos, ruta_completa)
             msg = f"¡Éxito! Datos guardados correctamente en '{ruta_completa}'."
-            print(msg)
+            logger.info(msg)
             return True, msg
         except Exception as e:
             msg = f"ERROR: No se pudo guardar el archivo. Razón: {e}"
-            print(msg)
+            logger.error(msg)
             return False, msg
 
+    def combinar_datos(self, datos: pd.DataFrame, nombre_base_archivo: str) -> tuple[bool, str]:
+        """
+        Deja el archivo de `nombre_base_archivo` igual a `datos`. Las filas se
+        comparan por su huella (guardada en `<archivo>.huellas.npy`): si no
+        hay cambios el archivo no se toca y si solo hay filas nuevas se agregan
+        al final. Cualquier fila eliminada o con otra clase obliga a reescribir
+        el archivo completo (ni el CSV ni el Parquet permiten borrar o cambiar
+        filas en su lugar); un comentario corregido cuenta como eliminado más
+        insertado, así que volver a subir un mes con correcciones reescribe su
+        archivo. Solo la base de datos escribe únicamente la diferencia.
+
+        Returns:
+            tuple[bool, str]: (éxito, mensaje con el resumen de cambios).
+        """
+        if not isinstance(datos, pd.DataFrame) or datos.empty:
+            msg = "Error: No se proporcionaron datos válidos para guardar."
+            logger.error(msg)
+            return False, msg
+
+        ruta_completa = self.ruta_archivo(nombre_base_archivo)
+        huellas = calcular_huellas(datos)
+        if not os.path.exists(ruta_completa):
+            return self.guardar_datos_limpios(datos, nombre_base_archivo)
+
+        guardadas = self._leer_huellas(ruta_completa)
+        try:
+            existentes = self.formato.leer(ruta_completa, ['Clasificacion'])
+        except Exception as e:
+            # Archivo ilegible o sin clasificación: se reescribe completo
+            logger.warning("No se pudo leer '%s' (%s); se reescribe.", ruta_completa, e)
+            return self.guardar_datos_limpios(datos, nombre_base_archivo)
+        if guardadas is None or len(guardadas) != len(existentes):
+            # Archivo guardado sin huellas o escrito a medias: se reescribe completo
+            return self.guardar_datos_limpios(datos, nombre_base_archivo)
+
+        existentes = existentes.astype(object)
+        existentes['id'] = range(len(existentes))
+        existentes[COLUMNA_HUELLA] = guardadas.astype(object)
+        delta = calcular_delta(existentes, datos, huellas)
+        resumen = (f"{len(delta['insertar'])} nuevas, {len(delta['actualizar'])} actualizadas, "
+                   f"{len(delta['eliminar'])} eliminadas, {delta['sin_cambios']} sin cambios")
+
+        try:
+            if delta['eliminar'] or delta['actualizar']:
+                self._escribir(datos, ruta_completa, huellas)
+            elif len(delta['insertar']):
+                try:
+                    self._agregar(datos.iloc[delta['insertar']], ruta_completa,
+                                  guardadas, huellas[delta['insertar']])
+                except ValueError:
+                    # Columnas distintas a las del archivo: se reescribe
+                    self._escribir(datos, ruta_completa, huellas)
+        except Exception as e:
+            msg = f"ERROR: No se pudo combinar el archivo. Razón: {e}"
+            logger.error(msg)
+            return False, msg
+        msg = f"Archivo '{ruta_completa}' combinado: {resumen}."
+        logger.info(msg)
+        return True, msg
+
+    def _escribir(self, datos: pd.DataFrame, ruta: str, huellas: Optional[np.ndarray] = None) -> None:
+        """Escribe el archivo sin las columnas internas y, aparte, sus huellas."""
+        # Las huellas se borran antes: si la escritura se interrumpe, el próximo
+        # `combinar_datos` no las encuentra y reescribe el archivo completo
+        self._borrar_huellas(ruta)
+        self.formato.escribir(self._columnas_archivo(datos), ruta)
+        if huellas is None and {'comentarios', 'calificacion'} <= set(datos.columns):
+            huellas = calcular_huellas(datos)
+        if huellas is not None:
+            self._escribir_huellas(ruta, huellas)
+
+    def _agregar(self, datos: pd.DataFrame, ruta: str, guardadas: np.ndarray, huellas: np.ndarray) -> None:
+        """Agrega `datos` al final del archivo y `huellas` al final de las guardadas."""
+        self._borrar_huellas(ruta)
+        self.formato.agregar(self._columnas_archivo(datos), ruta)
+        self._escribir_huellas(ruta, np.concatenate([guardadas, huellas]))
+
+    def _columnas_archivo(self, datos: pd.DataFrame) -> pd.DataFrame:
+        return datos.drop(columns=[c for c in self.COLUMNAS_INTERNAS if c in datos.columns])
+
+    def _escribir_huellas(self, ruta: str, huellas: np.ndarray) -> None:
+        ruta_temporal = f"{ruta}.huellas.tmp.npy"
+        np.save(ruta_temporal, np.asarray(huellas, dtype=np.int64), allow_pickle=False)
+        os.replace(ruta_temporal, ruta + self.SUFIJO_HUELLAS)
+
+    def _leer_huellas(self, ruta: str) -> Optional[np.ndarray]:
+        """Huellas guardadas junto a `ruta`, o None si no existen o están dañadas."""
+        try:
+            huellas = np.load(ruta + self.SUFIJO_HUELLAS, allow_pickle=False)
+        except (OSError, ValueError):
+            return None
+        return huellas if huellas.dtype == np.int64 and huellas.ndim == 1 else None
+
+    def _borrar_huellas(self, ruta: str) -> None:
+        try:
+            os.remove(ruta + self.SUFIJO_HUELLAS)
+        except FileNotFoundError:
+            pass
+
+    def ruta_archivo(self, nombre_base_archivo: str) -> str:
+        """Ruta del archivo de datos limpios de `nombre_base_archivo`."""
+        return os.path.join(self.directorio_base, f"{nombre_base_archivo}_limpio.{self.formato.extension}")
+
+    def cargar_datos(self, nombre_base_archivo: str, columnas: Optional[list[str]] = None) -> pd.DataFrame:
+        """
+        Carga un archivo guardado con `guardar_datos_limpios`.
+
+        Args:
+            nombre_base_archivo (str): Nombre base usado al guardar.
+            columnas (Optional[list[str]]): Columnas a leer; None lee todas.
+        """
+        ruta_completa = self.ruta_archivo(nombre_base_archivo)
+        try:
+            return self.formato.leer(ruta_completa, columnas)
+        except Exception as e:
+            logger.error("No se pudo leer '%s'. Razón: %s", ruta_completa, e)
+            return pd.DataFrame()
+
     def crear_respaldo(self, datos: pd.DataFrame, nombre_base_archivo: str) -> bool:
         """
         Crea un respaldo de los datos con un timestamp en el nombre del archivo.
         """
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        nombre_respaldo = f"{nombre_base_archivo}_respaldo_{timestamp}.csv"
+        nombre_respaldo = f"{nombre_base_archivo}_respaldo_{timestamp}_limpio.{self.formato.extension}"
         ruta_respaldo = os.path.join(self.directorio_base, nombre_respaldo)
         
-        print(f"Creando respaldo en: '{ruta_respaldo}'")
+        logger.info("Creando respaldo en: '%s'", ruta_respaldo)
         return self.guardar_datos_limpios(datos, f"{nombre_base_archivo}_respaldo_{timestamp}")
     
-    def validar_integridad_datos(self, ruta_archivo: str) -> bool:
+    def validar_integridad_datos(self, ruta_archivo: str, profundo: bool = False) -> bool:
         """
-        Valida si un archivo CSV se puede leer correctamente con pandas.
+        Valida la integridad de un archivo según su extensión. Un CSV se lee
+        completo; un Parquet se valida con los metadatos de su pie y las sumas
+        de verificación de sus páginas y, con `profundo`, con su suma SHA-256.
         """
         try:
-            pd.read_csv(ruta_archivo)
-            print(f"Validación de integridad exitosa para '{ruta_archivo}'.")
-            return True
+            valido, razon = formato_por_ruta(ruta_archivo).validar(ruta_archivo, profundo=profundo)
         except Exception as e:
-            print(f"Fallo en la validación de integridad para '{ruta_archivo}'. Razón: {e}")
-            return False
+            valido, razon = False, str(e)
+        if valido:
+            logger.info("Validación de integridad exitosa para '%s'.", ruta_archivo)
+        else:
+            logger.warning("Fallo en la validación de integridad para '%s'. Razón: %s", ruta_archivo, razon)
+        return valido
     
     def obtener_metadatos_archivo(self, ruta_archivo: str) -> dict:
         """
@@ -85,5 +224,5 @@ class GuardarDatosArchivo:
             }
             return metadatos
         except FileNotFoundError:
-            print(f"No se pudo obtener metadatos. Archivo no encontrado: '{ruta_archivo}'")
+            logger.warning("No se pudo obtener metadatos. Archivo no encontrado: '%s'", ruta_archivo)
             return {}
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""
+Identidad de las filas de un análisis por su contenido.
+
+La huella de una fila es un hash de 64 bits de su comentario y su calificación
+más el número de aparición de ese par en los datos, de modo que dos filas
+idénticas tienen huellas distintas y volver a subir el mismo archivo produce
+exactamente las mismas huellas. La clasificación no forma parte de la huella:
+si cambia (p. ej. con otro modelo) la fila se actualiza en lugar de duplicarse.
+"""
+import numpy as np
+import pandas as pd
+
+COLUMNA_HUELLA = 'huella'
+
+
+def calcular_huellas(datos: pd.DataFrame) -> np.ndarray:
+    """
+    Devuelve la huella de cada fila de `datos` como int64 (cabe en BIGINT de
+    MySQL y en INTEGER de SQLite).
+    """
+    # Tipos normalizados: la calificación puede llegar como float, Int8 o texto
+    contenido = pd.DataFrame({
+        'comentarios': datos['comentarios'].astype(object).where(datos['comentarios'].notna(), None),
+        'calificacion': pd.to_numeric(datos['calificacion'], errors='coerce').astype('float64'),
+    })
+    base = pd.util.hash_pandas_object(contenido, index=False).to_numpy()
+    aparicion = pd.Series(base).groupby(base).cumcount().to_numpy()
+    huellas = pd.util.hash_pandas_object(
+        pd.DataFrame({'base': base, 'aparicion': aparicion}), index=False
+    ).to_numpy()
+    return huellas.view(np.int64)
+
+
+def calcular_delta(existentes: pd.DataFrame, datos: pd.DataFrame, huellas: np.ndarray) -> dict:
+    """
+    Compara lo guardado con los datos nuevos.
+
+    Args:
+        existentes (pd.DataFrame): 'id', 'huella' y 'Clasificacion' de lo guardado
+            ('id' puede ser la posición de la fila en un archivo). 'huella' debe
+            ser entera u object: como float64 perdería precisión.
+        datos (pd.DataFrame): Datos nuevos con 'Clasificacion'.
+        huellas (np.ndarray): Huellas de `datos` (ver `calcular_huellas`).
+
+    Returns:
+        dict: 'eliminar' (ids guardados que ya no están o no tienen huella),
+        'actualizar' (lista de (Clasificacion, id) cuya clase cambió),
+        'insertar' (posiciones de `datos` que no estaban guardadas) y
+        'sin_cambios' (número de filas iguales).
+    """
+    con_huella = existentes[COLUMNA_HUELLA].notna().to_numpy()
+    guardadas = existentes[con_huella]
+    repetidas = guardadas[COLUMNA_HUELLA].duplicated().to_numpy()
+    # Filas sin huella (guardadas antes de existir) o repetidas se reemplazan
+    eliminar = existentes.loc[~con_huella, 'id'].tolist() + guardadas.loc[repetidas, 'id'].tolist()
+    guardadas = guardadas[~repetidas]
+    guardadas = guardadas.set_index(guardadas[COLUMNA_HUELLA].astype('int64').to_numpy())
+
+    presentes = pd.Index(huellas).isin(guardadas.index)
+    eliminar += guardadas.loc[~guardadas.index.isin(huellas), 'id'].tolist()
+
+    comunes = guardadas.loc[huellas[presentes]]
+    nuevas = datos['Clasificacion'].to_numpy(dtype=object)[presentes]
+    anteriores = comunes['Clasificacion'].to_numpy(dtype=object)
+    cambiaron = ~((nuevas == anteriores) | (pd.isna(nuevas) & pd.isna(anteriores)))
+    actualizar = [
+        (None if pd.isna(clase) else clase, id_fila)
+        for clase, id_fila in zip(nuevas[cambiaron], comunes['id'].to_numpy()[cambiaron])
+    ]
+
+    return {
+        'eliminar': eliminar,
+        'actualizar': actualizar,
+        'insertar': np.flatnonzero(~presentes),
+        'sin_cambios': int(presentes.sum()) - len(actualizar),
+    }
@@ -0,0 +1,107 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+import mysql.connector
+from mysql.connector import Error, pooling
+
+logger = logging.getLogger(__name__)
+
+
+class PoolConexiones:
+    """
+    Pool acotado de conexiones MySQL compartido por toda la aplicación.
+    El pool se crea en el primer uso; si el servidor no responde, no se vuelve a
+    intentar hasta que pasen `reintento_segundos`.
+    """
+    TAMANO_POR_DEFECTO = 5
+
+    def __init__(self, db_config: dict, tamano_pool: int = None, nombre_pool: str = 'gssp',
+                 espera_maxima: float = 5.0, reintento_segundos: float = 30.0):
+        """
+        Args:
+            db_config (dict): Parámetros de mysql.connector; 'pool_size' es opcional.
+            tamano_pool (int): Conexiones máximas (entre 1 y el máximo del conector).
+            nombre_pool (str): Nombre del pool en mysql.connector.
+            espera_maxima (float): Segundos a esperar por una conexión libre.
+            reintento_segundos (float): Pausa tras un fallo al crear el pool.
+        """
+        self.db_config = dict(db_config)
+        tamano = tamano_pool or self.db_config.pop('pool_size', self.TAMANO_POR_DEFECTO)
+        self.db_config.pop('pool_size', None)
+        self.tamano_pool = max(1, min(int(tamano), pooling.CNX_POOL_MAXSIZE))
+        self.nombre_pool = nombre_pool
+        self.espera_maxima = espera_maxima
+        self.reintento_segundos = reintento_segundos
+
+        self._pool = None
+        self._ultimo_fallo = None
+        self._lock = threading.Lock()
+
+    def _obtener_pool(self) -> pooling.MySQLConnectionPool:
+        with self._lock:
+            if self._pool is not None:
+                return self._pool
+
+            if (self._ultimo_fallo is not None
+                    and time.monotonic() - self._ultimo_fallo < self.reintento_segundos):
+                raise Error(msg="La base de datos no está disponible; se reintentará más tarde.")
+
+            try:
+                self._pool = pooling.MySQLConnectionPool(
+                    pool_name=self.nombre_pool,
+                    pool_size=self.tamano_pool,
+                    pool_reset_session=True,
+                    **self.db_config
+                )
+                self._ultimo_fallo = None
+                logger.info("Pool de conexiones '%s' creado con %d conexiones.",
+                            self.nombre_pool, self.tamano_pool)
+                return self._pool
+            except Error:
+                self._ultimo_fallo = time.monotonic()
+                raise
+
+    def _tomar_conexion(self, pool: pooling.MySQLConnectionPool):
+        limite = time.monotonic() + self.espera_maxima
+        while True:
+            try:
+                return pool.get_connection()
+            except pooling.PoolError:
+                if time.monotonic() >= limite:
+                    raise
+                time.sleep(0.05)
+
+    @contextmanager
+    def conexion(self):
+        """
+        Presta una conexión del pool y la devuelve al salir del bloque `with`.
+        Antes de entregarla verifica que siga viva y la reconecta si es necesario.
+        """
+        conn = self._tomar_conexion(self._obtener_pool())
+        try:
+            if not conn.is_connected():
+                conn.reconnect(attempts=2, delay=0)
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def conexion_directa(self, **opciones):
+        """
+        Abre una conexión fuera del pool con opciones adicionales
+        (por ejemplo allow_local_infile=True) y la cierra al salir.
+        """
+        with mysql.connector.connect(**self.db_config, **opciones) as conn:
+            yield conn
+
+    def verificar_salud(self) -> bool:
+        """Devuelve True si se puede obtener una conexión y el servidor responde."""
+        try:
+            with self.conexion() as conn:
+                conn.ping(reconnect=False)
+            return True
+        except Error as e:
+            logger.warning("Verificación de salud de la base de datos fallida: %s", e)
+            return False
@@ -0,0 +1,123 @@
+import logging
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from datos.AlmacenAnalisis import AlmacenAnalisis
+from negocio.CacheLRU import CacheLRU
+from negocio.MarcoAnalisis import MarcoAnalisis
+
+logger = logging.getLogger(__name__)
+
+
+class AnalisisGuardado:
+    """
+    Acceso perezoso a un análisis guardado en la base de datos (MySQL o SQLite).
+    Los agregados se calculan en el motor con GROUP BY sobre los índices
+    (lote_id, Clasificacion) y (lote_id, longitud), y los comentarios se piden por páginas con paginación
+    por llave (`id`), de modo que nunca se trae el análisis completo a la
+    memoria de cada sesión.
+    """
+    CONTENEDORES_HISTOGRAMA = 15
+
+    def __init__(self, almacen: AlmacenAnalisis, nombre: str, cache: Optional[CacheLRU] = None):
+        """
+        Args:
+            almacen (AlmacenAnalisis): Motor donde está guardado el análisis.
+            nombre (str): Nombre del análisis en el catálogo (p. ej. 'analisis_enero').
+            cache (Optional[CacheLRU]): Caché para los agregados; sus claves
+                empiezan con ('agregado', nombre).
+        """
+        self.almacen = almacen
+        self.nombre = nombre
+        self.cache = cache if cache is not None else CacheLRU(max_entradas=16)
+
+    def _agregado(self, agregado: str, calcular, vacio):
+        """Devuelve el agregado en caché o lo calcula; ante un error devuelve `vacio`."""
+        clave = ('agregado', self.nombre, agregado)
+        valor = self.cache.obtener(clave)
+        if valor is not None:
+            return valor
+        try:
+            valor = calcular()
+        except self.almacen.ERRORES as e:
+            logger.error("Error al consultar el análisis '%s': %s", self.nombre, e)
+            return vacio
+        self.cache.guardar(clave, valor)
+        return valor
+
+    def lote_id(self) -> Optional[int]:
+        """Id del lote del análisis en el catálogo, o None si no existe."""
+        return self._agregado('lote', lambda: self.almacen.lote_id(self.nombre), None)
+
+    def conteo_por_clase(self) -> pd.DataFrame:
+        """'Clasificacion' y 'cantidad', de mayor a menor."""
+        def calcular():
+            filas = self.almacen.conteo_por_clase(self.lote_id())
+            return pd.DataFrame(filas, columns=['Clasificacion', 'cantidad'])
+        return self._agregado('conteo', calcular, pd.DataFrame(columns=['Clasificacion', 'cantidad']))
+
+    def total(self) -> int:
+        return int(self.conteo_por_clase()['cantidad'].sum())
+
+    def resumen_por_clase(self) -> pd.DataFrame:
+        """'Clasificacion', 'NumComentarios', 'LongitudPromedio' y 'Porcentaje'."""
+        columnas = ['Clasificacion', 'NumComentarios', 'LongitudPromedio', 'Porcentaje']
+
+        def calcular():
+            filas = self.almacen.resumen_por_clase(self.lote_id())
+            resumen = pd.DataFrame(filas, columns=columnas[:3])
+            resumen['LongitudPromedio'] = resumen['LongitudPromedio'].astype(float)
+            resumen['Porcentaje'] = resumen['NumComentarios'] / resumen['NumComentarios'].sum() * 100
+            return resumen
+        return self._agregado('resumen', calcular, pd.DataFrame(columns=columnas))
+
+    def histograma_longitud(self) -> pd.DataFrame:
+        """
+        'Clasificacion', 'inicio', 'fin' y 'conteo' en `CONTENEDORES_HISTOGRAMA`
+        contenedores de igual ancho entre la longitud mínima y la máxima.
+        """
+        columnas = ['Clasificacion', 'inicio', 'fin', 'conteo']
+        n = self.CONTENEDORES_HISTOGRAMA
+
+        def calcular():
+            filas = self.almacen.histograma_longitud(self.lote_id(), n)
+            if not filas:
+                return pd.DataFrame(columns=columnas)
+            minimo, maximo = float(filas[0][3]), float(filas[0][4])
+            bordes = np.linspace(minimo, max(maximo, minimo + 1), n + 1)
+            clases = sorted({f[0] for f in filas})
+            conteos = pd.DataFrame(0, index=clases, columns=range(n))
+            for clase, contenedor, conteo, _, _ in filas:
+                conteos.loc[clase, int(contenedor)] = int(conteo)
+            return pd.concat([
+                pd.DataFrame({'Clasificacion': clase, 'inicio': bordes[:-1], 'fin': bordes[1:],
+                              'conteo': conteos.loc[clase].to_numpy()})
+                for clase in clases
+            ], ignore_index=True)
+        return self._agregado('histograma', calcular, pd.DataFrame(columns=columnas))
+
+    def pagina(self, tamano: int = 10, despues_de: Optional[int] = None,
+               clase: Optional[str] = None) -> pd.DataFrame:
+        """
+        Devuelve hasta `tamano` comentarios con `id` mayor que `despues_de`, en
+        orden de `id`. El `id` de la última fila sirve como `despues_de` de la
+        página siguiente.
+        """
+        columnas = ['id', 'comentarios', 'calificacion', 'Clasificacion', 'longitud']
+        try:
+            filas = self.almacen.pagina(self.lote_id(), tamano, despues_de, clase)
+        except self.almacen.ERRORES as e:
+            logger.error("Error al cargar la página del análisis '%s': %s", self.nombre, e)
+            return pd.DataFrame(columns=columnas)
+        return pd.DataFrame(filas, columns=columnas)
+
+    def cargar_todo(self) -> pd.DataFrame:
+        """Trae todas las filas como marco compacto (solo para exportaciones completas)."""
+        try:
+            datos = self.almacen.cargar_lote(self.lote_id())
+        except self.almacen.ERRORES as e:
+            logger.error("Error al cargar los datos del análisis '%s': %s", self.nombre, e)
+            return pd.DataFrame()
+        return MarcoAnalisis.construir(datos) if not datos.empty else datos
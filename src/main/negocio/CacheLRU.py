@@ -0,0 +1,121 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class CacheLRU:
+    """
+    Caché en memoria segura entre hilos, con expiración por tiempo (TTL) y
+    desalojo LRU acotado por número de entradas y por memoria aproximada.
+    """
+
+    def __init__(self, max_entradas: int = 128, max_bytes: int = 256 * 1024 * 1024,
+                 ttl_segundos: Optional[float] = None):
+        """
+        Args:
+            max_entradas (int): Número máximo de entradas.
+            max_bytes (int): Memoria máxima aproximada de los valores guardados.
+            ttl_segundos (Optional[float]): Vida de cada entrada; None = sin expiración.
+        """
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.ttl_segundos = ttl_segundos
+
+        self._entradas = OrderedDict()  # clave -> (valor, tamaño, instante de guardado)
+        self._bytes = 0
+        self._aciertos = 0
+        self._fallos = 0
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def estimar_tamano(valor: Any) -> int:
+        """Estima la memoria ocupada por un valor en bytes."""
+        if isinstance(valor, pd.DataFrame):
+            return int(valor.memory_usage(index=True, deep=True).sum())
+        if isinstance(valor, pd.Series):
+            return int(valor.memory_usage(index=True, deep=True))
+        if isinstance(valor, np.ndarray):
+            return int(valor.nbytes)
+        if isinstance(valor, (bytes, bytearray)):
+            return len(valor)
+        if isinstance(valor, dict):
+            return sys.getsizeof(valor) + sum(CacheLRU.estimar_tamano(v) for v in valor.values())
+        if isinstance(valor, (list, tuple)):
+            return sys.getsizeof(valor) + sum(sys.getsizeof(v) for v in valor)
+        return sys.getsizeof(valor)
+
+    def _expirada(self, instante: float) -> bool:
+        return self.ttl_segundos is not None and time.monotonic() - instante > self.ttl_segundos
+
+    def _eliminar(self, clave: Hashable) -> None:
+        _, tamano, _ = self._entradas.pop(clave)
+        self._bytes -= tamano
+
+    def obtener(self, clave: Hashable, por_defecto: Any = None) -> Any:
+        """Devuelve el valor guardado o `por_defecto` si no existe o expiró."""
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None or self._expirada(entrada[2]):
+                if entrada is not None:
+                    self._eliminar(clave)
+                self._fallos += 1
+                return por_defecto
+
+            self._entradas.move_to_end(clave)
+            self._aciertos += 1
+            return entrada[0]
+
+    def guardar(self, clave: Hashable, valor: Any, tamano: Optional[int] = None) -> None:
+        """Guarda un valor y desaloja las entradas menos usadas si hace falta."""
+        tamano = self.estimar_tamano(valor) if tamano is None else tamano
+        with self._lock:
+            if clave in self._entradas:
+                self._eliminar(clave)
+            if tamano > self.max_bytes:
+                return
+
+            self._entradas[clave] = (valor, tamano, time.monotonic())
+            self._bytes += tamano
+            while len(self._entradas) > self.max_entradas or self._bytes > self.max_bytes:
+                self._eliminar(next(iter(self._entradas)))
+
+    def obtener_o_calcular(self, clave: Hashable, funcion: Callable[[], Any]) -> Any:
+        """Devuelve el valor guardado o lo calcula con `funcion` y lo guarda."""
+        centinela = object()
+        valor = self.obtener(clave, centinela)
+        if valor is centinela:
+            valor = funcion()
+            self.guardar(clave, valor)
+        return valor
+
+    def invalidar(self, clave: Hashable) -> None:
+        with self._lock:
+            if clave in self._entradas:
+                self._eliminar(clave)
+
+    def invalidar_donde(self, condicion: Callable[[Hashable], bool]) -> None:
+        """Descarta todas las entradas cuya clave cumple `condicion`."""
+        with self._lock:
+            for clave in [c for c in self._entradas if condicion(c)]:
+                self._eliminar(clave)
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            consultas = self._aciertos + self._fallos
+            return {
+                'entradas': len(self._entradas),
+                'bytes': self._bytes,
+                'aciertos': self._aciertos,
+                'fallos': self._fallos,
+                'tasa_aciertos': self._aciertos / consultas if consultas else 0.0,
+            }
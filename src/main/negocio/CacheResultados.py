@@ -0,0 +1,78 @@
+import logging
+import os
+import pickle
+from typing import Any, Optional
+
+from negocio.CacheLRU import CacheLRU
+
+logger = logging.getLogger(__name__)
+
+
+class CacheResultados:
+    """
+    Caché de resultados de procesamiento en dos niveles: memoria (CacheLRU) y,
+    opcionalmente, disco (un archivo pickle por clave). Lo que se encuentra en
+    disco se promueve a memoria.
+    """
+
+    def __init__(self, max_entradas: int = 16, max_bytes: int = 512 * 1024 * 1024,
+                 directorio: Optional[str] = None, max_archivos: int = 64):
+        """
+        Args:
+            max_entradas (int): Entradas máximas en memoria.
+            max_bytes (int): Memoria máxima aproximada.
+            directorio (Optional[str]): Carpeta del nivel en disco; None lo desactiva.
+            max_archivos (int): Archivos máximos en disco (se eliminan los más antiguos).
+        """
+        self.memoria = CacheLRU(max_entradas=max_entradas, max_bytes=max_bytes)
+        self.directorio = directorio
+        self.max_archivos = max_archivos
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+    def _ruta(self, clave: str) -> str:
+        return os.path.join(self.directorio, f"{clave}.pkl")
+
+    def obtener(self, clave: str) -> Any:
+        """Devuelve el valor guardado con `clave` o None."""
+        valor = self.memoria.obtener(clave)
+        if valor is not None or not self.directorio:
+            return valor
+
+        try:
+            with open(self._ruta(clave), 'rb') as archivo:
+                valor = pickle.load(archivo)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+        os.utime(self._ruta(clave))
+        self.memoria.guardar(clave, valor)
+        return valor
+
+    def guardar(self, clave: str, valor: Any) -> None:
+        self.memoria.guardar(clave, valor)
+        if not self.directorio:
+            return
+
+        try:
+            ruta_temporal = f"{self._ruta(clave)}.tmp"
+            with open(ruta_temporal, 'wb') as archivo:
+                pickle.dump(valor, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(ruta_temporal, self._ruta(clave))
+            self._desalojar_disco()
+        except OSError as e:
+            logger.warning("No se pudo guardar el resultado en caché de disco: %s", e)
+
+    def _desalojar_disco(self) -> None:
+        archivos = [
+            os.path.join(self.directorio, nombre)
+            for nombre in os.listdir(self.directorio) if nombre.endswith('.pkl')
+        ]
+        if len(archivos) <= self.max_archivos:
+            return
+        archivos.sort(key=os.path.getmtime)
+        for ruta in archivos[:len(archivos) - self.max_archivos]:
+            os.remove(ruta)
+
+    def estadisticas(self) -> dict:
+        return self.memoria.estadisticas()
@@ -0,0 +1,65 @@
+from typing import Callable, Hashable, Iterable
+
+import numpy as np
+import pandas as pd
+
+from negocio.CacheLRU import CacheLRU
+from negocio.MarcoAnalisis import MarcoAnalisis
+
+
+class DatasetsCompartidos:
+    """
+    Conjuntos de datos compartidos por todas las sesiones. Cada análisis se
+    guarda una sola vez como marco compacto de solo lectura (ver
+    MarcoAnalisis) y cada sesión recibe una vista que no copia sus datos, así
+    que varias sesiones que ven el mismo análisis ocupan la memoria de uno.
+    """
+
+    def __init__(self, max_entradas: int = 16, max_bytes: int = 1024 * 1024 * 1024):
+        """
+        Args:
+            max_entradas (int): Conjuntos de datos máximos en memoria.
+            max_bytes (int): Memoria máxima aproximada. Un conjunto desalojado
+                sigue vivo mientras alguna sesión conserve una vista.
+        """
+        self._marcos = CacheLRU(max_entradas=max_entradas, max_bytes=max_bytes)
+
+    def vista(self, clave: Hashable, cargar: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """
+        Devuelve una vista del conjunto `clave`, llamando a `cargar` solo si no
+        está en memoria. La vista lleva la clave en `attrs['clave_dataset']`.
+        """
+        marco = self._marcos.obtener_o_calcular(clave, lambda: MarcoAnalisis.asegurar(cargar()))
+        vista = MarcoAnalisis.vista(marco)
+        vista.attrs['clave_dataset'] = clave
+        return vista
+
+    def compartido(self, df: pd.DataFrame):
+        """El marco compartido cuyos datos usa `df`, o None si `df` es propio."""
+        marco = self._marcos.obtener(df.attrs.get('clave_dataset'))
+        if marco is None or len(marco) != len(df) or 'longitud' not in df.columns:
+            return None
+        mismos = np.shares_memory(df['longitud'].to_numpy(), marco['longitud'].to_numpy())
+        return marco if mismos else None
+
+    def memoria_sesion(self, objetos: Iterable) -> dict:
+        """
+        Memoria aproximada de lo que usa una sesión (p. ej. los valores de
+        `st.session_state` y los DataFrames que muestra).
+
+        Returns:
+            dict: 'propia' (bytes solo de la sesión) y 'compartida' (bytes de los
+            conjuntos de datos compartidos que usa, contados una vez).
+        """
+        propia = 0
+        compartidos = {}
+        for objeto in objetos:
+            marco = self.compartido(objeto) if isinstance(objeto, pd.DataFrame) else None
+            if marco is None:
+                propia += CacheLRU.estimar_tamano(objeto)
+            else:
+                compartidos[id(marco)] = CacheLRU.estimar_tamano(marco)
+        return {'propia': propia, 'compartida': sum(compartidos.values())}
+
+    def estadisticas(self) -> dict:
+        return self._marcos.estadisticas()
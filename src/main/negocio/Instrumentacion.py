@@ -0,0 +1,273 @@
+import cProfile
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator, Optional
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+
+class Etapa:
+    """
+    Medición de una etapa en curso. Quien mide fija `filas_salida` (y, si no
+    las conocía al empezar, `filas_entrada`) dentro del bloque `with`.
+    """
+
+    def __init__(self, nombre: str, filas_entrada: Optional[int], nivel: int):
+        self.nombre = nombre
+        self.filas_entrada = filas_entrada
+        self.filas_salida = None
+        self.nivel = nivel
+        self._memoria_base = 0
+        self._memoria_pico = 0
+
+
+class Instrumentacion:
+    """
+    Mide las etapas del procesamiento (validar, limpiar, clasificar, guardar,
+    exportar...): tiempo de reloj, filas de entrada y de salida y memoria pico.
+    Las mediciones recientes se conservan en memoria para el panel de
+    diagnóstico y, opcionalmente, se agregan a un archivo JSON Lines.
+
+    Variables de entorno (ver `compartida`):
+        GSSP_METRICAS: archivo donde se agrega una línea JSON por etapa.
+        GSSP_MEMORIA: '1' para medir con tracemalloc la memoria pico de cada
+            etapa (hace más lento el procesamiento). Sin ella solo se registra
+            el máximo de memoria residente del proceso.
+        GSSP_PERFIL: 'cprofile' o 'pyinstrument' para perfilar cada etapa de
+            primer nivel; los perfiles se guardan en GSSP_PERFILES (por defecto
+            'cache/perfiles').
+
+    Las etapas pueden anidarse; la memoria pico de una etapa incluye la de sus
+    etapas internas. tracemalloc es global al proceso, así que con varias
+    sesiones procesando a la vez la memoria pico es aproximada.
+    """
+    PERFILADORES = ('cprofile', 'pyinstrument')
+    MAX_REGISTROS = 500
+
+    _compartida = None
+    _lock_compartida = threading.Lock()
+
+    def __init__(self, ruta_metricas: Optional[str] = None, medir_memoria: bool = False,
+                 perfilador: Optional[str] = None, directorio_perfiles: Optional[str] = None,
+                 max_registros: Optional[int] = None):
+        """
+        Args:
+            ruta_metricas (Optional[str]): Archivo JSON Lines de métricas.
+            medir_memoria (bool): Medir la memoria pico con tracemalloc.
+            perfilador (Optional[str]): 'cprofile', 'pyinstrument' o None.
+            directorio_perfiles (Optional[str]): Carpeta de los perfiles.
+            max_registros (Optional[int]): Mediciones conservadas en memoria.
+        """
+        perfilador = (perfilador or '').lower() or None
+        if perfilador is not None and perfilador not in self.PERFILADORES:
+            raise ValueError(f"Perfilador no soportado: '{perfilador}'. "
+                             f"Opciones: {', '.join(self.PERFILADORES)}")
+        self.ruta_metricas = ruta_metricas
+        self.medir_memoria = medir_memoria
+        self.perfilador = perfilador
+        self.directorio_perfiles = directorio_perfiles or os.path.join('cache', 'perfiles')
+        self._registros = deque(maxlen=max_registros or self.MAX_REGISTROS)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if medir_memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @classmethod
+    def desde_entorno(cls) -> 'Instrumentacion':
+        """Crea una instrumentación configurada con las variables GSSP_*."""
+        return cls(
+            ruta_metricas=os.environ.get('GSSP_METRICAS') or None,
+            medir_memoria=os.environ.get('GSSP_MEMORIA', '') not in ('', '0'),
+            perfilador=os.environ.get('GSSP_PERFIL') or None,
+            directorio_perfiles=os.environ.get('GSSP_PERFILES') or None
+        )
+
+    @classmethod
+    def compartida(cls) -> 'Instrumentacion':
+        """La instrumentación del proceso, que usan todos los servicios."""
+        with cls._lock_compartida:
+            if cls._compartida is None:
+                cls._compartida = cls.desde_entorno()
+            return cls._compartida
+
+    @staticmethod
+    def configurar_registro(nivel: Optional[str] = None) -> None:
+        """
+        Configura el registro (logging) de la aplicación con `nivel` o el de la
+        variable GSSP_LOG ('DEBUG', 'INFO', 'WARNING'...; por defecto INFO). No
+        hace nada si el registro ya estaba configurado.
+        """
+        nivel = (nivel or os.environ.get('GSSP_LOG') or 'INFO').upper()
+        logging.basicConfig(level=nivel, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    def _pila(self) -> list:
+        if not hasattr(self._local, 'pila'):
+            self._local.pila = []
+        return self._local.pila
+
+    @contextmanager
+    def etapa(self, nombre: str, filas_entrada: Optional[int] = None) -> Iterator[Etapa]:
+        """
+        Mide el bloque `with` como la etapa `nombre`.
+
+        Ejemplo:
+            with instrumentacion.etapa('limpieza', filas_entrada=len(df)) as etapa:
+                df_limpio = limpiar(df)
+                etapa.filas_salida = len(df_limpio)
+        """
+        pila = self._pila()
+        etapa = Etapa(nombre, filas_entrada, nivel=len(pila))
+        medir_memoria = self.medir_memoria and tracemalloc.is_tracing()
+        if medir_memoria:
+            actual, pico = tracemalloc.get_traced_memory()
+            if pila:
+                pila[-1]._memoria_pico = max(pila[-1]._memoria_pico, pico)
+            tracemalloc.reset_peak()
+            etapa._memoria_base = etapa._memoria_pico = actual
+        perfil = self._iniciar_perfil() if not pila else None
+
+        pila.append(etapa)
+        inicio = datetime.now()
+        reloj = time.perf_counter()
+        error = None
+        try:
+            yield etapa
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            segundos = time.perf_counter() - reloj
+            pila.pop()
+            memoria_pico = None
+            if medir_memoria:
+                etapa._memoria_pico = max(etapa._memoria_pico, tracemalloc.get_traced_memory()[1])
+                memoria_pico = etapa._memoria_pico - etapa._memoria_base
+                if pila:
+                    pila[-1]._memoria_pico = max(pila[-1]._memoria_pico, etapa._memoria_pico)
+                tracemalloc.reset_peak()
+            ruta_perfil = self._guardar_perfil(perfil, nombre, inicio) if perfil is not None else None
+
+            self._registrar({
+                'etapa': nombre,
+                'inicio': inicio.isoformat(timespec='milliseconds'),
+                'segundos': round(segundos, 6),
+                'filas_entrada': etapa.filas_entrada,
+                'filas_salida': etapa.filas_salida,
+                'memoria_pico_mb': None if memoria_pico is None else round(memoria_pico / 1024 ** 2, 3),
+                'rss_max_mb': self._rss_max_mb(),
+                'nivel': etapa.nivel,
+                'error': error,
+                'perfil': ruta_perfil,
+            })
+
+    @staticmethod
+    def _rss_max_mb() -> Optional[float]:
+        """Máximo de memoria residente del proceso desde que empezó, en MB."""
+        if resource is None:
+            return None
+        maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux lo reporta en KB y macOS en bytes
+        return round(maximo / (1024 ** 2 if sys.platform == 'darwin' else 1024), 1)
+
+    def _iniciar_perfil(self):
+        if self.perfilador == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                logger.warning("pyinstrument no está instalado (pip install .[perfil]); se usa cProfile.")
+                self.perfilador = 'cprofile'
+            else:
+                perfil = Profiler()
+                perfil.start()
+                return perfil
+        if self.perfilador == 'cprofile':
+            perfil = cProfile.Profile()
+            try:
+                perfil.enable()
+            except ValueError as e:
+                # Otro perfilador ya está activo en este hilo
+                logger.warning("No se pudo iniciar cProfile: %s", e)
+                return None
+            return perfil
+        return None
+
+    def _guardar_perfil(self, perfil, nombre: str, inicio: datetime) -> Optional[str]:
+        base = os.path.join(self.directorio_perfiles, f"{nombre}_{inicio:%Y%m%d_%H%M%S_%f}")
+        try:
+            os.makedirs(self.directorio_perfiles, exist_ok=True)
+            if isinstance(perfil, cProfile.Profile):
+                perfil.disable()
+                ruta = base + '.prof'
+                perfil.dump_stats(ruta)
+            else:
+                perfil.stop()
+                ruta = base + '.html'
+                with open(ruta, 'w', encoding='utf-8') as archivo:
+                    archivo.write(perfil.output_html())
+        except OSError as e:
+            logger.warning("No se pudo guardar el perfil de '%s': %s", nombre, e)
+            return None
+        logger.info("Perfil de '%s' guardado en '%s'.", nombre, ruta)
+        return ruta
+
+    def _registrar(self, registro: dict) -> None:
+        with self._lock:
+            self._registros.append(registro)
+            if self.ruta_metricas:
+                try:
+                    directorio = os.path.dirname(self.ruta_metricas)
+                    if directorio:
+                        os.makedirs(directorio, exist_ok=True)
+                    with open(self.ruta_metricas, 'a', encoding='utf-8') as archivo:
+                        archivo.write(json.dumps(registro, ensure_ascii=False) + '\n')
+                except OSError as e:
+                    logger.warning("No se pudieron escribir las métricas en '%s': %s", self.ruta_metricas, e)
+        logger.debug("Etapa '%s': %.3f s, filas %s -> %s.", registro['etapa'], registro['segundos'],
+                     registro['filas_entrada'], registro['filas_salida'])
+
+    def registros(self) -> list[dict]:
+        """Mediciones recientes, de la más antigua a la más reciente."""
+        with self._lock:
+            return list(self._registros)
+
+    def resumen(self) -> pd.DataFrame:
+        """
+        Mediciones recientes agregadas por etapa: 'veces', 'segundos_total',
+        'segundos_promedio', 'segundos_max', 'filas_entrada', 'filas_salida'
+        (sumas) y 'memoria_pico_mb' (máximo).
+        """
+        columnas = ['etapa', 'veces', 'segundos_total', 'segundos_promedio', 'segundos_max',
+                    'filas_entrada', 'filas_salida', 'memoria_pico_mb']
+        registros = pd.DataFrame(self.registros())
+        if registros.empty:
+            return pd.DataFrame(columns=columnas)
+        resumen = registros.groupby('etapa', sort=False).agg(
+            veces=('segundos', 'size'),
+            segundos_total=('segundos', 'sum'),
+            segundos_promedio=('segundos', 'mean'),
+            segundos_max=('segundos', 'max'),
+            filas_entrada=('filas_entrada', lambda s: s.sum(min_count=1)),
+            filas_salida=('filas_salida', lambda s: s.sum(min_count=1)),
+            memoria_pico_mb=('memoria_pico_mb', 'max'),
+        ).reset_index()
+        return resumen.sort_values('segundos_total', ascending=False, ignore_index=True)[columnas]
+
+    def limpiar(self) -> None:
+        """Descarta las mediciones en memoria (el archivo de métricas no cambia)."""
+        with self._lock:
+            self._registros.clear()
@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+
+
+class MarcoAnalisis:
+    """
+    Modelo de datos de un análisis clasificado. Se construye una sola vez al
+    cargar el archivo y la capa de presentación solo recibe vistas de solo
+    lectura: las columnas derivadas ya vienen calculadas y nadie las recalcula
+    ni modifica los datos compartidos en cada recarga de la página.
+
+    Columnas (además de las que ya tuvieran los datos):
+        comentarios (string[pyarrow]): texto en un arreglo de Arrow si pyarrow
+            está instalado (la dependencia opcional [parquet]); si no, object.
+        calificacion (Int8): cuando todos sus valores son enteros de -128 a 127.
+        Clasificacion (category): `CLASES` y, al final, cualquier otra presente.
+        longitud (int32): número de caracteres del comentario.
+        palabras (int32): número de palabras del comentario.
+
+    Los arreglos de las columnas numéricas y categóricas no se pueden escribir:
+    `marco.loc[...] = ...` sobre ellas lanza ValueError. En una vista
+    (`vista(marco)`) se pueden agregar columnas y escribir en las de texto sin
+    afectar al marco original.
+    """
+    CLASES = ['Detractor', 'Neutro', 'Promotor']
+    COLUMNAS_DERIVADAS = ['longitud', 'palabras']
+
+    @staticmethod
+    def _tipo_texto():
+        """Tipo de las columnas de texto: Arrow si pyarrow está instalado, o None."""
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return None
+        return pd.StringDtype('pyarrow')
+
+    @staticmethod
+    def _solo_lectura(serie: pd.Series):
+        """Copia de la columna cuyos datos no se pueden modificar."""
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            codigos = serie.cat.codes.to_numpy(copy=True)
+            codigos.flags.writeable = False
+            return pd.Categorical.from_codes(codigos, dtype=serie.dtype)
+        if isinstance(serie.array, pd.arrays.IntegerArray):
+            valores = serie.to_numpy(dtype=serie.dtype.numpy_dtype, na_value=0)
+            nulos = serie.isna().to_numpy()
+            valores.flags.writeable = False
+            nulos.flags.writeable = False
+            return pd.arrays.IntegerArray(valores, nulos)
+        if isinstance(serie.dtype, np.dtype) and serie.dtype != object:
+            arreglo = serie.to_numpy(copy=True)
+            arreglo.flags.writeable = False
+            return arreglo
+        # Texto y demás tipos se conservan tal cual: pandas no admite arreglos
+        # de objetos de solo lectura (p. ej. en memory_usage)
+        return serie.array.copy()
+
+    @classmethod
+    def _armar(cls, columnas: dict, datos: pd.DataFrame) -> pd.DataFrame:
+        marco = pd.DataFrame(
+            {nombre: cls._solo_lectura(serie) for nombre, serie in columnas.items()},
+            index=datos.index, copy=False
+        )
+        marco.attrs.update(datos.attrs)
+        return marco
+
+    @classmethod
+    def _tipos_compactos(cls, datos: pd.DataFrame) -> dict:
+        columnas = {nombre: datos[nombre] for nombre in datos.columns}
+        if 'Clasificacion' in columnas:
+            # Clases fuera de CLASES (p. ej. de otro modelo) se conservan al final
+            clasificacion = datos['Clasificacion']
+            otras = sorted(set(clasificacion.dropna().unique()) - set(cls.CLASES))
+            columnas['Clasificacion'] = clasificacion.astype(pd.CategoricalDtype(cls.CLASES + otras))
+        if 'calificacion' in columnas:
+            original = datos['calificacion']
+            calificacion = pd.to_numeric(original, errors='coerce')
+            validas = calificacion.dropna()
+            if (len(validas) == original.notna().sum() and validas.between(-128, 127).all()
+                    and (validas % 1 == 0).all()):
+                columnas['calificacion'] = calificacion.astype('Int8')
+        tipo_texto = cls._tipo_texto()
+        if 'comentarios' in columnas and tipo_texto is not None:
+            comentarios = datos['comentarios']
+            columnas['comentarios'] = comentarios.where(comentarios.notna(), None).astype(tipo_texto)
+        return columnas
+
+    @classmethod
+    def compactar(cls, datos: pd.DataFrame) -> pd.DataFrame:
+        """
+        Devuelve `datos` con los tipos compactos del marco en las columnas que
+        tenga, sin agregar las columnas derivadas (p. ej. para lecturas
+        parciales de un análisis guardado).
+        """
+        return cls._armar(cls._tipos_compactos(datos), datos)
+
+    @classmethod
+    def construir(cls, datos: pd.DataFrame) -> pd.DataFrame:
+        """
+        Devuelve el marco de `datos` (con 'comentarios' y 'Clasificacion'), con
+        el mismo índice y `attrs`.
+        """
+        if 'Clasificacion' not in datos.columns:
+            raise KeyError("El marco de análisis requiere la columna 'Clasificacion'.")
+        if 'comentarios' in datos.columns:
+            texto = datos['comentarios'].astype(object).where(datos['comentarios'].notna(), None)
+        else:
+            texto = pd.Series(None, index=datos.index, dtype=object)
+        texto = texto.str
+
+        columnas = cls._tipos_compactos(datos)
+        columnas['longitud'] = texto.len().fillna(0).astype('int32')
+        columnas['palabras'] = texto.count(r'\S+').fillna(0).astype('int32')
+        return cls._armar(columnas, datos)
+
+    @classmethod
+    def es_marco(cls, df: pd.DataFrame) -> bool:
+        """True si `df` ya tiene las columnas y tipos del marco."""
+        return (
+            set(cls.COLUMNAS_DERIVADAS).issubset(df.columns)
+            and 'Clasificacion' in df.columns
+            and isinstance(df['Clasificacion'].dtype, pd.CategoricalDtype)
+        )
+
+    @classmethod
+    def asegurar(cls, df: pd.DataFrame) -> pd.DataFrame:
+        """Devuelve `df` si ya es un marco o, si no, lo construye (sin modificar `df`)."""
+        return df if cls.es_marco(df) else cls.construir(df)
+
+    @staticmethod
+    def _escribible(arreglo) -> bool:
+        """True si escribir en `arreglo` (p. ej. con `.loc`) lo modifica en su lugar."""
+        if isinstance(arreglo, pd.Categorical):
+            return arreglo.codes.flags.writeable
+        if isinstance(arreglo, pd.arrays.IntegerArray):
+            return arreglo._data.flags.writeable
+        if isinstance(arreglo, np.ndarray):
+            return arreglo.flags.writeable
+        return True
+
+    @classmethod
+    def vista(cls, marco: pd.DataFrame) -> pd.DataFrame:
+        """
+        Vista de solo lectura del marco: comparte sus datos sin copiarlos, pero
+        las columnas que se le agreguen no aparecen en el original.
+
+        Las columnas que sí se pueden escribir tienen en la vista su propio
+        arreglo, así que escribir en ellas no cambia el marco compartido: el
+        texto en Arrow se reenvuelve sin copiar (sus búferes son inmutables) y
+        las columnas de objetos copian solo las referencias, no los textos.
+        """
+        vista = marco.copy(deep=False)
+        for nombre in marco.columns:
+            arreglo = marco[nombre].array
+            if isinstance(arreglo, pd.arrays.NumpyExtensionArray):
+                arreglo = arreglo.to_numpy()
+            if cls._escribible(arreglo):
+                vista[nombre] = arreglo.copy()
+        return vista
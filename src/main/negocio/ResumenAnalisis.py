@@ -0,0 +1,147 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from negocio.CacheLRU import CacheLRU
+
+
+class ResumenAnalisis:
+    """
+    Agregados de un análisis clasificado, calculados una sola vez por conjunto de
+    datos y compartidos por las tablas, los gráficos y la exportación a Excel.
+
+    Atributos:
+        total (int): Número de comentarios con clasificación.
+        clases (list[str]): Clases presentes, en orden alfabético.
+        conteo (pd.DataFrame): 'Clasificacion' y 'cantidad', de mayor a menor.
+        por_clase (pd.DataFrame): 'Clasificacion', 'NumComentarios',
+            'LongitudPromedio' y 'Porcentaje'.
+        distribucion (pd.DataFrame): 'Clasificacion', 'conteo', 'min' y 'max' por
+            rango de longitud de `ANCHO_RANGO` caracteres.
+        histograma (pd.DataFrame): 'Clasificacion', 'inicio', 'fin' y 'conteo' en
+            `CONTENEDORES_HISTOGRAMA` contenedores de igual ancho.
+        indices_ordenados (dict): {clase o 'Todas': posiciones (para `df.iloc`)
+            de sus comentarios, del más largo al más corto}. Obtener los N más
+            largos de una clase es un simple corte del arreglo.
+    """
+    COLUMNAS_REQUERIDAS = {'Clasificacion', 'comentarios', 'calificacion', 'longitud'}
+    ANCHO_RANGO = 50
+    CONTENEDORES_HISTOGRAMA = 15
+    TODAS = 'Todas'
+
+    # Compartida entre sesiones; cada entrada ocupa del orden de 16 bytes por fila
+    _cache = CacheLRU(max_entradas=32, max_bytes=256 * 1024 * 1024)
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Args:
+            df (pd.DataFrame): Debe incluir las columnas 'Clasificacion' y 'longitud'.
+        """
+        clasificacion = df['Clasificacion']
+        longitud = pd.to_numeric(df['longitud'], errors='coerce')
+        validos = clasificacion.notna().to_numpy()
+        posiciones = np.flatnonzero(validos)
+        clasificacion = pd.Series(clasificacion.to_numpy()[validos], index=posiciones)
+        longitud = pd.Series(longitud.to_numpy(dtype=float, na_value=np.nan)[validos], index=posiciones)
+
+        self.total = int(validos.sum())
+        self.clases = sorted(clasificacion.unique().tolist())
+
+        self.conteo = clasificacion.value_counts().rename_axis('Clasificacion').reset_index(name='cantidad')
+
+        agrupado = longitud.groupby(clasificacion)
+        self.por_clase = pd.DataFrame({
+            'Clasificacion': self.clases,
+            'NumComentarios': agrupado.size().reindex(self.clases).to_numpy(),
+            'LongitudPromedio': agrupado.mean().reindex(self.clases).to_numpy(),
+        })
+        self.por_clase['Porcentaje'] = (
+            self.por_clase['NumComentarios'] / self.por_clase['NumComentarios'].sum()
+        ) * 100
+
+        self.distribucion = self._calcular_distribucion(clasificacion, longitud)
+        self.histograma = self._calcular_histograma(clasificacion, longitud)
+
+        self.indices_ordenados = self._ordenar_por_longitud(clasificacion, longitud)
+
+    def _ordenar_por_longitud(self, clasificacion: pd.Series, longitud: pd.Series) -> dict:
+        """Posiciones de cada clase ordenadas por longitud descendente (nulos al final)."""
+        # Orden estable: a igual longitud se conserva el orden original
+        orden = np.argsort(-longitud.to_numpy(), kind='stable')
+        posiciones = longitud.index.to_numpy()[orden]
+        clases_ordenadas = clasificacion.to_numpy()[orden]
+        indices = {self.TODAS: posiciones}
+        for clase in self.clases:
+            indices[clase] = posiciones[clases_ordenadas == clase]
+        return indices
+
+    def _calcular_distribucion(self, clasificacion: pd.Series, longitud: pd.Series) -> pd.DataFrame:
+        """Conteo por clase en rangos [min, max) de `ANCHO_RANGO` caracteres."""
+        con_longitud = longitud.notna()
+        rangos = (longitud[con_longitud] // self.ANCHO_RANGO).astype(int)
+        n_rangos = int(rangos.max()) + 1 if len(rangos) else 0
+        tabla = (
+            pd.crosstab(clasificacion[con_longitud], rangos)
+            .reindex(index=self.clases, columns=range(n_rangos), fill_value=0)
+        )
+        distribucion = tabla.stack().reset_index()
+        distribucion.columns = ['Clasificacion', 'rango', 'conteo']
+        distribucion['min'] = (distribucion['rango'] * self.ANCHO_RANGO).astype(float)
+        distribucion['max'] = distribucion['min'] + self.ANCHO_RANGO
+        return distribucion.drop(columns='rango')
+
+    def _calcular_histograma(self, clasificacion: pd.Series, longitud: pd.Series) -> pd.DataFrame:
+        """Histograma de longitudes por clase con bordes comunes a todas las clases."""
+        con_longitud = longitud.notna()
+        valores = longitud[con_longitud].to_numpy(dtype=float)
+        if not len(valores):
+            return pd.DataFrame(columns=['Clasificacion', 'inicio', 'fin', 'conteo'])
+        bordes = np.histogram_bin_edges(valores, bins=self.CONTENEDORES_HISTOGRAMA)
+        clases_validas = clasificacion[con_longitud].to_numpy()
+        filas = []
+        for clase in self.clases:
+            conteos, _ = np.histogram(valores[clases_validas == clase], bins=bordes)
+            filas.append(pd.DataFrame({
+                'Clasificacion': clase,
+                'inicio': bordes[:-1],
+                'fin': bordes[1:],
+                'conteo': conteos,
+            }))
+        return pd.concat(filas, ignore_index=True)
+
+    @staticmethod
+    def _huella(objeto) -> str:
+        """Hash de `objeto` (índice o DataFrame) que depende del orden de sus filas."""
+        if isinstance(objeto, pd.RangeIndex):
+            return f"{objeto.start}:{objeto.stop}:{objeto.step}"
+        valores = pd.util.hash_pandas_object(objeto, index=True).to_numpy()
+        return hashlib.sha256(valores.tobytes()).hexdigest()[:16]
+
+    @classmethod
+    def clave_dataset(cls, df: pd.DataFrame) -> str:
+        """
+        Identificador del conjunto de datos: `df.attrs['clave_dataset']` más una
+        huella del índice o, si no existe la clave, un hash de las columnas que
+        usan los agregados.
+        """
+        clave = df.attrs.get('clave_dataset')
+        if clave:
+            # Los subconjuntos filtrados heredan `attrs`: el índice los distingue
+            return f"{clave}:{len(df)}:{cls._huella(df.index)}"
+        columnas = [c for c in ['Clasificacion', 'longitud', 'calificacion', 'comentarios'] if c in df.columns]
+        return f"{len(df)}:{cls._huella(df[columnas])}"
+
+    def tamano_bytes(self) -> int:
+        """Memoria aproximada del resumen, incluidos los arreglos de posiciones."""
+        return CacheLRU.estimar_tamano(vars(self))
+
+    @classmethod
+    def obtener(cls, df: pd.DataFrame) -> 'ResumenAnalisis':
+        """Devuelve el resumen de `df`, calculándolo solo la primera vez."""
+        clave = cls.clave_dataset(df)
+        resumen = cls._cache.obtener(clave)
+        if resumen is None:
+            resumen = cls(df)
+            cls._cache.guardar(clave, resumen, tamano=resumen.tamano_bytes())
+        return resumen
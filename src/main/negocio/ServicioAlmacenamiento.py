@@ -1,82 +1,280 @@
+import logging
+import os
+import time
+from typing import Callable, Optional
 import pandas as pd
-import mysql.connector
-from mysql.connector import Error
 from datos.GuardarDatosArchivo import GuardarDatosArchivo
+from datos.PoolConexiones import PoolConexiones
+from datos.AlmacenAnalisis import AlmacenAnalisis, crear_almacen
+from datos.AlmacenMySQL import AlmacenMySQL
+from datos.HuellaFilas import COLUMNA_HUELLA, calcular_huellas
+from negocio.CacheLRU import CacheLRU
+from negocio.AnalisisGuardado import AnalisisGuardado
+from negocio.Instrumentacion import Instrumentacion
+from negocio.MarcoAnalisis import MarcoAnalisis
+
+logger = logging.getLogger(__name__)
 
 
 class ServicioAlmacenamiento:
-    def __init__(self, db_config, directorio_base_csv='datos_analizados'):
+    """
+    Guarda y consulta análisis. En la base de datos (MySQL o SQLite, ver
+    datos.AlmacenAnalisis) todos los análisis viven en una sola tabla de hechos
+    identificada por lote y se listan desde el catálogo.
+    """
+    COLUMNAS_PERSISTIDAS = AlmacenAnalisis.COLUMNAS_PERSISTIDAS
+    TAMANO_LOTE = 1000
+    CLAVE_CATALOGO = ('catalogo',)
+
+    def __init__(self, db_config=None, directorio_base_csv='datos_analizados',
+                 pool: Optional[PoolConexiones] = None, cache: Optional[CacheLRU] = None,
+                 formato_archivo: Optional[str] = None, almacen: Optional[AlmacenAnalisis] = None):
+        """
+        Args:
+            db_config (dict): Configuración de MySQL; se usa para crear el pool
+                si no se recibe uno.
+            directorio_base_csv (str): Carpeta de los archivos de análisis.
+            pool (Optional[PoolConexiones]): Pool compartido de conexiones.
+            cache (Optional[CacheLRU]): Caché del catálogo y de los análisis cargados.
+            formato_archivo (Optional[str]): 'csv' o 'parquet'; por defecto el de la
+                variable de entorno GSSP_FORMATO_ARCHIVO, o 'csv'.
+            almacen (Optional[AlmacenAnalisis]): Motor de base de datos. Si no se
+                indica, se usa MySQL con `pool`, o el motor de la variable de
+                entorno GSSP_ALMACEN ('mysql' o 'sqlite').
+        """
         self.db_config = db_config
+        if almacen is None:
+            almacen = AlmacenMySQL(pool) if pool is not None else crear_almacen(db_config)
+        self.almacen = almacen
+        # Solo MySQL tiene pool; se expone para compartirlo con otros servicios
+        self.pool = getattr(almacen, 'pool', None)
+        self.cache = cache if cache is not None else CacheLRU(
+            max_entradas=32, max_bytes=512 * 1024 * 1024, ttl_segundos=600
+        )
         self.guardar_datos_csv = GuardarDatosArchivo(
-            directorio_base=directorio_base_csv
+            directorio_base=directorio_base_csv,
+            formato=formato_archivo or os.environ.get('GSSP_FORMATO_ARCHIVO', 'csv')
         )
 
-    def guardar_analisis_csv(self, datos: pd.DataFrame, nombre_archivo: str) -> tuple[bool, str]:
+    def guardar_analisis_csv(self, datos: pd.DataFrame, nombre_archivo: str,
+                             modo: str = 'reemplazar') -> tuple[bool, str]:
         """
-        Guarda los datos del análisis en un archivo CSV.
+        Guarda los datos del análisis en un archivo (CSV o Parquet).
+
+        Args:
+            modo (str): 'reemplazar' escribe el archivo completo; 'combinar'
+                no lo toca si no hay cambios, agrega al final las filas nuevas
+                y lo reescribe completo si alguna fila se eliminó o cambió.
         """
-        return self.guardar_datos_csv.guardar_datos_limpios(datos, nombre_archivo)
+        with Instrumentacion.compartida().etapa('guardado_archivo', filas_entrada=len(datos)):
+            if modo == 'combinar':
+                return self.guardar_datos_csv.combinar_datos(datos, nombre_archivo)
+            return self.guardar_datos_csv.guardar_datos_limpios(datos, nombre_archivo)
 
-    def guardar_analisis_mysql(self, datos: pd.DataFrame, nombre_tabla: str) -> tuple[bool, str]:
+    def cargar_analisis_archivo(self, nombre_archivo: str, columnas: Optional[list[str]] = None) -> pd.DataFrame:
         """
-        Guarda los datos del análisis en una tabla de MySQL.
+        Carga un análisis guardado en archivo, con tipos compactos (ver
+        MarcoAnalisis.compactar). Con Parquet solo se leen las `columnas` pedidas.
         """
-        try:
-            with mysql.connector.connect(**self.db_config) as conn:
-                with conn.cursor() as cursor:
-                    create_table_query = f"""
-                    CREATE TABLE IF NOT EXISTS {nombre_tabla} (
-                        id INT AUTO_INCREMENT PRIMARY KEY,
-                        comentarios TEXT,
-                        calificacion FLOAT,
-                        Clasificacion VARCHAR(255)
-                    )
-                    """
-                    cursor.execute(create_table_query)
-
-                    for i, row in datos.iterrows():
-                        sql = (
-                            f"INSERT INTO {nombre_tabla} "
-                            "(comentarios, calificacion, Clasificacion) "
-                            "VALUES (%s, %s, %s)"
-                        )
-                        val = (row['comentarios'], row['calificacion'], row['Clasificacion'])
-                        cursor.execute(sql, val)
-                    conn.commit()
-            msg = f"Datos guardados exitosamente en la tabla '{nombre_tabla}' de MySQL."
-            print(msg)
-            return True, msg
-        except Error as e:
-            msg = f"Error al conectar o guardar en MySQL: {e}"
-            print(msg)
-            return False, msg
+        with Instrumentacion.compartida().etapa('carga_archivo') as etapa:
+            datos = MarcoAnalisis.compactar(self.guardar_datos_csv.cargar_datos(nombre_archivo, columnas))
+            etapa.filas_salida = len(datos)
+        return datos
+
+    def guardar_analisis_mysql(
+        self,
+        datos: pd.DataFrame,
+        nombre_tabla: str,
+        tamano_lote: Optional[int] = None,
+        usar_load_data: bool = False,
+        progreso: Optional[Callable[[int, int], None]] = None,
+        reintentos: int = 0,
+        espera_reintento: float = 1.0,
+        al_reintentar: Optional[Callable[[int, Exception], None]] = None,
+        modo: str = 'agregar'
+    ) -> tuple[bool, str]:
+        """
+        Guarda los datos del análisis en la tabla de hechos del almacén (MySQL o
+        SQLite; el nombre del método se conserva por compatibilidad).
+
+        Args:
+            datos (pd.DataFrame): Datos con 'comentarios', 'calificacion' y 'Clasificacion'.
+            nombre_tabla (str): Nombre del análisis en el catálogo.
+            tamano_lote (Optional[int]): Filas por INSERT multi-fila; cada lote se
+                confirma por separado para no mantener una transacción larga.
+            usar_load_data (bool): Si es True y el almacén es MySQL, carga los
+                datos con LOAD DATA LOCAL INFILE a partir de un CSV temporal.
+            progreso (Optional[Callable[[int, int], None]]): Se llama con
+                (filas_guardadas, total_filas) después de cada lote.
+            reintentos (int): Reintentos ante errores transitorios de la base de
+                datos (conexión perdida, interbloqueo...). Cada reintento continúa
+                después del último lote confirmado, con espera exponencial a
+                partir de `espera_reintento` segundos.
+            al_reintentar (Optional[Callable[[int, Exception], None]]): Se llama
+                con (número de reintento, error) antes de cada reintento.
+            modo (str): 'agregar' inserta todas las filas en el lote del análisis;
+                'combinar' deja el lote igual a `datos` escribiendo solo las filas
+                nuevas, las de clase cambiada y los borrados (por huella de
+                contenido). En 'combinar', `progreso` cuenta operaciones y un
+                reintento vuelve a calcular la diferencia.
+        """
+        if modo not in ('agregar', 'combinar'):
+            raise ValueError(f"Modo de guardado no soportado: '{modo}'. Opciones: agregar, combinar")
+        with Instrumentacion.compartida().etapa('guardado_bd', filas_entrada=len(datos)):
+            tamano_lote = tamano_lote or self.TAMANO_LOTE
+            motor = self.almacen.nombre
+            total = len(datos)
+            guardadas = 0
+            intento = 0
+            cambios = None
+            if modo == 'agregar':
+                # Las huellas se calculan sobre todos los datos: un reintento inserta
+                # solo el resto y el número de aparición de cada fila no cambia
+                datos = datos.copy(deep=False)
+                datos[COLUMNA_HUELLA] = calcular_huellas(datos)
+            try:
+                while True:
+                    def avanzar(hechas: int, _total: int, inicio: int = guardadas) -> None:
+                        nonlocal guardadas
+                        guardadas = inicio + hechas
+                        if progreso:
+                            progreso(guardadas, total)
+                    try:
+                        if modo == 'combinar':
+                            cambios = self.almacen.combinar(datos, nombre_tabla, tamano_lote, progreso=progreso)
+                        else:
+                            self.almacen.guardar(datos.iloc[guardadas:], nombre_tabla, tamano_lote,
+                                                 progreso=avanzar, usar_load_data=usar_load_data)
+                        break
+                    except self.almacen.ERRORES as e:
+                        if intento >= reintentos or not self.almacen.es_transitorio(e):
+                            raise
+                        intento += 1
+                        espera = espera_reintento * 2 ** (intento - 1)
+                        logger.warning("Error transitorio en %s (%d/%d filas guardadas): %s. "
+                                       "Reintento %d/%d en %.1f s.",
+                                       motor, guardadas, total, e, intento, reintentos, espera)
+                        if al_reintentar:
+                            al_reintentar(intento, e)
+                        time.sleep(espera)
+                if cambios is None:
+                    msg = f"Datos guardados exitosamente en el análisis '{nombre_tabla}' de {motor}."
+                else:
+                    msg = (f"Análisis '{nombre_tabla}' combinado exitosamente en {motor}: "
+                           f"{cambios['insertadas']} nuevas, {cambios['actualizadas']} actualizadas, "
+                           f"{cambios['eliminadas']} eliminadas, {cambios['sin_cambios']} sin cambios.")
+                logger.info(msg)
+                return True, msg
+            except self.almacen.ERRORES as e:
+                msg = f"Error al conectar o guardar en {motor}: {e}"
+                logger.error(msg)
+                return False, msg
+            finally:
+                # Los lotes se confirman por separado, así que incluso un guardado
+                # fallido puede haber modificado la tabla.
+                self.invalidar_cache(nombre_tabla)
+
+    def invalidar_cache(self, nombre_tabla: Optional[str] = None) -> None:
+        """
+        Descarta el catálogo en caché y, si se indica, el análisis de `nombre_tabla`
+        junto con sus agregados.
+        """
+        self.cache.invalidar(self.CLAVE_CATALOGO)
+        if nombre_tabla is not None:
+            self.cache.invalidar(('analisis', nombre_tabla))
+            self.cache.invalidar_donde(
+                lambda clave: clave[:2] == ('agregado', nombre_tabla)
+            )
 
     def listar_analisis_guardados(self) -> list[str]:
         """
-        Lista las tablas de análisis guardados en la base de datos.
+        Lista los análisis guardados en el catálogo, del más antiguo al más reciente.
+        El resultado se guarda en caché hasta que expira o se guarda un análisis.
         """
+        tablas = self.cache.obtener(self.CLAVE_CATALOGO)
+        if tablas is not None:
+            return list(tablas)
+
         try:
-            with mysql.connector.connect(**self.db_config) as conn:
-                with conn.cursor() as cursor:
-                    cursor.execute("SHOW TABLES LIKE 'analisis_%'")
-                    tablas = [row[0] for row in cursor.fetchall()]
-                    return tablas
-        except Error as e:
-            print(f"Error al listar las tablas de análisis: {e}")
+            tablas = self.almacen.listar()
+        except self.almacen.ERRORES as e:
+            logger.error("Error al listar los análisis guardados: %s", e)
             return []
+        self.cache.guardar(self.CLAVE_CATALOGO, tablas)
+        return list(tablas)
 
-    def cargar_analisis_por_nombre(self, nombre_tabla: str) -> pd.DataFrame:
+    def tendencia_por_analisis(self) -> pd.DataFrame:
         """
-        Carga los datos de una tabla de análisis específica.
+        Conteo y longitud promedio por clase de cada análisis guardado, en una sola
+        consulta sobre el índice (lote_id, Clasificacion). Permite comparar periodos.
+
+        Returns:
+            pd.DataFrame: 'analisis', 'creado', 'Clasificacion', 'cantidad' y
+            'LongitudPromedio'.
         """
+        columnas = ['analisis', 'creado', 'Clasificacion', 'cantidad', 'LongitudPromedio']
         try:
-            with mysql.connector.connect(**self.db_config) as conn:
-                query = (
-                    f"SELECT comentarios, calificacion, Clasificacion "
-                    f"FROM {nombre_tabla}"
-                )
-                df = pd.read_sql(query, conn)
+            tendencia = pd.DataFrame(self.almacen.tendencia(), columns=columnas)
+        except self.almacen.ERRORES as e:
+            logger.error("Error al consultar la tendencia de los análisis: %s", e)
+            return pd.DataFrame(columns=columnas)
+        tendencia['LongitudPromedio'] = tendencia['LongitudPromedio'].astype(float)
+        return tendencia
+
+    def abrir_analisis(self, nombre_tabla: str) -> AnalisisGuardado:
+        """
+        Devuelve un acceso perezoso al análisis: agregados calculados en la base
+        de datos y comentarios por páginas, sin cargar la tabla completa.
+        """
+        return AnalisisGuardado(self.almacen, nombre_tabla, cache=self.cache)
+
+    def cargar_analisis_por_nombre(self, nombre_tabla: str) -> pd.DataFrame:
+        """
+        Carga los datos de una tabla de análisis específica como marco compacto
+        de solo lectura (ver MarcoAnalisis). La caché es compartida, así que se
+        devuelve una vista: agregar columnas no altera la versión compartida.
+        """
+        clave = ('analisis', nombre_tabla)
+        df = self.cache.obtener(clave)
+        if df is not None:
+            return MarcoAnalisis.vista(df)
+
+        with Instrumentacion.compartida().etapa('carga_analisis') as etapa:
+            try:
+                df = self.almacen.cargar(nombre_tabla)
+            except self.almacen.ERRORES as e:
+                logger.error("Error al cargar los datos del análisis '%s': %s", nombre_tabla, e)
+                return pd.DataFrame()
+            etapa.filas_salida = len(df)
+            if df.empty:
                 return df
-        except Error as e:
-            print(f"Error al cargar los datos del análisis '{nombre_tabla}': {e}")
-            return pd.DataFrame()
+            df = MarcoAnalisis.construir(df)
+        self.cache.guardar(clave, df)
+        return MarcoAnalisis.vista(df)
+
+    def migrar_tablas_antiguas(self, eliminar_originales: bool = False) -> list[tuple[str, int]]:
+        """
+        Copia cada tabla antigua 'analisis_<archivo>' a la tabla de hechos con un
+        lote propio en el catálogo (mismo nombre). Las tablas que ya figuran en el
+        catálogo se omiten, así que la migración puede repetirse sin duplicar.
+
+        Args:
+            eliminar_originales (bool): Si es True, elimina cada tabla antigua
+                después de copiarla.
+
+        Returns:
+            list[tuple[str, int]]: (tabla, filas copiadas) de cada tabla migrada.
+        """
+        migradas = []
+        if not hasattr(self.almacen, 'migrar_tablas_antiguas'):
+            logger.info("El almacén %s no tiene tablas antiguas que migrar.", self.almacen.nombre)
+            return migradas
+        try:
+            # Se consume tabla por tabla para conservar las ya migradas si una falla
+            for tabla, filas in self.almacen.migrar_tablas_antiguas(eliminar_originales):
+                migradas.append((tabla, filas))
+        except self.almacen.ERRORES as e:
+            logger.error("Error durante la migración de tablas antiguas: %s", e)
+        finally:
+            self.invalidar_cache()
+        return migradas
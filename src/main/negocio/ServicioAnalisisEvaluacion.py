@@ -1,81 +1,398 @@
 import pandas as pd
+import numpy as np
+import hashlib
 import joblib
+import logging
+import multiprocessing
 import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Iterator, Optional
 from negocio.ServicioAlmacenamiento import ServicioAlmacenamiento
+from datos.ConfiguracionBD import cargar_configuracion_bd
+from datos.PoolConexiones import PoolConexiones
+from datos.AlmacenAnalisis import AlmacenAnalisis
+from datos.CachePredicciones import CachePredicciones
+from negocio.Instrumentacion import Instrumentacion
+
+logger = logging.getLogger(__name__)
+
+# Modelo cargado en cada proceso del pool de clasificación paralela
+_modelo_trabajador = None
+
+
+def _inicializar_trabajador(ruta_modelo: str) -> None:
+    """
+    Carga el modelo una vez por proceso. Con mmap_mode los arreglos numpy del
+    pickle (p. ej. los coeficientes) se comparten desde el archivo en lugar de copiarse.
+    """
+    global _modelo_trabajador
+    _modelo_trabajador = joblib.load(ruta_modelo, mmap_mode='r')
+
+
+def _predecir_fragmento(fragmento: pd.DataFrame) -> tuple[np.ndarray, Optional[np.ndarray]]:
+    return _predecir_con_modelo(_modelo_trabajador, fragmento)
+
+
+def _predecir_con_modelo(modelo, lote: pd.DataFrame) -> tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Predice un lote y calcula su confianza transformando las entradas una sola vez.
+
+    La etiqueta es siempre la de `predict`: las probabilidades calibradas (Platt,
+    p. ej. SVC(probability=True)) pueden preferir otra clase. La confianza es la
+    probabilidad de la etiqueta predicha (entre 0 y 1) si el modelo tiene
+    predict_proba; si no, es el margen de decision_function para esa etiqueta
+    (p. ej. LinearSVC): no está acotado y solo sirve para ordenar predicciones
+    del mismo modelo, no como probabilidad.
+    """
+    if not hasattr(modelo, 'classes_'):
+        return np.asarray(modelo.predict(lote)), None
+    estimador, entradas = modelo, lote
+    if len(getattr(modelo, 'steps', ())) > 1:
+        # Pipeline: el preprocesamiento se aplica una vez para la etiqueta y la confianza
+        estimador, entradas = modelo[-1], modelo[:-1].transform(lote)
+
+    etiquetas = np.asarray(estimador.predict(entradas))
+    filas = np.arange(len(etiquetas))
+    columnas = np.searchsorted(modelo.classes_, etiquetas)
+    if hasattr(estimador, 'predict_proba'):
+        return etiquetas, np.asarray(estimador.predict_proba(entradas))[filas, columnas]
+    if hasattr(estimador, 'decision_function'):
+        puntajes = np.asarray(estimador.decision_function(entradas))
+        if puntajes.ndim == 1:
+            return etiquetas, np.abs(puntajes)
+        if puntajes.shape[1] == len(modelo.classes_):
+            return etiquetas, puntajes[filas, columnas]
+    return etiquetas, None
 
 
 class ServicioAnalisisEvaluacion:
+    COLUMNAS_ENTRADA = ['comentarios', 'calificacion']
+    # Salida del modelo -> etiqueta mostrada y guardada
+    ETIQUETAS = {
+        -1: "Detractor",
+        0: "Neutro",
+        1: "Promotor"
+    }
+    TAMANO_LOTE = 5000
+
+    def __init__(self, ruta_modelo: str, db_config: dict = None, pool: PoolConexiones = None,
+                 cache_predicciones: Optional[CachePredicciones] = None,
+                 almacen: Optional[AlmacenAnalisis] = None):
 
-    def __init__(self, ruta_modelo: str):
+        self.ruta_modelo = ruta_modelo
+        self.cache_predicciones = cache_predicciones
+        self._ejecutor = None
+        self._n_procesos_ejecutor = None
+        self._lock_ejecutor = threading.Lock()
 
         try:
-            self.modelo = joblib.load(ruta_modelo)
-            print(f"Servicio de Análisis inicializado. "
-                  f"Modelo cargado desde '{ruta_modelo}'.")
+            with Instrumentacion.compartida().etapa('carga_modelo'):
+                self.modelo = joblib.load(ruta_modelo)
+                self.version_modelo = self._calcular_version_modelo(ruta_modelo)
+            logger.info("Servicio de Análisis inicializado. Modelo cargado desde '%s'.", ruta_modelo)
 
         except FileNotFoundError:
-            print(f"ERROR CRÍTICO: No se encontró el archivo del modelo "
-                  f"en la ruta '{ruta_modelo}'.")
+            logger.critical("No se encontró el archivo del modelo en la ruta '%s'.", ruta_modelo)
             self.modelo = None
+            self.version_modelo = None
 
         except Exception as e:
-
-            print(f"ERROR CRÍTICO: Falló joblib.load() por una razón "
-                  f"inesperada: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.critical("Falló joblib.load() por una razón inesperada: %s", e, exc_info=True)
             self.modelo = None
+            self.version_modelo = None
 
-        # TODO: Externalize database configuration
-        db_config = {
-            'host': 'localhost',
-            'user': 'user',
-            'password': 'password',
-            'database': 'cosmitos_imperiales_db'
-        }
-        self.servicio_almacenamiento = ServicioAlmacenamiento(db_config=db_config)
+        if almacen is None and pool is None and db_config is None:
+            db_config = cargar_configuracion_bd()
+        self.servicio_almacenamiento = ServicioAlmacenamiento(
+            db_config=db_config, pool=pool, almacen=almacen
+        )
 
-    def realizar_analisis_sentimientos(self, datos: pd.DataFrame) -> pd.DataFrame:
+    @staticmethod
+    def _calcular_version_modelo(ruta_modelo: str) -> str:
+        """Identifica el modelo por el hash de su archivo (se usa en las claves de caché)."""
+        try:
+            with open(ruta_modelo, 'rb') as archivo:
+                return hashlib.sha256(archivo.read()).hexdigest()[:16]
+        except OSError:
+            return os.path.basename(ruta_modelo)
+
+    def realizar_analisis_sentimientos(
+        self,
+        datos: pd.DataFrame,
+        tamano_lote: Optional[int] = None,
+        progreso: Optional[Callable[[int, int], None]] = None,
+        n_procesos: Optional[int] = None,
+        deduplicar: bool = True
+    ) -> pd.DataFrame:
         """
         Realiza análisis de sentimientos en los comentarios de un DataFrame.
+
+        Args:
+            datos (pd.DataFrame): Debe tener las columnas 'comentarios' y 'calificacion'.
+            tamano_lote (Optional[int]): Filas que se envían al modelo en cada lote.
+            progreso (Optional[Callable[[int, int], None]]): Se llama con
+                (filas_clasificadas, total_a_clasificar) después de cada lote; el
+                total cuenta solo las filas que realmente llegan al modelo.
+            n_procesos (Optional[int]): Si es mayor que 1, los lotes se clasifican
+                en un pool de procesos de ese tamaño.
+            deduplicar (bool): Clasifica cada par (comentario, calificacion) una
+                sola vez y replica la etiqueta en todas sus filas.
+
+        Returns:
+            pd.DataFrame: Filas válidas con 'Clasificacion' y, si el modelo lo
+            permite, 'Confianza' (probabilidad de la clase predicha o, para
+            modelos sin predict_proba, margen de decision_function).
         """
+        with Instrumentacion.compartida().etapa('clasificacion', filas_entrada=len(datos)) as etapa:
+            resultado = self._analizar(datos, tamano_lote, progreso, n_procesos, deduplicar)
+            etapa.filas_salida = len(resultado)
+        return resultado
+
+    def _analizar(
+        self,
+        datos: pd.DataFrame,
+        tamano_lote: Optional[int],
+        progreso: Optional[Callable[[int, int], None]],
+        n_procesos: Optional[int],
+        deduplicar: bool
+    ) -> pd.DataFrame:
+        """Cuerpo de `realizar_analisis_sentimientos`, sin la medición de la etapa."""
         if self.modelo is None:
-            print("ERROR: El modelo no está cargado (self.modelo es None). "
-                  "No se puede realizar la predicción.")
+            logger.error("El modelo no está cargado (self.modelo es None). "
+                         "No se puede realizar la predicción.")
             return datos
 
-        if not all(col in datos.columns for col in ['comentarios', 'calificacion']):
-            print("ERROR: El DataFrame de entrada debe tener las columnas "
-                  "'comentarios' y 'calificacion'.")
+        if not all(col in datos.columns for col in self.COLUMNAS_ENTRADA):
+            logger.error("El DataFrame de entrada debe tener las columnas "
+                         "'comentarios' y 'calificacion'.")
             return datos
 
-        datos_a_predecir = datos.copy()
-        datos_a_predecir.dropna(subset=['comentarios', 'calificacion'], inplace=True)
+        validos = datos[self.COLUMNAS_ENTRADA].notna().all(axis=1)
+        # Con nulos solo se copian las filas válidas; la copia superficial final
+        # hace de datos_a_predecir un DataFrame propio y no una vista de `datos`
+        datos_a_predecir = (datos if validos.all() else datos.loc[validos]).copy(deep=False)
 
         if datos_a_predecir.empty:
-            print("Advertencia: No hay datos válidos para predecir "
-                  "después de eliminar nulos.")
+            logger.warning("No hay datos válidos para predecir después de eliminar nulos.")
             return datos
 
-        X_para_predecir = datos_a_predecir[['comentarios', 'calificacion']]
+        logger.info("Realizando predicciones en %d filas...", len(datos_a_predecir))
+
+        # Cada par (comentario, calificacion) distinto se clasifica una sola vez
+        codigos, unicos = None, datos_a_predecir
+        if deduplicar:
+            with Instrumentacion.compartida().etapa('deduplicacion', filas_entrada=len(datos_a_predecir)) as etapa:
+                codigos, unicos = self._deduplicar(datos_a_predecir)
+                etapa.filas_salida = len(unicos)
+            logger.info("Se clasificarán %d pares únicos de %d filas.", len(unicos), len(datos_a_predecir))
 
-        print(f"Realizando predicciones en {len(X_para_predecir)} filas...")
-        predicciones = self.modelo.predict(X_para_predecir)
+        with Instrumentacion.compartida().etapa('prediccion', filas_entrada=len(unicos)) as etapa:
+            if self.cache_predicciones is not None:
+                predicciones, confianzas = self._clasificar_con_cache(
+                    unicos, tamano_lote, progreso, n_procesos
+                )
+            else:
+                predicciones, confianzas = self._clasificar(
+                    unicos, tamano_lote, progreso, n_procesos
+                )
+            etapa.filas_salida = len(predicciones)
+
+        if codigos is not None:
+            predicciones = predicciones[codigos]
+            confianzas = None if confianzas is None else confianzas[codigos]
 
         datos_a_predecir['Clasificacion'] = predicciones
+        if confianzas is not None:
+            datos_a_predecir['Confianza'] = confianzas
 
-        print("Predicciones completadas.")
+        logger.info("Predicciones completadas.")
         return datos_a_predecir
 
-    def guardar_analisis(self, datos: pd.DataFrame, nombre_base_archivo: str, nombre_tabla: str) -> tuple[bool, str]:
+    def _deduplicar(self, datos: pd.DataFrame) -> tuple[np.ndarray, pd.DataFrame]:
+        """
+        Factoriza los pares (comentario, calificacion).
+
+        Returns:
+            tuple: (codigos, unicos) donde `unicos` tiene la primera aparición de
+            cada par, en orden, y unicos.iloc[codigos] reconstruye `datos`.
+        """
+        codigos = datos.groupby(self.COLUMNAS_ENTRADA, sort=False).ngroup().to_numpy()
+        _, primeras = np.unique(codigos, return_index=True)
+        return codigos, datos.iloc[primeras]
+
+    def _clasificar(
+        self,
+        datos: pd.DataFrame,
+        tamano_lote: Optional[int],
+        progreso: Optional[Callable[[int, int], None]],
+        n_procesos: Optional[int]
+    ) -> tuple[np.ndarray, Optional[np.ndarray]]:
+        """Envía todas las filas de `datos` al modelo, en serie o en paralelo."""
+        total = len(datos)
+        if n_procesos and n_procesos > 1:
+            tamano_lote = tamano_lote or max(1, min(self.TAMANO_LOTE, -(-total // n_procesos)))
+            resultados_lotes = self._predecir_en_paralelo(datos, tamano_lote, n_procesos)
+        else:
+            resultados_lotes = self.predecir_por_lotes(datos, tamano_lote)
+
+        lista_predicciones, lista_confianzas = [], []
+        for _, fin, predicciones, confianzas in resultados_lotes:
+            lista_predicciones.append(predicciones)
+            lista_confianzas.append(confianzas)
+            if progreso:
+                progreso(fin, total)
+
+        if not lista_predicciones:
+            return np.array([]), None
+        confianzas = (np.concatenate(lista_confianzas)
+                      if all(c is not None for c in lista_confianzas) else None)
+        return np.concatenate(lista_predicciones), confianzas
+
+    def _clasificar_con_cache(
+        self,
+        datos: pd.DataFrame,
+        tamano_lote: Optional[int],
+        progreso: Optional[Callable[[int, int], None]],
+        n_procesos: Optional[int]
+    ) -> tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Consulta la caché de predicciones y solo envía al modelo las filas que no
+        están guardadas; las nuevas predicciones se agregan a la caché.
+        """
+        claves = CachePredicciones.calcular_claves(
+            datos['comentarios'], datos['calificacion'], self.version_modelo
+        )
+        encontrados = self.cache_predicciones.buscar(claves)
+        faltantes = np.fromiter((c not in encontrados for c in claves), dtype=bool, count=len(claves))
+
+        predicciones = np.empty(len(claves), dtype=object)
+        confianzas = np.full(len(claves), np.nan)
+        for i in np.flatnonzero(~faltantes):
+            clasificacion, confianza = encontrados[claves[i]]
+            predicciones[i] = clasificacion
+            confianzas[i] = np.nan if confianza is None else confianza
+
+        posiciones = np.flatnonzero(faltantes)
+        logger.info("Caché de predicciones: %d de %d filas encontradas; se clasificarán %d.",
+                    len(claves) - len(posiciones), len(claves), len(posiciones))
+        if len(posiciones):
+            nuevas, nuevas_confianzas = self._clasificar(
+                datos.iloc[posiciones], tamano_lote, progreso, n_procesos
+            )
+            self.cache_predicciones.guardar(
+                [claves[i] for i in posiciones], nuevas, nuevas_confianzas
+            )
+            predicciones[posiciones] = nuevas
+            if nuevas_confianzas is not None:
+                confianzas[posiciones] = nuevas_confianzas
+        elif progreso:
+            progreso(len(claves), len(claves))
+
+        # Recupera el tipo de las etiquetas (p. ej. enteros) en lugar de object
+        predicciones = np.asarray(predicciones.tolist())
+        return predicciones, (None if np.isnan(confianzas).all() else confianzas)
+
+    def estadisticas_cache_predicciones(self) -> Optional[dict]:
+        """Aciertos, fallos y tasa de aciertos de la caché de predicciones, si existe."""
+        if self.cache_predicciones is None:
+            return None
+        return self.cache_predicciones.estadisticas()
+
+    def predecir_por_lotes(
+        self,
+        datos: pd.DataFrame,
+        tamano_lote: Optional[int] = None
+    ) -> Iterator[tuple[int, int, np.ndarray, Optional[np.ndarray]]]:
+        """
+        Clasifica `datos` en lotes y produce los resultados de cada uno a medida
+        que están listos, sin copiar el DataFrame completo.
+
+        Yields:
+            tuple: (inicio, fin, predicciones, confianzas) del lote datos.iloc[inicio:fin].
+            `confianzas` es None si el modelo no tiene predict_proba ni decision_function.
+        """
+        tamano_lote = tamano_lote or self.TAMANO_LOTE
+        for inicio in range(0, len(datos), tamano_lote):
+            lote = datos.iloc[inicio:inicio + tamano_lote][self.COLUMNAS_ENTRADA]
+            predicciones, confianzas = self._predecir_lote(lote)
+            yield inicio, inicio + len(lote), predicciones, confianzas
+
+    def _predecir_lote(self, lote: pd.DataFrame) -> tuple[np.ndarray, Optional[np.ndarray]]:
+        return _predecir_con_modelo(self.modelo, lote)
+
+    def _predecir_en_paralelo(
+        self,
+        datos: pd.DataFrame,
+        tamano_lote: int,
+        n_procesos: int
+    ) -> Iterator[tuple[int, int, np.ndarray, Optional[np.ndarray]]]:
+        """
+        Reparte los lotes entre `n_procesos` procesos y produce los resultados en
+        el orden original. Cada proceso carga el modelo una sola vez.
+        """
+        ejecutor = self._obtener_ejecutor(n_procesos)
+        pendientes = deque()
+        # Como máximo dos lotes en vuelo por proceso, para no serializar todo de golpe
+        for inicio in range(0, len(datos), tamano_lote):
+            fragmento = datos.iloc[inicio:inicio + tamano_lote][self.COLUMNAS_ENTRADA]
+            futuro = ejecutor.submit(_predecir_fragmento, fragmento)
+            pendientes.append((inicio, inicio + len(fragmento), futuro))
+            if len(pendientes) >= 2 * n_procesos:
+                yield self._resultado_fragmento(*pendientes.popleft())
+
+        while pendientes:
+            yield self._resultado_fragmento(*pendientes.popleft())
+
+    @staticmethod
+    def _resultado_fragmento(inicio: int, fin: int, futuro: Future) -> tuple:
+        predicciones, confianzas = futuro.result()
+        return inicio, fin, predicciones, confianzas
+
+    def _obtener_ejecutor(self, n_procesos: int) -> ProcessPoolExecutor:
+        """Crea (o reutiliza) el pool de procesos de clasificación."""
+        with self._lock_ejecutor:
+            if self._ejecutor is not None and self._n_procesos_ejecutor != n_procesos:
+                self._ejecutor.shutdown(wait=True)
+                self._ejecutor = None
+
+            if self._ejecutor is None:
+                # 'spawn' evita heredar hilos de Streamlit en los procesos hijos
+                self._ejecutor = ProcessPoolExecutor(
+                    max_workers=n_procesos,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_inicializar_trabajador,
+                    initargs=(self.ruta_modelo,)
+                )
+                self._n_procesos_ejecutor = n_procesos
+            return self._ejecutor
+
+    def cerrar_procesos(self) -> None:
+        """Detiene el pool de procesos de clasificación, si existe."""
+        with self._lock_ejecutor:
+            if self._ejecutor is not None:
+                self._ejecutor.shutdown(wait=True)
+                self._ejecutor = None
+                self._n_procesos_ejecutor = None
+
+    def guardar_analisis(self, datos: pd.DataFrame, nombre_base_archivo: str, nombre_tabla: str,
+                         combinar: bool = True) -> tuple[bool, str]:
         """
         Guarda los resultados del análisis en un archivo CSV y en la base de datos MySQL.
+        Con `combinar`, volver a guardar un análisis solo escribe las filas nuevas o
+        modificadas y borra las que ya no están, en lugar de duplicarlo.
         """
-        print(f"Guardando análisis con nombre base '{nombre_base_archivo}' "
-              f"y en tabla '{nombre_tabla}'...")
+        logger.info("Guardando análisis con nombre base '%s' y en tabla '%s'...",
+                    nombre_base_archivo, nombre_tabla)
 
-        guardado_csv, msg_csv = self.servicio_almacenamiento.guardar_analisis_csv(datos, nombre_base_archivo)
-        guardado_mysql, msg_mysql = self.servicio_almacenamiento.guardar_analisis_mysql(datos, nombre_tabla)
+        modo_archivo, modo_bd = ('combinar', 'combinar') if combinar else ('reemplazar', 'agregar')
+        guardado_csv, msg_csv = self.servicio_almacenamiento.guardar_analisis_csv(
+            datos, nombre_base_archivo, modo=modo_archivo
+        )
+        guardado_mysql, msg_mysql = self.servicio_almacenamiento.guardar_analisis_mysql(
+            datos, nombre_tabla, modo=modo_bd
+        )
 
         success = guardado_csv and guardado_mysql
         message = f"CSV: {msg_csv}\nMySQL: {msg_mysql}"
@@ -86,4 +403,7 @@ class ServicioAnalisisEvaluacion:
         return self.servicio_almacenamiento.listar_analisis_guardados()
 
     def cargar_analisis_por_nombre(self, nombre_tabla: str) -> pd.DataFrame:
-        return self.servicio_almacenamiento.cargar_analisis_por_nombre(nombre_tabla)
\ No newline at end of file
+        return self.servicio_almacenamiento.cargar_analisis_por_nombre(nombre_tabla)
+
+    def abrir_analisis(self, nombre_tabla: str):
+        return self.servicio_almacenamiento.abrir_analisis(nombre_tabla)
\ No newline at end of file
@@ -1,9 +1,10 @@
+import hashlib
 import streamlit as st
 import pdfkit
-import os
-import base64
-import tempfile
 import streamlit.components.v1 as components
+from negocio.CacheLRU import CacheLRU
+
+_cache = CacheLRU(max_entradas=8, max_bytes=64 * 1024 * 1024, ttl_segundos=1800)
 
 def boton_imprimir_pdf():
     """
@@ -40,19 +41,21 @@ def boton_descargar_pdf(contenido_html, nombre_archivo="informe.pdf"):
     Genera un PDF a partir de HTML y muestra un botón de descarga en Streamlit.
     - contenido_html: cadena HTML que quieres convertir.
     - nombre_archivo: nombre del PDF descargable.
+
+    Requiere wkhtmltopdf; el PDF se genera en memoria y se guarda en caché por
+    el contenido, así que volver a dibujar la página no lanza otro proceso. El
+    reporte del análisis no usa este camino (ver
+    presentacion.logica.exportador_pdf).
     """
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmpfile:
-            pdfkit.from_string(contenido_html, tmpfile.name)
-            tmpfile_path = tmpfile.name
-
-        with open(tmpfile_path, "rb") as pdf_file:
-            st.download_button(
-                label="📄 Descargar PDF",
-                data=pdf_file,
-                file_name=nombre_archivo,
-                mime="application/pdf"
-            )
-        os.remove(tmpfile_path)
+        clave = hashlib.sha256(contenido_html.encode('utf-8')).hexdigest()
+        # Con ruta False, pdfkit devuelve los bytes en lugar de escribir un archivo
+        pdf = _cache.obtener_o_calcular(clave, lambda: pdfkit.from_string(contenido_html, False))
+        st.download_button(
+            label="📄 Descargar PDF",
+            data=pdf,
+            file_name=nombre_archivo,
+            mime="application/pdf"
+        )
     except Exception as e:
         st.error(f"Error al generar el PDF: {e}")
@@ -0,0 +1,170 @@
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import pandas as pd
+
+from negocio.ServicioAlmacenamiento import ServicioAlmacenamiento
+
+logger = logging.getLogger(__name__)
+
+
+class ServicioGuardadoSegundoPlano:
+    """
+    Cola de guardados en segundo plano. Cada trabajo escribe el archivo y la base
+    de datos en paralelo en un pool de hilos, de modo que la interfaz no espera
+    al guardado; su estado se consulta con `estado(id)` mientras avanza.
+
+    Los guardados de un mismo archivo o de una misma tabla nunca corren a la
+    vez: cada destino tiene su propio lock, y encolar un análisis que ya tiene
+    un trabajo sin terminar devuelve el id de ese trabajo en lugar de crear otro.
+
+    Estado de un trabajo (dict):
+        'id', 'nombre' (tabla), 'archivo_base', 'estado' ('en_cola', 'guardando', 'completado' o 'error'),
+        'archivo' y 'bd' (cada uno con 'estado' y 'mensaje'; 'bd' además con
+        'filas', 'total' e 'intentos', el número de reintentos hechos),
+        'creado' y 'terminado' (time.time(); None mientras está en curso).
+    """
+    REINTENTOS_BD = 3
+    ESPERA_REINTENTO = 1.0
+    MAX_HISTORIAL = 50
+
+    def __init__(self, servicio_almacenamiento: ServicioAlmacenamiento, max_hilos: int = 4,
+                 reintentos_bd: Optional[int] = None, espera_reintento: Optional[float] = None):
+        """
+        Args:
+            servicio_almacenamiento (ServicioAlmacenamiento): Servicio que guarda.
+            max_hilos (int): Hilos del pool (dos por trabajo en curso).
+            reintentos_bd (Optional[int]): Reintentos ante errores transitorios
+                de la base de datos.
+            espera_reintento (Optional[float]): Espera inicial entre reintentos.
+        """
+        self.servicio_almacenamiento = servicio_almacenamiento
+        self.reintentos_bd = self.REINTENTOS_BD if reintentos_bd is None else reintentos_bd
+        self.espera_reintento = self.ESPERA_REINTENTO if espera_reintento is None else espera_reintento
+        self._ejecutor = ThreadPoolExecutor(max_workers=max(2, max_hilos), thread_name_prefix='gssp-guardado')
+        self._trabajos = OrderedDict()
+        self._contador = itertools.count(1)
+        self._lock = threading.Lock()
+        self._locks_destino = {}
+
+    def encolar(self, datos: pd.DataFrame, nombre_base_archivo: str, nombre_tabla: str,
+                combinar: bool = True) -> str:
+        """
+        Agrega un guardado a la cola y devuelve su id sin esperar a que termine.
+        `datos` no debe modificarse mientras el trabajo esté en curso. Con
+        `combinar`, solo se escribe la diferencia con lo ya guardado. Si ya hay
+        un trabajo sin terminar para `nombre_tabla` o `nombre_base_archivo`, no
+        se encola nada y se devuelve el id de ese trabajo.
+        """
+        with self._lock:
+            for trabajo in self._trabajos.values():
+                if trabajo['terminado'] is None and (
+                        trabajo['nombre'] == nombre_tabla or trabajo['archivo_base'] == nombre_base_archivo):
+                    logger.info("'%s' ya tiene el guardado '%s' en curso; no se encola otro.",
+                                nombre_tabla, trabajo['id'])
+                    return trabajo['id']
+            id_trabajo = f"guardado-{next(self._contador)}"
+            self._trabajos[id_trabajo] = {
+                'id': id_trabajo,
+                'nombre': nombre_tabla,
+                'archivo_base': nombre_base_archivo,
+                'estado': 'en_cola',
+                'archivo': {'estado': 'en_cola', 'mensaje': ''},
+                'bd': {'estado': 'en_cola', 'mensaje': '', 'filas': 0, 'total': len(datos), 'intentos': 0},
+                'creado': time.time(),
+                'terminado': None,
+            }
+            self._podar_historial()
+        logger.info("Guardado '%s' de '%s' en cola.", id_trabajo, nombre_tabla)
+
+        self._ejecutor.submit(self._guardar_archivo, id_trabajo, datos, nombre_base_archivo,
+                              'combinar' if combinar else 'reemplazar')
+        self._ejecutor.submit(self._guardar_bd, id_trabajo, datos, nombre_tabla,
+                              'combinar' if combinar else 'agregar')
+        return id_trabajo
+
+    def _lock_destino(self, parte: str, nombre: str) -> threading.Lock:
+        """Lock que serializa los guardados del archivo o de la tabla `nombre`."""
+        with self._lock:
+            return self._locks_destino.setdefault((parte, nombre), threading.Lock())
+
+    def _podar_historial(self) -> None:
+        """Descarta los trabajos terminados más antiguos por encima de `MAX_HISTORIAL`."""
+        terminados = [i for i, t in self._trabajos.items() if t['terminado'] is not None]
+        for id_trabajo in terminados[:max(0, len(self._trabajos) - self.MAX_HISTORIAL)]:
+            del self._trabajos[id_trabajo]
+
+    def _actualizar(self, id_trabajo: str, parte: str, **cambios) -> None:
+        with self._lock:
+            trabajo = self._trabajos[id_trabajo]
+            trabajo[parte].update(cambios)
+            estados = {trabajo['archivo']['estado'], trabajo['bd']['estado']}
+            if estados <= {'completado', 'error'}:
+                trabajo['estado'] = 'error' if 'error' in estados else 'completado'
+                trabajo['terminado'] = time.time()
+            elif estados != {'en_cola'}:
+                trabajo['estado'] = 'guardando'
+
+    def _guardar_archivo(self, id_trabajo: str, datos: pd.DataFrame, nombre_base_archivo: str,
+                         modo: str) -> None:
+        with self._lock_destino('archivo', nombre_base_archivo):
+            self._actualizar(id_trabajo, 'archivo', estado='guardando')
+            try:
+                exito, msg = self.servicio_almacenamiento.guardar_analisis_csv(datos, nombre_base_archivo, modo=modo)
+            except Exception as e:
+                exito, msg = False, f"Error inesperado al guardar el archivo: {e}"
+        self._actualizar(id_trabajo, 'archivo', estado='completado' if exito else 'error', mensaje=msg)
+
+    def _guardar_bd(self, id_trabajo: str, datos: pd.DataFrame, nombre_tabla: str, modo: str) -> None:
+        def progreso(filas: int, total: int) -> None:
+            self._actualizar(id_trabajo, 'bd', filas=filas, total=total)
+
+        def al_reintentar(intento: int, error: Exception) -> None:
+            self._actualizar(id_trabajo, 'bd', intentos=intento,
+                             mensaje=f"Reintento {intento}/{self.reintentos_bd}: {error}")
+
+        with self._lock_destino('bd', nombre_tabla):
+            self._actualizar(id_trabajo, 'bd', estado='guardando')
+            try:
+                exito, msg = self.servicio_almacenamiento.guardar_analisis_mysql(
+                    datos, nombre_tabla, progreso=progreso,
+                    reintentos=self.reintentos_bd, espera_reintento=self.espera_reintento,
+                    al_reintentar=al_reintentar, modo=modo
+                )
+            except Exception as e:
+                exito, msg = False, f"Error inesperado al guardar en la base de datos: {e}"
+        self._actualizar(id_trabajo, 'bd', estado='completado' if exito else 'error', mensaje=msg)
+
+    def estado(self, id_trabajo: str) -> Optional[dict]:
+        """Copia del estado del trabajo, o None si no existe (o ya se descartó)."""
+        with self._lock:
+            trabajo = self._trabajos.get(id_trabajo)
+            if trabajo is None:
+                return None
+            return {**trabajo, 'archivo': dict(trabajo['archivo']), 'bd': dict(trabajo['bd'])}
+
+    def en_curso(self, ids: list[str]) -> bool:
+        """True si alguno de los trabajos `ids` no ha terminado."""
+        return any(
+            (trabajo := self.estado(i)) is not None and trabajo['terminado'] is None for i in ids
+        )
+
+    def esperar(self, id_trabajo: str, tiempo_maximo: Optional[float] = None) -> Optional[dict]:
+        """Espera (sondeando) a que termine el trabajo y devuelve su estado."""
+        limite = None if tiempo_maximo is None else time.monotonic() + tiempo_maximo
+        while True:
+            trabajo = self.estado(id_trabajo)
+            if trabajo is None or trabajo['terminado'] is not None:
+                return trabajo
+            if limite is not None and time.monotonic() >= limite:
+                return trabajo
+            time.sleep(0.05)
+
+    def cerrar(self) -> None:
+        """Espera a los guardados pendientes y detiene el pool de hilos."""
+        self._ejecutor.shutdown(wait=True)
@@ -1,16 +1,37 @@
+import logging
 import pandas as pd
 import numpy as np
 import re
 import string
+import sys
 import unicodedata
+from functools import lru_cache
+from typing import Iterable
 from datos import GuardarDatosArchivo
+from negocio.Instrumentacion import Instrumentacion
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1)
+def _tabla_limpieza() -> dict:
+    """
+    Tabla de traducción (se construye una sola vez) que elimina las marcas
+    diacríticas de la forma NFD y reemplaza los signos de puntuación por espacios.
+    """
+    tabla = {
+        cp: None for cp in range(sys.maxunicode + 1)
+        if unicodedata.combining(chr(cp))
+    }
+    tabla.update(str.maketrans(string.punctuation, ' ' * len(string.punctuation)))
+    return tabla
 
 class ServicioLimpiarDatos:
     """
     limpieza y preprocesamiento de datos desde un archivo Excel.
     """
     def __init__(self):
-        print("Servicio de Limpieza de Datos inicializado.")
+        logger.debug("Servicio de Limpieza de Datos inicializado.")
         # Hojas y columnas esperadas en el archivo Excel
         self.HOJAS_REQUERIDAS = ["ATC", "Encuesta salida"]
         self.COLUMNAS_REQUERIDAS = ['Calificacion', 'Comentarios']
@@ -20,7 +41,7 @@ class ServicioLimpiarDatos:
         Lee las hojas especificadas de un archivo Excel, extrae las columnas
         requeridas y las unifica en un solo DataFrame.
         """
-        print(f"Leyendo archivo Excel: '{ruta_archivo}'...")
+        logger.info("Leyendo archivo Excel: '%s'...", ruta_archivo)
         lista_dfs = []
         try:
             with pd.ExcelFile(ruta_archivo, engine='openpyxl') as xlsx:
@@ -30,15 +51,15 @@ class ServicioLimpiarDatos:
                         if all(col in df_hoja.columns for col in self.COLUMNAS_REQUERIDAS):
                             lista_dfs.append(df_hoja[self.COLUMNAS_REQUERIDAS])
                         else:
-                            print(f"Advertencia: La hoja '{hoja}' no contiene las columnas esperadas ('Calificacion', 'Comentarios'). Se omitirá.")
+                            logger.warning("La hoja '%s' no contiene las columnas esperadas ('Calificacion', 'Comentarios'). Se omitirá.", hoja)
                     else:
-                        print(f"Advertencia: La hoja '{hoja}' no se encontró en el archivo. Se omitirá.")
+                        logger.warning("La hoja '%s' no se encontró en el archivo. Se omitirá.", hoja)
         except FileNotFoundError:
-            print(f"ERROR: No se encontró el archivo en la ruta: {ruta_archivo}")
+            logger.error("No se encontró el archivo en la ruta: %s", ruta_archivo)
             return pd.DataFrame()
 
         if not lista_dfs:
-            print("ERROR: No se pudo extraer ningún dato válido de las hojas especificadas.")
+            logger.error("No se pudo extraer ningún dato válido de las hojas especificadas.")
             return pd.DataFrame()
 
         df_completo = pd.concat(lista_dfs, ignore_index=True)
@@ -47,9 +68,14 @@ class ServicioLimpiarDatos:
 
     def _limpiar_calificaciones(self, df: pd.DataFrame) -> pd.DataFrame:
         """Limpia y formatea la columna de calificaciones."""
-        print("Limpiando columna 'calificacion'...")
+        logger.debug("Limpiando columna 'calificacion'...")
         calif_con_espacios = df['calificacion'].astype(str).str.contains(' ')
-        df.loc[calif_con_espacios, 'calificacion'] = df.loc[calif_con_espacios, 'calificacion'].astype(str).str.split().str[0]
+        if calif_con_espacios.any():
+            # Solo se conserva la primera palabra; la columna pasa a object para
+            # admitir texto aunque pandas la haya leído como numérica
+            primeras = df.loc[calif_con_espacios, 'calificacion'].astype(str).str.split().str[0]
+            df['calificacion'] = df['calificacion'].astype(object)
+            df.loc[calif_con_espacios, 'calificacion'] = primeras
         
         # Convertir a numérico, los errores se convierten en NaT (Not a Time) que luego se dropean
         df['calificacion'] = pd.to_numeric(df['calificacion'], errors='coerce')
@@ -74,11 +100,35 @@ class ServicioLimpiarDatos:
         
         return texto if texto else np.nan
 
+    def _limpiar_textos(self, serie: pd.Series) -> pd.Series:
+        """
+        Versión vectorizada de `_limpiar_texto_individual` para una columna completa.
+        Limpia una sola vez cada texto distinto y produce exactamente el mismo resultado.
+        """
+        codigos, unicos = pd.factorize(serie)
+        unicos = np.asarray(unicos, dtype=object)
+        limpios = np.full(len(unicos) + 1, np.nan, dtype=object)
+
+        es_texto = np.fromiter((isinstance(v, str) for v in unicos), dtype=bool, count=len(unicos))
+        if es_texto.any():
+            textos = pd.Series(unicos[es_texto], dtype=object)
+            textos = (
+                textos.str.lower()
+                .str.normalize('NFD')
+                .str.translate(_tabla_limpieza())
+                .str.replace(r'\s+', ' ', regex=True)
+                .str.strip()
+            )
+            limpios[:-1][es_texto] = textos.where(textos != '', np.nan).to_numpy()
+
+        # El código -1 (nulos) apunta a la última posición, que siempre es NaN
+        return pd.Series(limpios[codigos], index=serie.index, name=serie.name)
+
     def _filtrar_comentarios_irrelevantes(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Filtra comentarios que no aportan información.
         """
-        print("Filtrando comentarios irrelevantes...")
+        logger.debug("Filtrando comentarios irrelevantes...")
         
         # Patrones de comentarios que indican que no hay feedback real.
         patrones_irrelevantes = [
@@ -96,26 +146,31 @@ class ServicioLimpiarDatos:
         mascara_corta = df['comentarios'].str.len() < 5
         df_filtrado = df[~(mascara_irrelevante | mascara_corta)]
         
-        print(f"Se eliminaron {len(df) - len(df_filtrado)} comentarios irrelevantes o demasiado cortos.")
+        logger.debug("Se eliminaron %d comentarios irrelevantes o demasiado cortos.", len(df) - len(df_filtrado))
         return df_filtrado
 
     def procesar_archivo_excel(self, ruta_archivo: str):
         """
         ESTO EJECUTA TODO el proceso de limpieza: leer, unificar, limpiar y filtrar.
         """
-        df = self._leer_y_unificar_excel(ruta_archivo)
+        instrumentacion = Instrumentacion.compartida()
+        with instrumentacion.etapa('lectura_excel') as etapa:
+            df = self._leer_y_unificar_excel(ruta_archivo)
+            etapa.filas_salida = len(df)
         if df.empty:
             return df
 
-        df = self._limpiar_calificaciones(df)
-        
-        print("Limpiando columna 'comentarios'...")
-        df['comentarios'] = df['comentarios'].apply(self._limpiar_texto_individual)
-        df.dropna(subset=['comentarios'], inplace=True)
+        with instrumentacion.etapa('limpieza', filas_entrada=len(df)) as etapa:
+            df = self._limpiar_calificaciones(df)
 
-        df_final = self._filtrar_comentarios_irrelevantes(df)
-        
-        print(f"\nProceso de limpieza finalizado. Se obtuvieron {len(df_final)} comentarios válidos.")
+            logger.debug("Limpiando columna 'comentarios'...")
+            df['comentarios'] = self._limpiar_textos(df['comentarios'])
+            df.dropna(subset=['comentarios'], inplace=True)
+
+            df_final = self._filtrar_comentarios_irrelevantes(df)
+            etapa.filas_salida = len(df_final)
+
+        logger.info("Proceso de limpieza finalizado. Se obtuvieron %d comentarios válidos.", len(df_final))
         nombre = ruta_archivo.split('/')[-1].replace('.xlsx', '')
         
 
@@ -127,7 +182,7 @@ class ServicioLimpiarDatos:
         Procesa los datos ya cargados (desde memoria) que provienen de un Excel con múltiples hojas.
         Aplica limpieza de calificaciones y comentarios, y devuelve un DataFrame limpio.
         """
-        print("Procesando datos desde memoria...")
+        logger.info("Procesando datos desde memoria...")
         lista_dfs = []
 
         for hoja in self.HOJAS_REQUERIDAS:
@@ -136,32 +191,64 @@ class ServicioLimpiarDatos:
                 if all(col in df_hoja.columns for col in self.COLUMNAS_REQUERIDAS):
                     lista_dfs.append(df_hoja[self.COLUMNAS_REQUERIDAS])
                 else:
-                    print(f"La hoja '{hoja}' no contiene las columnas requeridas. Se omite.")
+                    logger.warning("La hoja '%s' no contiene las columnas requeridas. Se omite.", hoja)
             else:
-                print(f"La hoja '{hoja}' no está presente en los datos. Se omite.")
+                logger.warning("La hoja '%s' no está presente en los datos. Se omite.", hoja)
 
         if not lista_dfs:
-            print("No se encontró información válida en las hojas requeridas.")
+            logger.warning("No se encontró información válida en las hojas requeridas.")
             return pd.DataFrame()
 
         df = pd.concat(lista_dfs, ignore_index=True)
+        with Instrumentacion.compartida().etapa('limpieza', filas_entrada=len(df)) as etapa:
+            df_final = self._limpiar_bloque(df)
+            etapa.filas_salida = len(df_final)
+        logger.info("Proceso de limpieza terminado. Se conservaron %d comentarios.", len(df_final))
+        return df_final
+
+    def procesar_bloques(self, bloques: Iterable[pd.DataFrame]) -> pd.DataFrame:
+        """
+        Limpia los datos bloque por bloque (por ejemplo, los producidos por
+        `ServicioValidarArchivo.iterar_bloques`) y une solo las filas conservadas,
+        de modo que nunca se mantiene en memoria el contenido crudo completo.
+        Los bloques se leen a medida que se limpian, así que la etapa 'limpieza'
+        incluye el tiempo de lectura del archivo.
+        """
+        logger.info("Procesando datos por bloques...")
+        lista_dfs = []
+        with Instrumentacion.compartida().etapa('limpieza', filas_entrada=0) as etapa:
+            for bloque in bloques:
+                etapa.filas_entrada += len(bloque)
+                df_bloque = self._limpiar_bloque(bloque[self.COLUMNAS_REQUERIDAS].copy())
+                if not df_bloque.empty:
+                    lista_dfs.append(df_bloque)
+            etapa.filas_salida = sum(len(df_bloque) for df_bloque in lista_dfs)
+
+        if not lista_dfs:
+            logger.warning("No se encontró información válida en los bloques recibidos.")
+            return pd.DataFrame()
+
+        df_final = pd.concat(lista_dfs)
+        logger.info("Proceso de limpieza terminado. Se conservaron %d comentarios.", len(df_final))
+        return df_final
+
+    def _limpiar_bloque(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Renombra, limpia y filtra un DataFrame con las columnas requeridas."""
         df.rename(columns={'Calificacion': 'calificacion', 'Comentarios': 'comentarios'}, inplace=True)
 
         df = self._limpiar_calificaciones(df)
-        print("Limpiando columna 'comentarios'...")
-        df['comentarios'] = df['comentarios'].apply(self._limpiar_texto_individual)
+        logger.debug("Limpiando columna 'comentarios'...")
+        df['comentarios'] = self._limpiar_textos(df['comentarios'])
         df.dropna(subset=['comentarios'], inplace=True)
 
-        df_final = self._filtrar_comentarios_irrelevantes(df)
-        print(f"Proceso de limpieza terminado. Se conservaron {len(df_final)} comentarios.")
-        return df_final
+        return self._filtrar_comentarios_irrelevantes(df)
 
 
 if __name__ == "__main__":
-    
-    # --- Configuración ---
-    ARCHIVO_EXCEL_ENTRADA = 'c_Mayo_2025.xlsx' 
-    ARCHIVO_CSV_SALIDA = 'c_Mayo_2025.csv'
-    
-    # 1. Crear una instancia del servicio de limpieza
+    # Limpia los archivos indicados y guarda el CSV resultante de cada uno.
+    # Para el proceso completo (validar, limpiar, clasificar y guardar) usar `gssp-lotes`.
+    import sys
+
     limpiador = ServicioLimpiarDatos()
+    for ruta in sys.argv[1:]:
+        limpiador.procesar_archivo_excel(ruta)
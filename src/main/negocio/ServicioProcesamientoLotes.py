@@ -0,0 +1,280 @@
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from io import BytesIO
+from typing import Optional
+
+from negocio.ServicioValidarArchivo import ServicioValidarArchivo
+from negocio.ServicioLimpiarDatos import ServicioLimpiarDatos
+from negocio.ServicioAnalisisEvaluacion import ServicioAnalisisEvaluacion
+from negocio.ServicioAlmacenamiento import ServicioAlmacenamiento
+from negocio.MarcoAnalisis import MarcoAnalisis
+from datos.CachePredicciones import CachePredicciones
+
+logger = logging.getLogger(__name__)
+
+
+# Servicio usado por cada proceso del pool de archivos
+_procesador_trabajador = None
+
+
+def _inicializar_trabajador(configuracion: dict) -> None:
+    global _procesador_trabajador
+    _procesador_trabajador = ServicioProcesamientoLotes(**configuracion)
+
+
+def _procesar_en_trabajador(ruta_archivo: str, hash_archivo: str) -> dict:
+    return _procesador_trabajador.procesar_archivo(ruta_archivo, hash_archivo)
+
+
+class ServicioProcesamientoLotes:
+    """
+    Procesa lotes de archivos Excel sin interfaz: validar -> limpiar -> clasificar
+    -> guardar (CSV o Parquet y, opcionalmente, MySQL). Los archivos cuyo contenido ya fue
+    procesado se omiten gracias a un registro de hashes en el directorio de salida.
+    """
+    ETAPAS = ['validar', 'limpiar', 'clasificar', 'guardar']
+    NOMBRE_REGISTRO = '.procesados.json'
+
+    def __init__(self, ruta_modelo: str, directorio_salida: str = 'datos_analizados',
+                 guardar_mysql: bool = False, db_config: Optional[dict] = None,
+                 ruta_cache_predicciones: Optional[str] = None, formato_archivo: str = 'csv'):
+        """
+        Args:
+            ruta_modelo (str): Ruta del clasificador entrenado (.pkl).
+            directorio_salida (str): Carpeta de los CSV y del registro de procesados.
+            guardar_mysql (bool): Si es True, también guarda cada análisis en MySQL.
+            db_config (Optional[dict]): Configuración de MySQL.
+            ruta_cache_predicciones (Optional[str]): Archivo SQLite de la caché de predicciones.
+            formato_archivo (str): Formato de los análisis guardados: 'csv' o 'parquet'.
+        """
+        self.configuracion = {
+            'ruta_modelo': ruta_modelo,
+            'directorio_salida': directorio_salida,
+            'guardar_mysql': guardar_mysql,
+            'db_config': db_config,
+            'ruta_cache_predicciones': ruta_cache_predicciones,
+            'formato_archivo': formato_archivo,
+        }
+        self.directorio_salida = directorio_salida
+        self.guardar_mysql = guardar_mysql
+        self.ruta_registro = os.path.join(directorio_salida, self.NOMBRE_REGISTRO)
+        self._servicios = None
+
+    def _obtener_servicios(self) -> tuple:
+        """Crea los servicios (y carga el modelo) la primera vez que se necesitan."""
+        if self._servicios is None:
+            cache = (CachePredicciones(self.configuracion['ruta_cache_predicciones'])
+                     if self.configuracion['ruta_cache_predicciones'] else None)
+            almacenamiento = ServicioAlmacenamiento(
+                db_config=self.configuracion['db_config'] or {},
+                directorio_base_csv=self.directorio_salida,
+                formato_archivo=self.configuracion['formato_archivo']
+            )
+            sae = ServicioAnalisisEvaluacion(
+                self.configuracion['ruta_modelo'],
+                almacen=almacenamiento.almacen,
+                cache_predicciones=cache
+            )
+            self._servicios = (ServicioLimpiarDatos(), sae, almacenamiento)
+        return self._servicios
+
+    @staticmethod
+    def calcular_hash(ruta_archivo: str) -> str:
+        """SHA-256 del contenido de un archivo."""
+        digest = hashlib.sha256()
+        with open(ruta_archivo, 'rb') as archivo:
+            for bloque in iter(lambda: archivo.read(1024 * 1024), b''):
+                digest.update(bloque)
+        return digest.hexdigest()
+
+    def cargar_registro(self) -> dict:
+        """Devuelve {hash: información} de los archivos ya procesados."""
+        try:
+            with open(self.ruta_registro, encoding='utf-8') as archivo:
+                return json.load(archivo)
+        except (OSError, ValueError):
+            return {}
+
+    def _guardar_registro(self, registro: dict) -> None:
+        os.makedirs(self.directorio_salida, exist_ok=True)
+        ruta_temporal = f"{self.ruta_registro}.tmp"
+        with open(ruta_temporal, 'w', encoding='utf-8') as archivo:
+            json.dump(registro, archivo, ensure_ascii=False, indent=2)
+        os.replace(ruta_temporal, self.ruta_registro)
+
+    def procesar_archivo(self, ruta_archivo: str, hash_archivo: Optional[str] = None) -> dict:
+        """
+        Ejecuta todas las etapas para un archivo.
+
+        Returns:
+            dict: 'archivo', 'hash', 'exito', 'mensaje', 'filas_leidas',
+            'filas_clasificadas' y 'tiempos' ({etapa: segundos}).
+        """
+        sld, sae, almacenamiento = self._obtener_servicios()
+        nombre_archivo = os.path.basename(ruta_archivo)
+        nombre_base = os.path.splitext(nombre_archivo)[0]
+        resultado = {
+            'archivo': ruta_archivo,
+            'hash': hash_archivo or self.calcular_hash(ruta_archivo),
+            'exito': False,
+            'mensaje': '',
+            'filas_leidas': 0,
+            'filas_clasificadas': 0,
+            'tiempos': {},
+        }
+        tiempos = resultado['tiempos']
+
+        inicio = time.perf_counter()
+        with open(ruta_archivo, 'rb') as archivo:
+            contenido = BytesIO(archivo.read())
+        sva = ServicioValidarArchivo()
+        valido, mensaje = sva.leer_archivo(contenido, nombre_archivo)
+        tiempos['validar'] = time.perf_counter() - inicio
+        if not valido:
+            resultado['mensaje'] = mensaje
+            return resultado
+
+        inicio = time.perf_counter()
+        bloques_leidos = []
+
+        def contar_bloques():
+            for bloque in sva.iterar_bloques():
+                bloques_leidos.append(len(bloque))
+                yield bloque
+
+        df_limpio = sld.procesar_bloques(contar_bloques())
+        tiempos['limpiar'] = time.perf_counter() - inicio
+        resultado['filas_leidas'] = sum(bloques_leidos)
+        if df_limpio.empty:
+            resultado['mensaje'] = "El archivo no contiene datos útiles tras la limpieza."
+            return resultado
+
+        inicio = time.perf_counter()
+        df_clasificado = sae.realizar_analisis_sentimientos(df_limpio)
+        if 'Clasificacion' not in df_clasificado.columns:
+            resultado['mensaje'] = "No se pudo generar la clasificación. Revisa la carga del modelo."
+            return resultado
+        df_clasificado['Clasificacion'] = df_clasificado['Clasificacion'].map(sae.ETIQUETAS)
+        df_clasificado = MarcoAnalisis.construir(df_clasificado)
+        tiempos['clasificar'] = time.perf_counter() - inicio
+        resultado['filas_clasificadas'] = len(df_clasificado)
+
+        inicio = time.perf_counter()
+        # Un archivo corregido tiene otro hash y se reprocesa: la base de datos recibe
+        # solo la diferencia; el archivo se reescribe si alguna fila cambió
+        exito, mensajes = almacenamiento.guardar_analisis_csv(df_clasificado, nombre_base, modo='combinar')
+        mensajes = [mensajes]
+        if exito and self.guardar_mysql:
+            exito, msg_mysql = almacenamiento.guardar_analisis_mysql(
+                df_clasificado, f"analisis_{nombre_base}", modo='combinar'
+            )
+            mensajes.append(msg_mysql)
+        tiempos['guardar'] = time.perf_counter() - inicio
+
+        resultado['exito'] = exito
+        resultado['mensaje'] = ' '.join(mensajes)
+        return resultado
+
+    def procesar(self, rutas_archivos: list[str], n_procesos: int = 1, forzar: bool = False) -> list[dict]:
+        """
+        Procesa varios archivos, en paralelo si `n_procesos` > 1, y omite los que
+        ya figuran en el registro (salvo que `forzar` sea True).
+
+        Returns:
+            list[dict]: Un resultado por archivo (ver `procesar_archivo`); los omitidos
+            tienen 'omitido' = True. Un archivo cuyo procesamiento lanza una
+            excepción queda con 'exito' = False y el resto del lote continúa.
+        """
+        registro = self.cargar_registro()
+        resultados, pendientes = [], []
+        hashes_vistos = set()
+        for ruta in rutas_archivos:
+            try:
+                hash_archivo = self.calcular_hash(ruta)
+            except OSError as e:
+                resultados.append(self._registrar(registro, self._resultado_error(ruta, None, e)))
+                continue
+            if (not forzar and hash_archivo in registro) or hash_archivo in hashes_vistos:
+                logger.info("Se omite '%s': su contenido ya fue procesado.", ruta)
+                resultados.append({'archivo': ruta, 'hash': hash_archivo, 'exito': True,
+                                   'omitido': True, 'mensaje': 'Ya procesado.',
+                                   'filas_leidas': 0, 'filas_clasificadas': 0, 'tiempos': {}})
+                continue
+            hashes_vistos.add(hash_archivo)
+            pendientes.append((ruta, hash_archivo))
+
+        # Un archivo que falla queda como error en su resultado y el lote sigue
+        if n_procesos > 1 and len(pendientes) > 1:
+            with ProcessPoolExecutor(
+                max_workers=min(n_procesos, len(pendientes)),
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_inicializar_trabajador,
+                initargs=(self.configuracion,)
+            ) as ejecutor:
+                futuros = {ejecutor.submit(_procesar_en_trabajador, ruta, h): (ruta, h) for ruta, h in pendientes}
+                for futuro in as_completed(futuros):
+                    try:
+                        resultado = futuro.result()
+                    except Exception as e:
+                        resultado = self._resultado_error(*futuros[futuro], e)
+                    resultados.append(self._registrar(registro, resultado))
+        else:
+            for ruta, hash_archivo in pendientes:
+                try:
+                    resultado = self.procesar_archivo(ruta, hash_archivo)
+                except Exception as e:
+                    resultado = self._resultado_error(ruta, hash_archivo, e)
+                resultados.append(self._registrar(registro, resultado))
+
+        orden = {ruta: i for i, ruta in enumerate(rutas_archivos)}
+        return sorted(resultados, key=lambda r: orden[r['archivo']])
+
+    @staticmethod
+    def _resultado_error(ruta: str, hash_archivo: Optional[str], error: Exception) -> dict:
+        """Resultado fallido de un archivo cuyo procesamiento lanzó `error`."""
+        logger.error("Error inesperado al procesar '%s'.", ruta, exc_info=error)
+        return {'archivo': ruta, 'hash': hash_archivo, 'exito': False,
+                'mensaje': f"Error inesperado: {type(error).__name__}: {error}",
+                'filas_leidas': 0, 'filas_clasificadas': 0, 'tiempos': {}}
+
+    def _registrar(self, registro: dict, resultado: dict) -> dict:
+        estado = 'OK' if resultado['exito'] else 'ERROR'
+        nivel = logging.INFO if resultado['exito'] else logging.ERROR
+        logger.log(nivel, "[%s] %s: %s", estado, resultado['archivo'], resultado['mensaje'])
+        if resultado['exito']:
+            registro[resultado['hash']] = {
+                'archivo': resultado['archivo'],
+                'procesado': datetime.now().isoformat(timespec='seconds'),
+                'filas': resultado['filas_clasificadas'],
+            }
+            self._guardar_registro(registro)
+        return resultado
+
+    @classmethod
+    def resumen_tiempos(cls, resultados: list[dict]) -> str:
+        """Tabla de texto con los tiempos por etapa de cada archivo y los totales."""
+        encabezado = f"{'archivo':<32}" + ''.join(f"{e:>12}" for e in cls.ETAPAS) + f"{'filas':>10}"
+        lineas = [encabezado, '-' * len(encabezado)]
+        totales = dict.fromkeys(cls.ETAPAS, 0.0)
+        for r in resultados:
+            if r.get('omitido'):
+                lineas.append(f"{os.path.basename(r['archivo']):<32}{'(omitido)':>12}")
+                continue
+            celdas = ''
+            for etapa in cls.ETAPAS:
+                segundos = r['tiempos'].get(etapa)
+                totales[etapa] += segundos or 0.0
+                celdas += f"{segundos:>11.2f}s" if segundos is not None else f"{'-':>12}"
+            lineas.append(f"{os.path.basename(r['archivo']):<32}{celdas}{r['filas_clasificadas']:>10}")
+        lineas.append('-' * len(encabezado))
+        lineas.append(
+            f"{'total':<32}" + ''.join(f"{totales[e]:>11.2f}s" for e in cls.ETAPAS)
+            + f"{sum(r['filas_clasificadas'] for r in resultados):>10}"
+        )
+        return '\n'.join(lineas)
@@ -1,15 +1,27 @@
+import logging
 import pandas as pd
-from typing import Tuple, Optional, Union
+import openpyxl
+from typing import Tuple, Optional, Union, Iterator
 from io import BytesIO
+from negocio.Instrumentacion import Instrumentacion
+
+logger = logging.getLogger(__name__)
 
 class ServicioValidarArchivo:
     """
     Valida y carga archivos Excel directamente desde objetos en memoria.
+    Los archivos .xlsx se validan y se leen por bloques en modo de solo lectura,
+    sin cargar el libro completo en memoria.
     """
 
+    HOJAS_REQUERIDAS = ['ATC', 'Encuesta salida']
+    COLUMNAS_REQUERIDAS = ['Calificacion', 'Comentarios']
+    TAMANO_BLOQUE = 5000
+
     def __init__(self):
         self.extensiones_validas = ['.xlsx', '.xls']
         self._datos_archivo = None
+        self._archivo_stream = None
 
     def leer_archivo(self, file: BytesIO, nombre_archivo: str) -> Tuple[bool, Optional[str]]:
         """
@@ -28,20 +40,40 @@ class ServicioValidarArchivo:
         if f'.{extension}' not in self.extensiones_validas:
             return False, "Extensión inválida. Solo se permiten archivos .xlsx o .xls"
 
-        try:
-            datos = self._leer_datos_excel(file, extension)
-            if datos is None:
-                return False, "No se pudo leer el contenido del archivo Excel."
-
-            validado, mensaje = self._validar_estructura(datos)
-            if not validado:
-                return False, mensaje
-
-            self._datos_archivo = datos
-            return True, None
-
-        except Exception as e:
-            return False, f"Error inesperado al procesar el archivo: {str(e)}"
+        # En .xlsx solo se leen los encabezados: las filas se cuentan al limpiar
+        with Instrumentacion.compartida().etapa('validacion') as etapa:
+            try:
+                if extension == 'xlsx':
+                    encabezados = self._leer_encabezados_xlsx(file)
+                    if encabezados is None:
+                        return False, "No se pudo leer el contenido del archivo Excel."
+
+                    validado, mensaje = self._validar_estructura(encabezados)
+                    if not validado:
+                        return False, mensaje
+
+                    self._archivo_stream = file
+                    self._datos_archivo = None
+                    return True, None
+
+                datos = self._leer_datos_excel(file, extension)
+                if datos is None:
+                    return False, "No se pudo leer el contenido del archivo Excel."
+
+                validado, mensaje = self._validar_estructura(
+                    {hoja: list(df.columns) for hoja, df in datos.items()}
+                    if isinstance(datos, dict) else datos
+                )
+                if not validado:
+                    return False, mensaje
+
+                self._archivo_stream = None
+                self._datos_archivo = datos
+                etapa.filas_salida = sum(len(datos[hoja]) for hoja in self.HOJAS_REQUERIDAS)
+                return True, None
+
+            except Exception as e:
+                return False, f"Error inesperado al procesar el archivo: {str(e)}"
 
     def _leer_datos_excel(self, archivo_stream: BytesIO, extension: str) -> Optional[Union[pd.DataFrame, dict]]:
         try:
@@ -58,10 +90,81 @@ class ServicioValidarArchivo:
             return datos
 
         except Exception as e:
-            print(f"Error al leer el archivo Excel: {str(e)}")
+            logger.error("Error al leer el archivo Excel: %s", e)
+            return None
+
+    def _leer_encabezados_xlsx(self, archivo_stream: BytesIO) -> Optional[dict]:
+        """
+        Lee únicamente la primera fila de cada hoja de un .xlsx en modo de solo lectura.
+
+        Returns:
+            Optional[dict]: {nombre_hoja: [encabezados]} o None si no se pudo leer.
+        """
+        try:
+            archivo_stream.seek(0)
+            libro = openpyxl.load_workbook(archivo_stream, read_only=True, data_only=True)
+            try:
+                encabezados = {}
+                for hoja in libro.worksheets:
+                    primera_fila = next(hoja.iter_rows(min_row=1, max_row=1, values_only=True), ())
+                    encabezados[hoja.title] = [c for c in primera_fila if c is not None]
+                return encabezados
+            finally:
+                libro.close()
+
+        except Exception as e:
+            logger.error("Error al leer el archivo Excel: %s", e)
             return None
 
-    def _validar_estructura(self, datos: Union[pd.DataFrame, dict]) -> Tuple[bool, Optional[str]]:
+    def _iterar_filas_xlsx(self, libro, nombre_hoja: str) -> Iterator[tuple]:
+        """
+        Recorre una hoja fila por fila y produce solo los valores de las columnas
+        requeridas, omitiendo las filas vacías.
+        """
+        filas = libro[nombre_hoja].iter_rows(values_only=True)
+        encabezado = list(next(filas, ()))
+        indices = [encabezado.index(col) for col in self.COLUMNAS_REQUERIDAS]
+
+        for fila in filas:
+            valores = tuple(fila[i] if i < len(fila) else None for i in indices)
+            if any(v is not None for v in valores):
+                yield valores
+
+    def _iterar_bloques_xlsx(self, archivo_stream: BytesIO, tamano_bloque: int) -> Iterator[pd.DataFrame]:
+        """
+        Produce bloques de a lo sumo `tamano_bloque` filas de las hojas requeridas.
+        """
+        archivo_stream.seek(0)
+        libro = openpyxl.load_workbook(archivo_stream, read_only=True, data_only=True)
+        desplazamiento = 0
+        try:
+            for nombre_hoja in self.HOJAS_REQUERIDAS:
+                bloque = []
+                for valores in self._iterar_filas_xlsx(libro, nombre_hoja):
+                    bloque.append(valores)
+                    if len(bloque) >= tamano_bloque:
+                        yield self._crear_bloque(bloque, desplazamiento)
+                        desplazamiento += len(bloque)
+                        bloque = []
+
+                if bloque:
+                    yield self._crear_bloque(bloque, desplazamiento)
+                    desplazamiento += len(bloque)
+        finally:
+            libro.close()
+
+    def _crear_bloque(self, filas: list, desplazamiento: int) -> pd.DataFrame:
+        return pd.DataFrame(
+            filas,
+            columns=self.COLUMNAS_REQUERIDAS,
+            index=pd.RangeIndex(desplazamiento, desplazamiento + len(filas))
+        )
+
+    def _validar_estructura(self, datos: dict) -> Tuple[bool, Optional[str]]:
+        """
+        Valida las hojas y encabezados. `datos` es un diccionario
+        {nombre_hoja: [encabezados]}.
+        """
         if not isinstance(datos, dict):
             return False, "El archivo Excel debe contener exactamente dos hojas."
 
@@ -78,12 +181,57 @@ class ServicioValidarArchivo:
 
         columnas_requeridas = ['Calificacion', 'Comentarios']
 
-        for hoja, df in datos.items():
+        for hoja, columnas in datos.items():
             for col in columnas_requeridas:
-                if col not in df.columns:
+                if col not in columnas:
                     return False, f"La hoja '{hoja}' debe contener la columna '{col}'."
 
         return True, None
 
+    def iterar_bloques(self, tamano_bloque: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """
+        Produce el contenido del último archivo validado como bloques de filas con
+        las columnas 'Calificacion' y 'Comentarios' (hoja 'ATC' primero). El índice
+        de cada bloque continúa la numeración del anterior.
+
+        Args:
+            tamano_bloque (Optional[int]): Filas máximas por bloque.
+        """
+        tamano_bloque = tamano_bloque or self.TAMANO_BLOQUE
+
+        if self._archivo_stream is not None:
+            yield from self._iterar_bloques_xlsx(self._archivo_stream, tamano_bloque)
+            return
+
+        if not isinstance(self._datos_archivo, dict):
+            return
+
+        desplazamiento = 0
+        for nombre_hoja in self.HOJAS_REQUERIDAS:
+            df_hoja = self._datos_archivo[nombre_hoja][self.COLUMNAS_REQUERIDAS]
+            for inicio in range(0, len(df_hoja), tamano_bloque):
+                bloque = df_hoja.iloc[inicio:inicio + tamano_bloque]
+                yield bloque.set_axis(
+                    pd.RangeIndex(desplazamiento, desplazamiento + len(bloque))
+                )
+                desplazamiento += len(bloque)
+
     def obtener_datos_archivo(self) -> Optional[Union[pd.DataFrame, dict]]:
+        """
+        Devuelve los datos como {nombre_hoja: DataFrame}. Para archivos .xlsx solo
+        se materializan las columnas requeridas; preferir `iterar_bloques`.
+        """
+        if self._datos_archivo is None and self._archivo_stream is not None:
+            self._archivo_stream.seek(0)
+            libro = openpyxl.load_workbook(self._archivo_stream, read_only=True, data_only=True)
+            try:
+                return {
+                    nombre_hoja: pd.DataFrame(
+                        list(self._iterar_filas_xlsx(libro, nombre_hoja)),
+                        columns=self.COLUMNAS_REQUERIDAS
+                    )
+                    for nombre_hoja in self.HOJAS_REQUERIDAS
+                }
+            finally:
+                libro.close()
         return self._datos_archivo
@@ -1,10 +1,21 @@
+import logging
 import pandas as pd
 from negocio.ServicioValidarArchivo import ServicioValidarArchivo as SVA
 from negocio.ServicioLimpiarDatos import ServicioLimpiarDatos as SLD
 from negocio.ServicioAnalisisEvaluacion import ServicioAnalisisEvaluacion as SAE
+from datos.ConfiguracionBD import cargar_configuracion_bd
+from datos.AlmacenAnalisis import crear_almacen
+from datos.CachePredicciones import CachePredicciones
+from negocio.CacheResultados import CacheResultados
+from negocio.MarcoAnalisis import MarcoAnalisis
+from negocio.DatasetsCompartidos import DatasetsCompartidos
+from negocio.ServicioGuardadoSegundoPlano import ServicioGuardadoSegundoPlano
+import hashlib
 import os
 import streamlit as st
 
+logger = logging.getLogger(__name__)
+
 
 @st.cache_resource
 def get_services():
@@ -19,14 +30,94 @@ def get_services():
     main_dir = os.path.join(current_dir, '..', '..')
     ruta_modelo = os.path.join(main_dir, 'clasificador_sentimiento_final.pkl')
 
-    sae = SAE(ruta_modelo)
+    # Almacén compartido por todas las sesiones: pool de MySQL o, con
+    # GSSP_ALMACEN=sqlite, un archivo SQLite local
+    almacen = crear_almacen(cargar_configuracion_bd())
+
+    # Caché persistente de predicciones (comentario, calificación, versión del modelo)
+    cache_predicciones = CachePredicciones(
+        os.environ.get('GSSP_CACHE_PREDICCIONES', os.path.join('cache', 'predicciones.sqlite'))
+    )
+
+    sae = SAE(ruta_modelo, almacen=almacen, cache_predicciones=cache_predicciones)
 
     return sld, sae
 
 
+@st.cache_resource
+def get_guardado_segundo_plano():
+    """
+    Cola de guardados en segundo plano compartida por todas las sesiones; cada
+    sesión guarda en `st.session_state` los ids de sus propios trabajos.
+    """
+    _, sae = get_services()
+    return ServicioGuardadoSegundoPlano(sae.servicio_almacenamiento)
+
+
+@st.cache_resource
+def get_cache_resultados():
+    """
+    Caché de resultados de `process_uploaded_file` compartida por todas las sesiones.
+    El nivel en disco se activa con la variable de entorno GSSP_CACHE_RESULTADOS.
+    """
+    return CacheResultados(
+        max_entradas=16,
+        max_bytes=512 * 1024 * 1024,
+        directorio=os.environ.get('GSSP_CACHE_RESULTADOS') or None
+    )
+
+
+@st.cache_resource
+def get_datasets_compartidos():
+    """
+    Conjuntos de datos clasificados compartidos por todas las sesiones (una
+    copia compacta por archivo); cada sesión recibe vistas de solo lectura.
+    """
+    return DatasetsCompartidos(max_entradas=16, max_bytes=1024 * 1024 * 1024)
+
+
+def _clave_archivo(archivo, sae: SAE) -> str:
+    """SHA-256 del contenido subido más la versión del modelo."""
+    if hasattr(archivo, 'getvalue'):
+        contenido = archivo.getvalue()
+    else:
+        archivo.seek(0)
+        contenido = archivo.read()
+    digest = hashlib.sha256(contenido)
+    digest.update(str(getattr(sae, 'version_modelo', '')).encode('utf-8'))
+    return digest.hexdigest()
+
+
 def process_uploaded_file(archivo, sld: SLD, sae: SAE):
+    """
+    Valida, limpia y clasifica el archivo subido. El resultado se memoiza por el
+    contenido del archivo y la versión del modelo, así que las recargas de la
+    página provocadas por los widgets no vuelven a procesarlo.
+    """
     extension = archivo.name.split('.')[-1].lower()
+    if extension not in ['csv', 'xls', 'xlsx']:
+        return None, "Extensión de archivo no soportada.", False
 
+    cache = get_cache_resultados()
+    clave = _clave_archivo(archivo, sae)
+    resultado = cache.obtener(clave)
+    if resultado is None:
+        resultado = _procesar_archivo(archivo, extension, sld, sae)
+        if resultado[2]:
+            cache.guardar(clave, resultado)
+
+    datos, mensaje, valido = resultado
+    if datos is not None and MarcoAnalisis.es_marco(datos):
+        # Vista de solo lectura del marco compartido: las sesiones que suben el
+        # mismo archivo usan una sola copia y no pueden alterarla
+        datos = get_datasets_compartidos().vista(clave, lambda: datos)
+    elif datos is not None:
+        datos = datos.copy(deep=False)
+        datos.attrs['clave_dataset'] = clave
+    return datos, mensaje, valido
+
+
+def _procesar_archivo(archivo, extension: str, sld: SLD, sae: SAE):
     df_limpio = pd.DataFrame()
     mensaje_exito = ""
 
@@ -42,9 +133,7 @@ def process_uploaded_file(archivo, sld: SLD, sae: SAE):
                                'Comentarios': 'comentarios'}, inplace=True)
 
         df_con_calif = sld._limpiar_calificaciones(df_raw)
-        df_con_calif['comentarios'] = df_con_calif['comentarios'].apply(
-            sld._limpiar_texto_individual
-        )
+        df_con_calif['comentarios'] = sld._limpiar_textos(df_con_calif['comentarios'])
         df_con_calif.dropna(subset=['comentarios'], inplace=True)
         df_limpio = sld._filtrar_comentarios_irrelevantes(df_con_calif)
         mensaje_exito = "Archivo CSV limpiado y clasificado correctamente."
@@ -57,43 +146,44 @@ def process_uploaded_file(archivo, sld: SLD, sae: SAE):
         if not valido:
             return None, mensaje, False
 
-        datos = sva.obtener_datos_archivo()
-        if datos is None:
-            return None, "No se pudieron obtener datos del archivo.", False
-
-        df_limpio = sld.procesar_datos_en_memoria(datos)
+        df_limpio = sld.procesar_bloques(sva.iterar_bloques())
         mensaje_exito = "Archivo Excel validado, limpiado y clasificado correctamente."
 
-    else:
-        return None, "Extensión de archivo no soportada.", False
-
     if df_limpio.empty:
         return (df_limpio, "El archivo fue válido, pero no contiene datos "
                            "útiles tras limpieza.", True)
 
     try:
-        df_clasificado = sae.realizar_analisis_sentimientos(df_limpio)
+        barra_progreso = st.progress(0.0, text="Clasificando comentarios...")
+
+        def actualizar_progreso(procesadas: int, total: int):
+            barra_progreso.progress(
+                procesadas / total,
+                text=f"Clasificando comentarios... {procesadas}/{total}"
+            )
+
+        df_clasificado = sae.realizar_analisis_sentimientos(
+            df_limpio, progreso=actualizar_progreso
+        )
+        barra_progreso.empty()
+
+        estadisticas_cache = sae.estadisticas_cache_predicciones()
+        if estadisticas_cache:
+            consultas = estadisticas_cache['aciertos'] + estadisticas_cache['fallos']
+            st.sidebar.caption(
+                f"Caché de predicciones: {estadisticas_cache['tasa_aciertos']:.0%} de aciertos "
+                f"({estadisticas_cache['aciertos']}/{consultas} consultas)"
+            )
 
         if 'Clasificacion' not in df_clasificado.columns:
             return None, ("No se pudo generar la clasificación. "
                           "Revisa la carga del modelo."), False
 
-        etiquetas = {
-            -1: "Detractor",
-            0: "Neutro",
-            1: "Promotor"
-        }
-        df_clasificado['Clasificacion'] = df_clasificado['Clasificacion'].map(etiquetas)
-
-        if 'comentarios' in df_clasificado.columns:
-            df_clasificado['longitud'] = df_clasificado['comentarios'].str.len()
-        else:
-            df_clasificado['longitud'] = 0
+        df_clasificado['Clasificacion'] = df_clasificado['Clasificacion'].map(SAE.ETIQUETAS)
 
-        return df_clasificado, mensaje_exito, True
+        # Longitudes y tipos se calculan aquí una sola vez; las vistas no los recalculan
+        return MarcoAnalisis.construir(df_clasificado), mensaje_exito, True
 
     except Exception as e:
-        print(f"Error durante el análisis de sentimientos: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error durante el análisis de sentimientos: %s", e)
         return None, f"Error al realizar el análisis: {str(e)}", False
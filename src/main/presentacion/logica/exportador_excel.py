@@ -1,63 +1,122 @@
-import pandas as pd
 import io
 
-def generar_excel(df, resumen, distribucion):
+import pandas as pd
+import xlsxwriter
+
+from negocio.CacheLRU import CacheLRU
+from negocio.Instrumentacion import Instrumentacion
+from negocio.ResumenAnalisis import ResumenAnalisis
+
+FILAS_POR_BLOQUE = 10000
+
+# Reportes ya generados por conjunto de datos: volver a descargar no los regenera
+_cache = CacheLRU(max_entradas=8, max_bytes=256 * 1024 * 1024, ttl_segundos=1800)
+
+
+def _escribir_filas(hoja, df: pd.DataFrame, fila_inicial: int = 1) -> None:
+    """
+    Escribe `df` fila por fila con `write_row`. Se convierte por bloques a
+    objetos de Python (NaN -> celda vacía) para no duplicar en memoria todo el
+    DataFrame.
+    """
+    for inicio in range(0, len(df), FILAS_POR_BLOQUE):
+        bloque = df.iloc[inicio:inicio + FILAS_POR_BLOQUE].astype(object)
+        valores = bloque.where(bloque.notna(), None).to_numpy().tolist()
+        for desplazamiento, fila in enumerate(valores):
+            hoja.write_row(fila_inicial + inicio + desplazamiento, 0, fila)
+
+
+def generar_excel(df, resumen):
+    """
+    Genera el reporte Excel con los datos y las gráficas de resumen, medido
+    como la etapa 'exportar_excel' (ver Instrumentacion).
+    """
+    with Instrumentacion.compartida().etapa('exportar_excel', filas_entrada=len(df)) as etapa:
+        contenido = _generar_libro(df, resumen)
+        etapa.filas_salida = len(df)
+    return contenido
+
+
+def _generar_libro(df, resumen) -> bytes:
+    """
+    Escribe el libro de `generar_excel`.
+
+    El libro se escribe en modo `constant_memory` de xlsxwriter: cada fila se
+    vuelca al archivo en cuanto se escribe, así que la memoria no crece con el
+    número de comentarios.
+
+    Args:
+        df (pd.DataFrame): Datos clasificados.
+        resumen (ResumenAnalisis): Agregados precalculados de `df`.
+    """
     output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        #Escribir hojas
-        df.to_excel(writer, index=False, sheet_name='Datos')
-        resumen.to_excel(writer, index=False, sheet_name='Resumen')
-
-        workbook = writer.book
-        ws_datos = writer.sheets['Datos']
-        ws_resumen = writer.sheets['Resumen']
-
-        #Formato de encabezado
-        header_format = workbook.add_format({
-            'bold': True,
-            'bg_color': "#D5F549",
-            'font_color': 'black',
-            'align': 'center'
-        })
-        for col_num, value in enumerate(df.columns.values):
-            ws_datos.write(0, col_num, value, header_format)
-
-        #Gráfica 1: Anillo
-        chart_ring = workbook.add_chart({'type': 'doughnut'})
-        chart_ring.add_series({
-            'name': 'Distribución de comentarios',
-            'categories': ['Resumen', 1, 0, len(resumen), 0],
-            'values': ['Resumen', 1, 3, len(resumen), 3],
-            'data_labels': {'percentage': True}
-        })
-        chart_ring.set_title({'name': 'Distribución de comentarios (%)'})
-        ws_resumen.insert_chart('E2', chart_ring)
-
-        #Gráfica 2: Barras
-        chart_bar = workbook.add_chart({'type': 'column'})
-        chart_bar.add_series({
-            'name': 'Número de comentarios',
-            'categories': ['Resumen', 1, 0, len(resumen), 0],
-            'values': ['Resumen', 1, 1, len(resumen), 1],
-            'data_labels': {'value': True}
-        })
-        chart_bar.set_title({'name': 'Comentarios por categoría'})
-        chart_bar.set_x_axis({'name': 'Clasificación'})
-        chart_bar.set_y_axis({'name': 'Número de comentarios'})
-        ws_resumen.insert_chart('E20', chart_bar)
-
-        #Gráfica 3: Quiénes opinan más
-        chart_bar2 = workbook.add_chart({'type': 'column'})
-        chart_bar2.add_series({
-            'name': 'Longitud promedio de comentarios',
-            'categories': ['Resumen', 1, 0, len(resumen), 0],
-            'values': ['Resumen', 1, 2, len(resumen), 2],
-            'data_labels': {'value': True}
-        })
-        chart_bar2.set_title({'name': '¿Quiénes opinan más? (longitud promedio)'})
-        chart_bar2.set_x_axis({'name': 'Clasificación'})
-        chart_bar2.set_y_axis({'name': 'Longitud promedio'})
-        ws_resumen.insert_chart('E38', chart_bar2)
-
-    output.seek(0)
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+    ws_datos = workbook.add_worksheet('Datos')
+    ws_resumen = workbook.add_worksheet('Resumen')
+
+    #Formato de encabezado
+    header_format = workbook.add_format({
+        'bold': True,
+        'bg_color': "#D5F549",
+        'font_color': 'black',
+        'align': 'center'
+    })
+    # En constant_memory las filas deben escribirse en orden, encabezado primero
+    ws_datos.write_row(0, 0, [str(c) for c in df.columns], header_format)
+    _escribir_filas(ws_datos, df)
+
+    por_clase = resumen.por_clase
+    ws_resumen.write_row(0, 0, [str(c) for c in por_clase.columns])
+    _escribir_filas(ws_resumen, por_clase)
+    n = len(por_clase)
+
+    #Gráfica 1: Anillo
+    chart_ring = workbook.add_chart({'type': 'doughnut'})
+    chart_ring.add_series({
+        'name': 'Distribución de comentarios',
+        'categories': ['Resumen', 1, 0, n, 0],
+        'values': ['Resumen', 1, 3, n, 3],
+        'data_labels': {'percentage': True}
+    })
+    chart_ring.set_title({'name': 'Distribución de comentarios (%)'})
+    ws_resumen.insert_chart('E2', chart_ring)
+
+    #Gráfica 2: Barras
+    chart_bar = workbook.add_chart({'type': 'column'})
+    chart_bar.add_series({
+        'name': 'Número de comentarios',
+        'categories': ['Resumen', 1, 0, n, 0],
+        'values': ['Resumen', 1, 1, n, 1],
+        'data_labels': {'value': True}
+    })
+    chart_bar.set_title({'name': 'Comentarios por categoría'})
+    chart_bar.set_x_axis({'name': 'Clasificación'})
+    chart_bar.set_y_axis({'name': 'Número de comentarios'})
+    ws_resumen.insert_chart('E20', chart_bar)
+
+    #Gráfica 3: Quiénes opinan más
+    chart_bar2 = workbook.add_chart({'type': 'column'})
+    chart_bar2.add_series({
+        'name': 'Longitud promedio de comentarios',
+        'categories': ['Resumen', 1, 0, n, 0],
+        'values': ['Resumen', 1, 2, n, 2],
+        'data_labels': {'value': True}
+    })
+    chart_bar2.set_title({'name': '¿Quiénes opinan más? (longitud promedio)'})
+    chart_bar2.set_x_axis({'name': 'Clasificación'})
+    chart_bar2.set_y_axis({'name': 'Longitud promedio'})
+    ws_resumen.insert_chart('E38', chart_bar2)
+
+    workbook.close()
     return output.getvalue()
+
+
+def obtener_excel(df) -> bytes:
+    """
+    Devuelve el reporte Excel de `df`, generándolo solo la primera vez que se
+    pide para ese conjunto de datos (ver `ResumenAnalisis.clave_dataset`).
+    """
+    return _cache.obtener_o_calcular(
+        ResumenAnalisis.clave_dataset(df),
+        lambda: generar_excel(df, ResumenAnalisis.obtener(df))
+    )
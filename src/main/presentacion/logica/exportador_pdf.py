@@ -0,0 +1,252 @@
+import math
+import time
+import zlib
+
+import pandas as pd
+
+from negocio.CacheLRU import CacheLRU
+from negocio.ResumenAnalisis import ResumenAnalisis
+
+ANCHO_PAGINA, ALTO_PAGINA = 595, 842  # A4 en puntos
+MARGEN = 50
+COLORES_CLASE = {
+    'Detractor': (0.86, 0.27, 0.22),
+    'Neutro': (0.95, 0.69, 0.20),
+    'Promotor': (0.36, 0.66, 0.27),
+}
+COLOR_OTRA_CLASE = (0.45, 0.45, 0.45)
+COLOR_ENCABEZADO = (0.835, 0.961, 0.286)  # '#D5F549', el mismo del reporte Excel
+COMENTARIOS_POR_CLASE = 5
+MAX_CARACTERES_COMENTARIO = 95
+
+# Reportes ya generados por conjunto de datos: volver a descargar no los regenera
+_cache = CacheLRU(max_entradas=16, max_bytes=64 * 1024 * 1024, ttl_segundos=1800)
+
+
+class DocumentoPDF:
+    """
+    Escritor mínimo de PDF en memoria: texto con las fuentes estándar Helvetica
+    (sin incrustar) y figuras vectoriales, con coordenadas desde la esquina
+    superior izquierda de la página.
+    """
+
+    def __init__(self):
+        self.paginas = []
+        self.nueva_pagina()
+
+    def nueva_pagina(self) -> None:
+        self.paginas.append([])
+
+    @property
+    def _actual(self) -> list:
+        return self.paginas[-1]
+
+    @staticmethod
+    def _cadena(texto: str) -> str:
+        # WinAnsiEncoding cubre los acentos del español; lo demás se sustituye
+        crudo = str(texto).encode('cp1252', errors='replace').decode('latin-1')
+        return crudo.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+    @staticmethod
+    def ancho_texto(texto: str, tamano: float) -> float:
+        """Ancho aproximado del texto (promedio de Helvetica)."""
+        return len(str(texto)) * tamano * 0.5
+
+    def texto(self, x: float, y: float, texto: str, tamano: float = 10, negrita: bool = False,
+              color: tuple = (0, 0, 0), alinear_derecha: bool = False) -> None:
+        if alinear_derecha:
+            x -= self.ancho_texto(texto, tamano)
+        fuente = '/F2' if negrita else '/F1'
+        self._actual.append(
+            f"{color[0]:.3f} {color[1]:.3f} {color[2]:.3f} rg BT {fuente} {tamano} Tf "
+            f"{x:.2f} {ALTO_PAGINA - y:.2f} Td ({self._cadena(texto)}) Tj ET"
+        )
+
+    def rectangulo(self, x: float, y: float, ancho: float, alto: float, color: tuple) -> None:
+        self._actual.append(
+            f"{color[0]:.3f} {color[1]:.3f} {color[2]:.3f} rg "
+            f"{x:.2f} {ALTO_PAGINA - y - alto:.2f} {ancho:.2f} {alto:.2f} re f"
+        )
+
+    def linea(self, x1: float, y1: float, x2: float, y2: float, grosor: float = 0.5,
+              color: tuple = (0.6, 0.6, 0.6)) -> None:
+        self._actual.append(
+            f"{color[0]:.3f} {color[1]:.3f} {color[2]:.3f} RG {grosor} w "
+            f"{x1:.2f} {ALTO_PAGINA - y1:.2f} m {x2:.2f} {ALTO_PAGINA - y2:.2f} l S"
+        )
+
+    def poligono(self, puntos: list[tuple[float, float]], color: tuple) -> None:
+        trazos = [f"{x:.2f} {ALTO_PAGINA - y:.2f} {'m' if i == 0 else 'l'}" for i, (x, y) in enumerate(puntos)]
+        self._actual.append(f"{color[0]:.3f} {color[1]:.3f} {color[2]:.3f} rg {' '.join(trazos)} h f")
+
+    def a_bytes(self) -> bytes:
+        """Serializa el documento (contenidos comprimidos con Flate)."""
+        objetos = [
+            b"<< /Type /Catalog /Pages 2 0 R >>",
+            None,  # Páginas, se completa al conocer los ids
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+        ]
+        ids_paginas = []
+        for operaciones in self.paginas:
+            contenido = zlib.compress('\n'.join(operaciones).encode('latin-1'))
+            objetos.append(
+                f"<< /Length {len(contenido)} /Filter /FlateDecode >>\nstream\n".encode('latin-1')
+                + contenido + b"\nendstream"
+            )
+            objetos.append(
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {ANCHO_PAGINA} {ALTO_PAGINA}] "
+                f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> "
+                f"/Contents {len(objetos)} 0 R >>".encode('latin-1')
+            )
+            ids_paginas.append(len(objetos))
+        objetos[1] = (
+            f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in ids_paginas)}] "
+            f"/Count {len(ids_paginas)} >>".encode('latin-1')
+        )
+
+        salida = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        posiciones = []
+        for numero, objeto in enumerate(objetos, start=1):
+            posiciones.append(len(salida))
+            salida += f"{numero} 0 obj\n".encode('latin-1') + objeto + b"\nendobj\n"
+        inicio_xref = len(salida)
+        salida += f"xref\n0 {len(objetos) + 1}\n0000000000 65535 f \n".encode('latin-1')
+        salida += b"".join(f"{p:010d} 00000 n \n".encode('latin-1') for p in posiciones)
+        salida += (f"trailer\n<< /Size {len(objetos) + 1} /Root 1 0 R >>\n"
+                   f"startxref\n{inicio_xref}\n%%EOF\n").encode('latin-1')
+        return bytes(salida)
+
+
+def _color(clase: str) -> tuple:
+    return COLORES_CLASE.get(clase, COLOR_OTRA_CLASE)
+
+
+def _tabla_resumen(pdf: DocumentoPDF, por_clase: pd.DataFrame, y: float) -> float:
+    columnas = [('Clasificación', MARGEN + 6, False), ('Comentarios', 300, True),
+                ('Longitud promedio', 420, True), ('Porcentaje', ANCHO_PAGINA - MARGEN - 6, True)]
+    pdf.rectangulo(MARGEN, y, ANCHO_PAGINA - 2 * MARGEN, 18, COLOR_ENCABEZADO)
+    for titulo, x, derecha in columnas:
+        pdf.texto(x, y + 13, titulo, 10, negrita=True, alinear_derecha=derecha)
+    y += 18
+    for fila in por_clase.itertuples(index=False):
+        valores = [fila.Clasificacion, f"{fila.NumComentarios:,}",
+                   f"{fila.LongitudPromedio:.1f}", f"{fila.Porcentaje:.1f} %"]
+        for (_, x, derecha), valor in zip(columnas, valores):
+            pdf.texto(x, y + 13, valor, 10, alinear_derecha=derecha)
+        pdf.linea(MARGEN, y + 18, ANCHO_PAGINA - MARGEN, y + 18)
+        y += 18
+    return y
+
+
+def _grafica_barras(pdf: DocumentoPDF, titulo: str, etiquetas: list, valores: list,
+                    x: float, y: float, ancho: float, alto: float, formato: str = "{:,.0f}") -> None:
+    pdf.texto(x, y, titulo, 11, negrita=True)
+    base = y + alto
+    pdf.linea(x, base, x + ancho, base, grosor=0.8, color=(0.2, 0.2, 0.2))
+    if not valores:
+        return
+    maximo = max(max(valores), 1e-9)
+    paso = ancho / len(valores)
+    for i, (etiqueta, valor) in enumerate(zip(etiquetas, valores)):
+        barra = (alto - 40) * valor / maximo
+        izquierda = x + i * paso + paso * 0.2
+        pdf.rectangulo(izquierda, base - barra, paso * 0.6, barra, _color(etiqueta))
+        pdf.texto(izquierda, base - barra - 4, formato.format(valor), 9)
+        pdf.texto(izquierda, base + 13, etiqueta, 9)
+
+
+def _grafica_anillo(pdf: DocumentoPDF, titulo: str, etiquetas: list, porcentajes: list,
+                    x: float, y: float, radio: float) -> None:
+    pdf.texto(x, y, titulo, 11, negrita=True)
+    cx, cy = x + radio, y + 20 + radio
+    angulo = 90.0
+    for etiqueta, porcentaje in zip(etiquetas, porcentajes):
+        barrido = 360.0 * porcentaje / 100
+        pasos = max(2, int(barrido / 3))
+        puntos = [(cx, cy)] + [
+            (cx + radio * math.cos(math.radians(angulo - barrido * k / pasos)),
+             cy - radio * math.sin(math.radians(angulo - barrido * k / pasos)))
+            for k in range(pasos + 1)
+        ]
+        pdf.poligono(puntos, _color(etiqueta))
+        angulo -= barrido
+    hueco = radio * 0.45
+    pdf.poligono([(cx + hueco * math.cos(math.radians(a)), cy + hueco * math.sin(math.radians(a)))
+                  for a in range(0, 360, 5)], (1, 1, 1))
+    # Leyenda a la derecha del anillo
+    for i, (etiqueta, porcentaje) in enumerate(zip(etiquetas, porcentajes)):
+        ly = y + 40 + i * 18
+        pdf.rectangulo(cx + radio + 30, ly - 9, 10, 10, _color(etiqueta))
+        pdf.texto(cx + radio + 46, ly, f"{etiqueta}: {porcentaje:.1f} %", 10)
+
+
+def _comentarios_destacados(pdf: DocumentoPDF, df: pd.DataFrame, resumen: ResumenAnalisis,
+                            y: float) -> None:
+    pdf.texto(MARGEN, y, "Comentarios más largos por categoría", 14, negrita=True)
+    y += 24
+    for clase in resumen.clases:
+        posiciones = resumen.indices_ordenados.get(clase, [])[:COMENTARIOS_POR_CLASE]
+        if y > ALTO_PAGINA - MARGEN - 40:
+            pdf.nueva_pagina()
+            y = MARGEN
+        pdf.rectangulo(MARGEN, y - 10, 10, 10, _color(clase))
+        pdf.texto(MARGEN + 16, y, clase, 11, negrita=True)
+        y += 16
+        for comentario, calificacion in df.iloc[posiciones][['comentarios', 'calificacion']].itertuples(index=False):
+            if y > ALTO_PAGINA - MARGEN:
+                pdf.nueva_pagina()
+                y = MARGEN
+            texto = ' '.join(str(comentario).split())
+            if len(texto) > MAX_CARACTERES_COMENTARIO:
+                texto = texto[:MAX_CARACTERES_COMENTARIO - 3] + '...'
+            pdf.texto(MARGEN + 16, y, '-' if pd.isna(calificacion) else f"{calificacion:g}", 9, negrita=True)
+            pdf.texto(MARGEN + 34, y, texto, 9)
+            y += 13
+        y += 10
+
+
+def generar_pdf(df: pd.DataFrame, resumen: ResumenAnalisis, titulo: str = "Reporte de comentarios") -> bytes:
+    """
+    Genera el reporte PDF en memoria: tabla de resumen por clase, las gráficas
+    del reporte Excel (distribución, comentarios y longitud promedio por clase)
+    y los comentarios más largos de cada clase. No requiere wkhtmltopdf.
+
+    Args:
+        df (pd.DataFrame): Datos clasificados con 'comentarios' y 'calificacion'.
+        resumen (ResumenAnalisis): Agregados precalculados de `df`.
+        titulo (str): Título de la primera página.
+    """
+    pdf = DocumentoPDF()
+    pdf.texto(MARGEN, MARGEN + 10, titulo, 18, negrita=True)
+    pdf.texto(MARGEN, MARGEN + 30, f"{resumen.total:,} comentarios clasificados - "
+              f"generado el {time.strftime('%Y-%m-%d %H:%M')}", 10, color=(0.35, 0.35, 0.35))
+
+    por_clase = resumen.por_clase
+    y = _tabla_resumen(pdf, por_clase, MARGEN + 50)
+    clases = por_clase['Clasificacion'].tolist()
+
+    _grafica_anillo(pdf, "Distribución de comentarios (%)", clases,
+                    por_clase['Porcentaje'].tolist(), MARGEN, y + 35, radio=85)
+    mitad = (ANCHO_PAGINA - 2 * MARGEN - 30) / 2
+    y_barras = y + 265
+    _grafica_barras(pdf, "Comentarios por categoría", clases, por_clase['NumComentarios'].tolist(),
+                    MARGEN, y_barras, mitad, 200)
+    _grafica_barras(pdf, "¿Quiénes opinan más? (longitud promedio)", clases,
+                    por_clase['LongitudPromedio'].fillna(0).tolist(),
+                    MARGEN + mitad + 30, y_barras, mitad, 200, formato="{:.1f}")
+
+    pdf.nueva_pagina()
+    _comentarios_destacados(pdf, df, resumen, MARGEN + 10)
+    return pdf.a_bytes()
+
+
+def obtener_pdf(df: pd.DataFrame) -> bytes:
+    """
+    Devuelve el reporte PDF de `df`, generándolo solo la primera vez que se
+    pide para ese conjunto de datos (ver `ResumenAnalisis.clave_dataset`).
+    """
+    return _cache.obtener_o_calcular(
+        ResumenAnalisis.clave_dataset(df),
+        lambda: generar_pdf(df, ResumenAnalisis.obtener(df))
+    )
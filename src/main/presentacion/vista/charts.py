@@ -1,5 +1,13 @@
+import pandas as pd
 import plotly.express as px
+import plotly.io as pio
 import streamlit as st
+from negocio.CacheLRU import CacheLRU
+from negocio.MarcoAnalisis import MarcoAnalisis
+from negocio.ResumenAnalisis import ResumenAnalisis
+
+# JSON de las figuras por agregados: volver a dibujar la página no las reconstruye
+_cache_figuras = CacheLRU(max_entradas=64, max_bytes=32 * 1024 * 1024)
 
 def mostrar_graficos(df, color_discrete_map):
     # Validar que las columnas necesarias existen
@@ -7,65 +15,102 @@ def mostrar_graficos(df, color_discrete_map):
         st.error("El DataFrame no contiene las columnas necesarias ('Clasificacion' y 'comentarios') para mostrar los gráficos.")
         return
 
-    # Crear columna 'longitud' si no existe
-    if 'longitud' not in df.columns:
-        df['longitud'] = df['comentarios'].apply(lambda x: len(str(x).split()))
+    # Sin modificar el DataFrame recibido; un marco ya construido se usa tal cual
+    df = MarcoAnalisis.asegurar(df)
+    resumen = ResumenAnalisis.obtener(df)
+    mostrar_graficos_agregados(resumen.conteo, resumen.histograma, color_discrete_map)
 
-    # Obtener conteo por clasificación
-    conteo = df['Clasificacion'].value_counts().reset_index()
-    conteo.columns = ['Clasificacion', 'cantidad']
 
+def mostrar_graficos_agregados(conteo, histograma, color_discrete_map):
+    """
+    Dibuja los gráficos a partir de agregados ya calculados: `conteo`
+    ('Clasificacion', 'cantidad') e `histograma` ('Clasificacion', 'inicio', 'fin', 'conteo').
+    """
+    figuras = obtener_figuras(conteo, histograma, color_discrete_map)
     col1, col2 = st.columns(2)
 
     # Gráfico de pastel
     with col1:
         st.subheader("Distribución de comentarios")
-        fig_pie = px.pie(
-            conteo,
-            names='Clasificacion',
-            values='cantidad',
-            color='Clasificacion',
-            color_discrete_map=color_discrete_map,
-            hole=0.4
-        )
-        # fig_pie.update_traces(textposition='inside', textinfo='percent+label')
-        # fig_pie.update_layout(
-        #     showlegend=False,
-        #     margin=dict(t=20, b=20, l=10, r=10)
-        # )
-        st.plotly_chart(fig_pie, use_container_width=True)
+        st.plotly_chart(pio.from_json(figuras['pastel']), use_container_width=True)
 
     # Gráfico de barras
     with col2:
         st.subheader("Comentarios por categoría")
-        fig_bar = px.bar(
-            conteo,
-            x='Clasificacion',
-            y='cantidad',
-            color='Clasificacion',
-            text='cantidad',
-            color_discrete_map=color_discrete_map
-        )
-        # fig_bar.update_layout(
-        #     xaxis_title="Clasificación",
-        #     yaxis_title="Cantidad",
-        #     margin=dict(t=20, b=20, l=10, r=10),
-        #     showlegend=False
-        # )
-        st.plotly_chart(fig_bar, use_container_width=True)
+        st.plotly_chart(pio.from_json(figuras['barras']), use_container_width=True)
 
     # Histograma
     st.subheader("¿Quiénes opinan más?")
-    fig_hist = px.histogram(
-        df,
-        x='longitud',
+    st.plotly_chart(pio.from_json(figuras['histograma']), use_container_width=True)
+
+
+def obtener_figuras(conteo, histograma, color_discrete_map) -> dict:
+    """
+    Devuelve el JSON de las figuras, construyéndolas solo la primera vez para
+    esos agregados. La clave es un hash de los agregados (unas decenas de filas),
+    así que es la misma para el mismo conjunto de datos sin recorrer sus filas.
+    """
+    clave = tuple(
+        int(pd.util.hash_pandas_object(tabla, index=False).sum()) & 0xFFFFFFFFFFFFFFFF
+        for tabla in (conteo, histograma)
+    ) + (tuple(sorted(color_discrete_map.items())),)
+    return _cache_figuras.obtener_o_calcular(
+        clave, lambda: construir_figuras(conteo, histograma, color_discrete_map)
+    )
+
+
+def construir_figuras(conteo, histograma, color_discrete_map) -> dict:
+    """
+    Construye las figuras y devuelve su JSON ('pastel', 'barras' e
+    'histograma'). Solo llevan los agregados, no los comentarios: su tamaño no
+    depende del número de filas del análisis.
+    """
+    fig_pie = px.pie(
+        conteo,
+        names='Clasificacion',
+        values='cantidad',
+        color='Clasificacion',
+        color_discrete_map=color_discrete_map,
+        hole=0.4
+    )
+    # fig_pie.update_traces(textposition='inside', textinfo='percent+label')
+    # fig_pie.update_layout(
+    #     showlegend=False,
+    #     margin=dict(t=20, b=20, l=10, r=10)
+    # )
+
+    fig_bar = px.bar(
+        conteo,
+        x='Clasificacion',
+        y='cantidad',
+        color='Clasificacion',
+        text='cantidad',
+        color_discrete_map=color_discrete_map
+    )
+    # fig_bar.update_layout(
+    #     xaxis_title="Clasificación",
+    #     yaxis_title="Cantidad",
+    #     margin=dict(t=20, b=20, l=10, r=10),
+    #     showlegend=False
+    # )
+
+    histograma = histograma.assign(centro=(histograma['inicio'] + histograma['fin']) / 2)
+    fig_hist = px.bar(
+        histograma,
+        x='centro',
+        y='conteo',
         color='Clasificacion',
-        nbins=15,
         barmode='overlay',
         opacity=0.8,
         title='Distribución de longitud de comentarios por categoría',
-        labels={'longitud': 'Número de palabras'},
+        labels={'centro': 'Número de caracteres', 'conteo': 'count'},
         color_discrete_map=color_discrete_map
     )
+    if not histograma.empty:
+        fig_hist.update_traces(width=float(histograma['fin'].iloc[0] - histograma['inicio'].iloc[0]))
     fig_hist.update_layout(margin=dict(t=30, b=30, l=10, r=10))
-    st.plotly_chart(fig_hist, use_container_width=True)
+
+    return {
+        nombre: pio.to_json(figura, validate=False)
+        for nombre, figura in [('pastel', fig_pie), ('barras', fig_bar), ('histograma', fig_hist)]
+    }
@@ -1,6 +1,12 @@
+import os
+
 import pandas as pd
 import streamlit as st
-from presentacion.logica.exportador_excel import generar_excel
+from presentacion.logica.exportador_excel import obtener_excel
+from presentacion.logica.exportador_pdf import obtener_pdf
+from negocio.ResumenAnalisis import ResumenAnalisis
+
+TAMANOS_PAGINA = [10, 25, 50, 100]
 
 def show_header():
     st.title("Gestor de Satisfacción y Seguimiento de Posventa")
@@ -15,42 +21,21 @@ def show_tables(df):
     st.subheader("Comentarios relevantes por categoría")
 
     categorias = ['Detractor', 'Neutro', 'Promotor']
+    resumen = ResumenAnalisis.obtener(df)
 
     for categoria in categorias:
         st.markdown(f"#### {categoria}")
 
-        top10 = (
-            df[df['Clasificacion'] == categoria]
-            .sort_values(by='longitud', ascending=False)
-            .head(10)
-        )
+        top10 = df.iloc[resumen.indices_ordenados.get(categoria, [])[:10]][['calificacion', 'comentarios']]
 
         st.dataframe(
-            top10[['calificacion', 'comentarios']],
+            top10,
             use_container_width=True,
             hide_index=True
         )
 
-    #Agregaciones
-    resumen = df.groupby('Clasificacion').agg({
-        'comentarios': 'count',
-        'longitud': 'mean'
-    }).reset_index().rename(columns={'comentarios': 'NumComentarios', 'longitud': 'LongitudPromedio'})
-
-    resumen['Porcentaje'] = (resumen['NumComentarios'] / resumen['NumComentarios'].sum()) * 100
-
     #Boton de exportar a Excel
-    st.markdown("---")
-    st.subheader("Exportar resultados")
-
-    excel_bytes = generar_excel(df, resumen)
-    st.download_button(
-        label="📎 Descargar reporte Excel con gráficas",
-        data=excel_bytes,
-        file_name="reporte_comentarios.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        key="download_excel_full"
-    )
+    show_export_button(df, key="download_excel_full")
 
 def upload_file_view():
     st.sidebar.header("📁 Cargar archivo")
@@ -60,8 +45,8 @@ def upload_file_view():
 
 def show_comments_table(df):
     """
-    Muestra una tabla filtrable por clase con un selector y un slider para
-    controlar cuántos comentarios se muestran.
+    Muestra una tabla filtrable por clase, ordenada por longitud y paginada, para
+    que el navegador nunca reciba más de una página de comentarios.
 
     Requisitos del DataFrame: columnas 'Clasificacion', 'comentarios', 'calificacion', 'longitud'
     """
@@ -73,26 +58,25 @@ def show_comments_table(df):
 
     st.subheader("Tabla de comentarios filtrados")
 
+    resumen = ResumenAnalisis.obtener(df)
+
     # Obtener clases disponibles (sin valores nulos)
-    clases = [c for c in sorted(df['Clasificacion'].dropna().unique().tolist())]
-    opciones = ['Todas'] + clases
+    opciones = [ResumenAnalisis.TODAS] + resumen.clases
 
-    clase_seleccionada = st.selectbox("Seleccionar clase", opciones, index=0, help="Filtra los comentarios por la clase seleccionada")
+    col_clase, col_tamano, col_pagina = st.columns([2, 1, 1])
+    with col_clase:
+        clase_seleccionada = st.selectbox("Seleccionar clase", opciones, index=0, help="Filtra los comentarios por la clase seleccionada")
+    with col_tamano:
+        tamano_pagina = st.selectbox("Comentarios por página", TAMANOS_PAGINA, index=0)
 
-    max_comentarios = int(df.shape[0]) if df.shape[0] > 0 else 10
-    default_show = min(10, max_comentarios)
-    cantidad = st.slider("Cantidad de comentarios a mostrar", min_value=10, max_value=max(10, max_comentarios), value=default_show, step=10)
+    # Posiciones de la clase ya ordenadas por longitud (más largos primero)
+    posiciones = resumen.indices_ordenados.get(clase_seleccionada, [])
+    total_paginas = max(1, -(-len(posiciones) // tamano_pagina))
+    with col_pagina:
+        pagina = st.number_input("Página", min_value=1, max_value=total_paginas, value=1, step=1)
 
-    if clase_seleccionada == 'Todas':
-        df_filtrado = df.copy()
-    else:
-        df_filtrado = df[df['Clasificacion'] == clase_seleccionada]
-
-    # Ordenar por longitud (más largos primero) y limitar según slider
-    df_mostrar = (
-        df_filtrado.sort_values(by='longitud', ascending=False)
-        .head(cantidad)
-    )
+    inicio = (int(pagina) - 1) * tamano_pagina
+    df_mostrar = df.iloc[posiciones[inicio:inicio + tamano_pagina]]
 
     if df_mostrar.empty:
         st.info("No hay comentarios para la selección actual.")
@@ -103,11 +87,92 @@ def show_comments_table(df):
         use_container_width=True,
         hide_index=True
     )
+    st.caption(f"Comentarios {inicio + 1}-{inicio + len(df_mostrar)} de {len(posiciones)} "
+               f"(página {int(pagina)} de {total_paginas})")
+
 
+def show_saved_comments_table(analisis):
+    """
+    Muestra los comentarios de un análisis guardado página por página. Cada página
+    se pide a MySQL con paginación por llave (`id`), así que solo la página
+    visible está en memoria.
 
-def show_export_button(df):
+    Args:
+        analisis (AnalisisGuardado): Acceso perezoso al análisis.
     """
-    Muestra el botón de exportación a Excel con los datos completos del análisis.
+    st.subheader("Tabla de comentarios")
+
+    conteo = analisis.conteo_por_clase()
+    opciones = ['Todas'] + sorted(conteo['Clasificacion'].tolist())
+
+    col_clase, col_tamano = st.columns([2, 1])
+    with col_clase:
+        clase_seleccionada = st.selectbox("Seleccionar clase", opciones, index=0,
+                                          key="clase_analisis_guardado")
+    with col_tamano:
+        tamano_pagina = st.selectbox("Comentarios por página", TAMANOS_PAGINA, index=0,
+                                     key="tamano_analisis_guardado")
+
+    # Pila de cursores: el `id` tras el que empieza cada página visitada
+    estado = (analisis.nombre, clase_seleccionada, tamano_pagina)
+    if st.session_state.get('paginacion_analisis') != estado:
+        st.session_state['paginacion_analisis'] = estado
+        st.session_state['cursores_analisis'] = [None]
+    cursores = st.session_state['cursores_analisis']
+
+    clase = None if clase_seleccionada == 'Todas' else clase_seleccionada
+    df_pagina = analisis.pagina(tamano_pagina, despues_de=cursores[-1], clase=clase)
+    total = (analisis.total() if clase is None
+             else int(conteo.loc[conteo['Clasificacion'] == clase, 'cantidad'].sum()))
+
+    if df_pagina.empty:
+        st.info("No hay comentarios para la selección actual.")
+    else:
+        st.dataframe(
+            df_pagina[['calificacion', 'comentarios', 'Clasificacion']].rename(columns={'calificacion': 'Calificación', 'comentarios': 'Comentario', 'Clasificacion': 'Clasificación'}),
+            use_container_width=True,
+            hide_index=True
+        )
+
+    inicio = (len(cursores) - 1) * tamano_pagina
+    st.caption(f"Comentarios {inicio + 1 if len(df_pagina) else 0}-{inicio + len(df_pagina)} de {total}")
+
+    col_anterior, col_siguiente = st.columns(2)
+    with col_anterior:
+        if st.button("← Anterior", disabled=len(cursores) == 1, key="anterior_analisis_guardado"):
+            cursores.pop()
+            st.rerun()
+    with col_siguiente:
+        hay_siguiente = len(df_pagina) == tamano_pagina and inicio + tamano_pagina < total
+        if st.button("Siguiente →", disabled=not hay_siguiente, key="siguiente_analisis_guardado"):
+            cursores.append(int(df_pagina['id'].iloc[-1]))
+            st.rerun()
+
+
+def _reporte_solicitado(df, key, etiqueta, bajo_demanda):
+    """
+    True si el reporte `key` de `df` ya se pidió. Se recuerda por botón qué
+    conjunto de datos se preparó, para que interactuar con otros widgets no
+    oculte la descarga.
+    """
+    if not bajo_demanda:
+        return True
+    clave = ResumenAnalisis.clave_dataset(df)
+    preparados = st.session_state.setdefault('reportes_preparados', {})
+    if preparados.get(key) != clave:
+        if not st.button(etiqueta, key=f"{key}_preparar"):
+            return False
+        preparados[key] = clave
+    return True
+
+
+def show_export_button(df, key="download_excel_export", bajo_demanda=True):
+    """
+    Muestra los botones de exportación a Excel y a PDF con los datos completos
+    del análisis. Los reportes no se generan al dibujar la página: con
+    `bajo_demanda` primero se piden con un botón, y una vez generados quedan en
+    caché para ese conjunto de datos (ver `exportador_excel.obtener_excel` y
+    `exportador_pdf.obtener_pdf`).
     
     Requisitos del DataFrame: columnas 'Clasificacion', 'comentarios', 'calificacion', 'longitud'
     """
@@ -117,36 +182,122 @@ def show_export_button(df):
         st.error("El DataFrame no contiene las columnas necesarias para la exportación.")
         return
 
-    # Agregaciones
-    resumen = df.groupby('Clasificacion').agg({
-        'comentarios': 'count',
-        'longitud': 'mean'
-    }).reset_index().rename(columns={'comentarios': 'NumComentarios', 'longitud': 'LongitudPromedio'})
-
-    resumen['Porcentaje'] = (resumen['NumComentarios'] / resumen['NumComentarios'].sum()) * 100
-
-    bins = list(range(0, int(df['longitud'].max()) + 50, 50))
-    df_temp = df.copy()
-    df_temp['rango_longitud'] = pd.cut(df_temp['longitud'], bins=bins, right=False)
-    distribucion = df_temp.groupby(['Clasificacion', 'rango_longitud']).size().reset_index(name='conteo')
-
-    # Corregir el rango - convertir a string y extraer valores con regex
-    distribucion['rango_str'] = distribucion['rango_longitud'].astype(str)
-    # Extraer los números del formato "[0, 50)" o similar
-    extracted = distribucion['rango_str'].str.extract(r'\[(\d+\.?\d*),\s*(\d+\.?\d*)\)')
-    distribucion['min'] = extracted[0].astype(float)
-    distribucion['max'] = extracted[1].astype(float)
-    distribucion.drop(columns=['rango_longitud', 'rango_str'], inplace=True)
-
-    # Botón de exportar a Excel
+    # Botones de exportar a Excel y PDF
     st.markdown("---")
     st.subheader("Exportar resultados")
-
-    excel_bytes = generar_excel(df, resumen, distribucion)
-    st.download_button(
-        label="📎 Descargar reporte Excel con gráficas",
-        data=excel_bytes,
-        file_name="reporte_comentarios.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        key="download_excel_export"
+    col_excel, col_pdf = st.columns(2)
+
+    with col_excel:
+        if _reporte_solicitado(df, key, "Preparar reporte Excel", bajo_demanda):
+            with st.spinner("Generando reporte Excel..."):
+                excel_bytes = obtener_excel(df)
+            st.download_button(
+                label="📎 Descargar reporte Excel con gráficas",
+                data=excel_bytes,
+                file_name="reporte_comentarios.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                key=key,
+                on_click="ignore"
+            )
+
+    with col_pdf:
+        if _reporte_solicitado(df, f"{key}_pdf", "Preparar reporte PDF", bajo_demanda):
+            st.download_button(
+                label="📄 Descargar reporte PDF",
+                data=obtener_pdf(df),
+                file_name="reporte_comentarios.pdf",
+                mime="application/pdf",
+                key=f"{key}_pdf",
+                on_click="ignore"
+            )
+
+
+ETIQUETAS_ESTADO_GUARDADO = {
+    'en_cola': "⏳ En cola",
+    'guardando': "💾 Guardando",
+    'completado': "✅ Completado",
+    'error': "❌ Error",
+}
+
+
+def show_save_jobs(guardado, ids):
+    """
+    Muestra el estado de los guardados en segundo plano de la sesión. Mientras
+    alguno está en curso, el panel se actualiza solo cada segundo sin volver a
+    ejecutar el resto de la página; al terminar el último se recarga la página
+    para refrescar la lista de análisis guardados.
+
+    Args:
+        guardado (ServicioGuardadoSegundoPlano): Cola de guardados.
+        ids (list[str]): Ids de los trabajos de la sesión, del más antiguo al más reciente.
+    """
+    if not ids:
+        return
+    en_curso = guardado.en_curso(ids)
+
+    @st.fragment(run_every=1 if en_curso else None)
+    def panel():
+        st.subheader("Guardados")
+        for id_trabajo in reversed(ids):
+            trabajo = guardado.estado(id_trabajo)
+            if trabajo is None:
+                continue
+            archivo, bd = trabajo['archivo'], trabajo['bd']
+            st.markdown(f"**{trabajo['nombre']}** · {ETIQUETAS_ESTADO_GUARDADO[trabajo['estado']]}")
+            col_archivo, col_bd = st.columns(2)
+            with col_archivo:
+                st.caption(f"Archivo: {ETIQUETAS_ESTADO_GUARDADO[archivo['estado']]}")
+                if archivo['estado'] == 'error':
+                    st.warning(archivo['mensaje'])
+            with col_bd:
+                st.caption(f"Base de datos: {ETIQUETAS_ESTADO_GUARDADO[bd['estado']]}"
+                           + (f" (reintento {bd['intentos']})" if bd['intentos'] else ""))
+                if bd['estado'] == 'guardando' and bd['total']:
+                    st.progress(bd['filas'] / bd['total'], text=f"{bd['filas']} de {bd['total']} filas")
+                elif bd['estado'] == 'error':
+                    st.warning(bd['mensaje'])
+        if en_curso and not guardado.en_curso(ids):
+            # Recarga completa para que la barra lateral liste el análisis nuevo
+            st.rerun(scope='app')
+
+    panel()
+
+
+def show_session_memory(datasets, objetos):
+    """
+    Muestra en la barra lateral la memoria aproximada de la sesión: la propia
+    (estado de la sesión) y la de los conjuntos de datos que comparte con otras
+    sesiones (ver negocio.DatasetsCompartidos).
+    """
+    memoria = datasets.memoria_sesion(objetos)
+    st.sidebar.caption(
+        f"Memoria de esta sesión: {memoria['propia'] / 1e6:.1f} MB propios y "
+        f"{memoria['compartida'] / 1e6:.1f} MB compartidos con otras sesiones"
     )
+
+
+def show_diagnostics(instrumentacion):
+    """
+    Panel oculto con las mediciones de las etapas del procesamiento (ver
+    negocio.Instrumentacion). Solo aparece al abrir la página con
+    `?diagnostico=1` o con la variable de entorno GSSP_DIAGNOSTICO=1.
+    """
+    if st.query_params.get('diagnostico') != '1' and os.environ.get('GSSP_DIAGNOSTICO') != '1':
+        return
+
+    with st.expander("Diagnóstico", expanded=True):
+        st.caption(
+            f"Memoria pico por etapa: {'activada' if instrumentacion.medir_memoria else 'desactivada (GSSP_MEMORIA=1)'} · "
+            f"Perfilador: {instrumentacion.perfilador or 'ninguno (GSSP_PERFIL)'} · "
+            f"Métricas: {instrumentacion.ruta_metricas or 'solo en memoria (GSSP_METRICAS)'}"
+        )
+        registros = instrumentacion.registros()
+        if not registros:
+            st.info("Aún no hay etapas medidas en este proceso.")
+            return
+        st.dataframe(instrumentacion.resumen(), use_container_width=True, hide_index=True)
+        st.caption("Etapas recientes")
+        st.dataframe(pd.DataFrame(registros[::-1]), use_container_width=True, hide_index=True)
+        if st.button("Limpiar mediciones", key="limpiar_diagnostico"):
+            instrumentacion.limpiar()
+            st.rerun()
@@ -0,0 +1,168 @@
+import threading
+import pytest
+import pandas as pd
+from src.main.datos.AlmacenSQLite import AlmacenSQLite
+from src.main.datos.AlmacenAnalisis import AlmacenAnalisis, crear_almacen
+from src.main.negocio.ServicioAlmacenamiento import ServicioAlmacenamiento
+
+@pytest.fixture
+def almacen(tmp_path):
+    almacen = AlmacenSQLite(str(tmp_path / 'analisis.sqlite'))
+    yield almacen
+    almacen.cerrar()
+
+@pytest.fixture
+def servicio(almacen, tmp_path):
+    return ServicioAlmacenamiento(directorio_base_csv=str(tmp_path), almacen=almacen)
+
+@pytest.fixture
+def datos():
+    return pd.DataFrame({
+        'comentarios': ['excelente servicio', 'malo', 'regular', None, 'muy bueno'],
+        'calificacion': [10.0, 2.0, 6.0, 9.0, 9.0],
+        'Clasificacion': ['Promotor', 'Detractor', 'Neutro', 'Promotor', 'Promotor'],
+    })
+
+def test_usa_modo_wal(almacen):
+    assert almacen._consultar("PRAGMA journal_mode")[0][0] == 'wal'
+
+def test_crear_almacen_sqlite_desde_entorno(tmp_path, monkeypatch):
+    monkeypatch.setenv('GSSP_ALMACEN', 'sqlite')
+    monkeypatch.setenv('GSSP_SQLITE', str(tmp_path / 'sub' / 'a.sqlite'))
+    almacen = crear_almacen()
+    assert almacen.nombre == 'SQLite'
+    assert (tmp_path / 'sub' / 'a.sqlite').exists()
+    almacen.cerrar()
+    with pytest.raises(ValueError):
+        crear_almacen(motor='oracle')
+
+def test_almacen_incompleto_falla_al_crearse():
+    class AlmacenSoloLectura(AlmacenAnalisis):
+        def listar(self):
+            return []
+
+    with pytest.raises(TypeError, match='guardar'):
+        AlmacenSoloLectura()
+
+def test_guardar_listar_y_cargar(servicio, datos):
+    progreso = []
+    exito, msg = servicio.guardar_analisis_mysql(
+        datos, 'analisis_enero', tamano_lote=2, progreso=lambda h, t: progreso.append(h)
+    )
+    assert exito and 'SQLite' in msg
+    assert progreso == [2, 4, 5]
+    servicio.guardar_analisis_mysql(datos.iloc[:1], 'analisis_febrero')
+
+    assert servicio.listar_analisis_guardados() == ['analisis_enero', 'analisis_febrero']
+    cargado = servicio.cargar_analisis_por_nombre('analisis_enero')
+    assert cargado['comentarios'].tolist()[:3] == ['excelente servicio', 'malo', 'regular']
+    assert len(cargado) == 5
+
+def test_guardar_agrega_al_mismo_lote(servicio, almacen, datos):
+    servicio.guardar_analisis_mysql(datos, 'analisis_enero')
+    servicio.guardar_analisis_mysql(datos, 'analisis_enero')
+    assert servicio.listar_analisis_guardados() == ['analisis_enero']
+    assert almacen._consultar("SELECT filas FROM catalogo_analisis")[0][0] == 10
+
+def test_lecturas_no_esperan_un_guardado_en_curso(almacen, datos):
+    almacen.guardar(datos.iloc[:1], 'analisis_enero', tamano_lote=10)
+    leidos = []
+
+    def leer_durante_el_guardado(hechas, _total):
+        if hechas == 2:
+            # El guardado tiene la conexión de escritura; otra sesión lee a la vez
+            lector = threading.Thread(target=lambda: leidos.append(
+                (almacen.listar(), len(almacen.cargar('analisis_enero')))
+            ))
+            lector.start()
+            lector.join(timeout=5)
+
+    almacen.guardar(datos, 'analisis_febrero', tamano_lote=2, progreso=leer_durante_el_guardado)
+    # Solo se ven los lotes ya confirmados
+    assert leidos == [(['analisis_enero', 'analisis_febrero'], 1)]
+    assert len(almacen.cargar('analisis_febrero')) == 5
+
+def test_agregados_y_paginas(servicio, datos):
+    servicio.guardar_analisis_mysql(datos, 'analisis_enero')
+    analisis = servicio.abrir_analisis('analisis_enero')
+
+    conteo = analisis.conteo_por_clase()
+    assert conteo.iloc[0].tolist() == ['Promotor', 3]
+    assert analisis.total() == 5
+
+    resumen = analisis.resumen_por_clase().set_index('Clasificacion')
+    assert resumen.loc['Promotor', 'NumComentarios'] == 2
+    assert resumen.loc['Detractor', 'LongitudPromedio'] == 4.0
+
+    histograma = analisis.histograma_longitud()
+    assert histograma['conteo'].sum() == 4
+    assert histograma['fin'].max() == 18
+
+    primera = analisis.pagina(tamano=2)
+    segunda = analisis.pagina(tamano=2, despues_de=primera['id'].iloc[-1])
+    assert segunda['comentarios'].tolist() == ['regular', None]
+    assert analisis.pagina(tamano=5, clase='Detractor')['comentarios'].tolist() == ['malo']
+    assert len(analisis.cargar_todo()) == 5
+
+def test_tendencia_por_analisis(servicio, datos):
+    servicio.guardar_analisis_mysql(datos, 'analisis_enero')
+    servicio.guardar_analisis_mysql(datos.iloc[:2], 'analisis_febrero')
+    tendencia = servicio.tendencia_por_analisis()
+    febrero = tendencia[tendencia['analisis'] == 'analisis_febrero']
+    assert febrero['cantidad'].sum() == 2
+
+def test_migracion_no_aplica_en_sqlite(servicio):
+    assert servicio.migrar_tablas_antiguas() == []
+
+def test_combinar_escribe_solo_la_diferencia(servicio, almacen, datos):
+    servicio.guardar_analisis_mysql(datos, 'analisis_enero', modo='combinar')
+    ids_antes = dict(almacen._consultar("SELECT huella, id FROM comentarios_analisis"))
+
+    corregidos = datos.copy()
+    corregidos.loc[1, 'comentarios'] = 'malo, corregido'   # fila modificada
+    corregidos.loc[2, 'Clasificacion'] = 'Promotor'         # solo cambia la clase
+    corregidos = pd.concat([corregidos, pd.DataFrame({
+        'comentarios': ['nuevo'], 'calificacion': [7.0], 'Clasificacion': ['Neutro']
+    })], ignore_index=True)
+
+    exito, msg = servicio.guardar_analisis_mysql(corregidos, 'analisis_enero', modo='combinar')
+
+    assert exito
+    assert '2 nuevas, 1 actualizadas, 1 eliminadas, 3 sin cambios' in msg
+    filas = almacen._consultar("SELECT huella, id FROM comentarios_analisis")
+    assert len(filas) == 6
+    # Las filas sin cambios conservan su id: no se reescribieron
+    assert sum(1 for huella, id_fila in filas if ids_antes.get(huella) == id_fila) == 4
+    assert almacen._consultar("SELECT filas FROM catalogo_analisis")[0][0] == 6
+    cargado = servicio.cargar_analisis_por_nombre('analisis_enero')
+    assert sorted(cargado['comentarios'].dropna()) == sorted(corregidos['comentarios'].dropna())
+
+def test_combinar_sin_cambios_no_escribe(servicio, datos):
+    servicio.guardar_analisis_mysql(datos, 'analisis_enero', modo='combinar')
+    avances = []
+    exito, msg = servicio.guardar_analisis_mysql(
+        datos, 'analisis_enero', modo='combinar', progreso=lambda h, t: avances.append(h)
+    )
+    assert exito and '0 nuevas, 0 actualizadas, 0 eliminadas, 5 sin cambios' in msg
+    assert avances == []
+
+def test_combinar_reemplaza_filas_agregadas_sin_huella(servicio, almacen, datos):
+    servicio.guardar_analisis_mysql(datos, 'analisis_enero')
+    # Las lecturas son de solo lectura: la modificación va por la conexión de escritura
+    with almacen._lock:
+        almacen._conn.execute("UPDATE comentarios_analisis SET huella = NULL")
+        almacen._conn.commit()
+    exito, msg = servicio.guardar_analisis_mysql(datos, 'analisis_enero', modo='combinar')
+    assert '5 nuevas, 0 actualizadas, 5 eliminadas' in msg
+    assert almacen._consultar("SELECT COUNT(*) FROM comentarios_analisis")[0][0] == 5
+
+def test_completar_huellas_evita_reescribir_filas_migradas(servicio, almacen, datos):
+    servicio.guardar_analisis_mysql(datos, 'analisis_enero')
+    lote_id = almacen.lote_id('analisis_enero')
+    with almacen._lock:
+        # Como las filas copiadas de una tabla antigua, sin huella
+        almacen._conn.execute("UPDATE comentarios_analisis SET huella = NULL")
+        assert almacen._completar_huellas(almacen._conn.cursor(), lote_id) == 5
+        almacen._conn.commit()
+    exito, msg = servicio.guardar_analisis_mysql(datos, 'analisis_enero', modo='combinar')
+    assert exito and '0 nuevas, 0 actualizadas, 0 eliminadas' in msg
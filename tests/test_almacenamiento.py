@@ -15,8 +15,26 @@ def db_config():
     }
 
 @pytest.fixture
-def servicio_almacenamiento(db_config):
-    return ServicioAlmacenamiento(db_config)
+def mock_pool():
+    return MagicMock()
+
+@pytest.fixture
+def mock_conn(mock_pool):
+    conn = MagicMock()
+    mock_pool.conexion.return_value.__enter__.return_value = conn
+    mock_pool.conexion_directa.return_value.__enter__.return_value = conn
+    return conn
+
+@pytest.fixture
+def mock_cursor(mock_conn):
+    cursor = MagicMock()
+    cursor.lastrowid = 7
+    mock_conn.cursor.return_value.__enter__.return_value = cursor
+    return cursor
+
+@pytest.fixture
+def servicio_almacenamiento(db_config, mock_pool):
+    return ServicioAlmacenamiento(db_config, pool=mock_pool)
 
 @pytest.fixture
 def sample_dataframe():
@@ -34,61 +52,213 @@ def test_guardar_analisis_csv(servicio_almacenamiento, sample_dataframe):
         assert msg == "Success"
         mock_guardar.assert_called_once_with(sample_dataframe, 'test_file')
 
-@patch('src.main.negocio.ServicioAlmacenamiento.mysql.connector.connect')
-def test_guardar_analisis_mysql_success(mock_connect, servicio_almacenamiento, sample_dataframe):
-    mock_conn = MagicMock()
-    mock_cursor = MagicMock()
-    mock_connect.return_value.__enter__.return_value = mock_conn
-    mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
-
+def test_guardar_analisis_mysql_success(mock_pool, mock_conn, mock_cursor, servicio_almacenamiento, sample_dataframe):
     success, msg = servicio_almacenamiento.guardar_analisis_mysql(sample_dataframe, 'test_table')
 
     assert success is True
     assert "exitosamente" in msg
-    mock_connect.assert_called_once()
-    assert mock_cursor.execute.call_count == 3 # 1 for CREATE TABLE, 2 for INSERT
+    mock_pool.conexion.assert_called_once()
+    sentencias = [c[0][0] for c in mock_cursor.execute.call_args_list]
+    assert len(sentencias) == 5 # 2 x CREATE TABLE, ALTER de huella, catálogo, contador de filas
+    assert 'INSERT INTO catalogo_analisis' in sentencias[3]
+    assert mock_cursor.execute.call_args_list[3][0][1] == ('test_table',)
+    assert mock_cursor.execute.call_args_list[4][0][1] == (2, 7)
+    mock_cursor.executemany.assert_called_once()
+    sql, filas = mock_cursor.executemany.call_args[0]
+    assert 'INSERT INTO comentarios_analisis' in sql
+    assert [fila[:5] for fila in filas] == [(7, 'bueno', 5.0, 'Positivo', 5), (7, 'malo', 1.0, 'Negativo', 4)]
+    assert all(isinstance(fila[5], int) for fila in filas)
+    mock_conn.commit.assert_called_once()
+
+def test_guardar_analisis_mysql_por_lotes(mock_conn, mock_cursor, servicio_almacenamiento):
+    datos = pd.DataFrame({
+        'comentarios': ['a', 'b', 'c', None, 'e'],
+        'calificacion': [1.0, 2.0, float('nan'), 4.0, 5.0],
+        'Clasificacion': ['Neutro'] * 5
+    })
+    avances = []
+
+    success, _ = servicio_almacenamiento.guardar_analisis_mysql(
+        datos, 'test_table', tamano_lote=2, progreso=lambda n, total: avances.append((n, total))
+    )
+
+    assert success is True
+    assert mock_cursor.executemany.call_count == 3
+    assert mock_conn.commit.call_count == 3
+    assert avances == [(2, 5), (4, 5), (5, 5)]
+    segundo_lote = mock_cursor.executemany.call_args_list[1][0][1]
+    assert [fila[:5] for fila in segundo_lote] == [(7, 'c', None, 'Neutro', 1), (7, None, 4.0, 'Neutro', None)]
+
+def test_guardar_analisis_mysql_load_data(mock_pool, mock_conn, mock_cursor, servicio_almacenamiento, sample_dataframe):
+    contenido = []
+    mock_cursor.execute.side_effect = lambda sql, params=None: (
+        contenido.append((open(params[0], encoding='utf-8').read(), params[1]))
+        if 'LOAD DATA' in sql else None
+    )
+
+    success, _ = servicio_almacenamiento.guardar_analisis_mysql(
+        sample_dataframe, 'test_table', usar_load_data=True
+    )
+
+    assert success is True
+    mock_pool.conexion_directa.assert_called_once_with(allow_local_infile=True)
+    assert "LOAD DATA LOCAL INFILE" in mock_cursor.execute.call_args_list[4][0][0]
+    lineas = contenido[0][0].splitlines()
+    assert [linea.rsplit(',', 1)[0] for linea in lineas] == ['bueno,5.0,Positivo,5', 'malo,1.0,Negativo,4']
+    assert contenido[0][1] == 7
+    mock_cursor.executemany.assert_not_called()
     mock_conn.commit.assert_called_once()
 
-@patch('src.main.negocio.ServicioAlmacenamiento.mysql.connector.connect')
-def test_listar_analisis_guardados_success(mock_connect, servicio_almacenamiento):
-    mock_conn = MagicMock()
-    mock_cursor = MagicMock()
-    mock_connect.return_value.__enter__.return_value = mock_conn
-    mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
+def test_listar_analisis_guardados_success(mock_cursor, servicio_almacenamiento):
     mock_cursor.fetchall.return_value = [('analisis_1',), ('analisis_2',)]
 
     tables = servicio_almacenamiento.listar_analisis_guardados()
 
     assert tables == ['analisis_1', 'analisis_2']
-    mock_cursor.execute.assert_called_once_with("SHOW TABLES LIKE 'analisis_%'")
+    mock_cursor.execute.assert_called_with("SELECT nombre FROM catalogo_analisis ORDER BY creado, id")
 
 @patch('src.main.negocio.ServicioAlmacenamiento.pd.read_sql')
-@patch('src.main.negocio.ServicioAlmacenamiento.mysql.connector.connect')
-def test_cargar_analisis_por_nombre_success(mock_connect, mock_read_sql, servicio_almacenamiento, sample_dataframe):
-    mock_connect.return_value = MagicMock()
+def test_cargar_analisis_por_nombre_success(mock_read_sql, mock_conn, servicio_almacenamiento, sample_dataframe):
     mock_read_sql.return_value = sample_dataframe
 
     df = servicio_almacenamiento.cargar_analisis_por_nombre('test_table')
 
     assert not df.empty
-    assert df.equals(sample_dataframe)
+    # Mismos valores, con tipos compactos y longitudes precalculadas
+    assert df[sample_dataframe.columns].astype(object).values.tolist() == sample_dataframe.values.tolist()
+    assert str(df['calificacion'].dtype) == 'Int8'
+    assert df['Clasificacion'].dtype == 'category'
+    assert df['longitud'].tolist() == [5, 4]
     mock_read_sql.assert_called_once()
 
-@patch('src.main.negocio.ServicioAlmacenamiento.mysql.connector.connect')
-def test_guardar_analisis_mysql_failure(mock_connect, servicio_almacenamiento, sample_dataframe):
-    mock_connect.side_effect = Error("DB error")
+def test_guardar_analisis_mysql_failure(mock_pool, servicio_almacenamiento, sample_dataframe):
+    mock_pool.conexion.side_effect = Error("DB error")
     success, msg = servicio_almacenamiento.guardar_analisis_mysql(sample_dataframe, 'test_table')
     assert success is False
     assert "DB error" in msg
 
-@patch('src.main.negocio.ServicioAlmacenamiento.mysql.connector.connect')
-def test_listar_analisis_guardados_failure(mock_connect, servicio_almacenamiento):
-    mock_connect.side_effect = Error("DB error")
+def test_listar_analisis_guardados_failure(mock_pool, servicio_almacenamiento):
+    mock_pool.conexion.side_effect = Error("DB error")
     tables = servicio_almacenamiento.listar_analisis_guardados()
     assert tables == []
 
-@patch('src.main.negocio.ServicioAlmacenamiento.mysql.connector.connect')
-def test_cargar_analisis_por_nombre_failure(mock_connect, servicio_almacenamiento):
-    mock_connect.side_effect = Error("DB error")
+def test_cargar_analisis_por_nombre_failure(mock_pool, servicio_almacenamiento):
+    mock_pool.conexion.side_effect = Error("DB error")
     df = servicio_almacenamiento.cargar_analisis_por_nombre('test_table')
     assert df.empty
+
+def test_listar_analisis_guardados_usa_cache(mock_pool, mock_cursor, servicio_almacenamiento):
+    mock_cursor.fetchall.return_value = [('analisis_1',)]
+
+    assert servicio_almacenamiento.listar_analisis_guardados() == ['analisis_1']
+    assert servicio_almacenamiento.listar_analisis_guardados() == ['analisis_1']
+
+    mock_pool.conexion.assert_called_once()
+
+def test_guardar_invalida_cache(mock_pool, mock_cursor, servicio_almacenamiento, sample_dataframe):
+    mock_cursor.fetchall.return_value = [('analisis_1',)]
+    servicio_almacenamiento.listar_analisis_guardados()
+
+    servicio_almacenamiento.guardar_analisis_mysql(sample_dataframe, 'analisis_2')
+    mock_cursor.fetchall.return_value = [('analisis_1',), ('analisis_2',)]
+
+    assert servicio_almacenamiento.listar_analisis_guardados() == ['analisis_1', 'analisis_2']
+    assert mock_pool.conexion.call_count == 3
+
+@patch('src.main.negocio.ServicioAlmacenamiento.pd.read_sql')
+def test_cargar_analisis_por_nombre_usa_cache(mock_read_sql, mock_pool, mock_conn, servicio_almacenamiento, sample_dataframe):
+    mock_read_sql.return_value = sample_dataframe
+
+    primero = servicio_almacenamiento.cargar_analisis_por_nombre('test_table')
+    primero['extra'] = 0
+    with pytest.raises(ValueError):
+        primero.loc[0, 'longitud'] = 0
+    segundo = servicio_almacenamiento.cargar_analisis_por_nombre('test_table')
+
+    mock_read_sql.assert_called_once()
+    assert 'extra' not in segundo.columns
+    assert segundo['longitud'].tolist() == [5, 4]
+    assert segundo.equals(primero.drop(columns='extra'))
+
+    servicio_almacenamiento.invalidar_cache('test_table')
+    servicio_almacenamiento.cargar_analisis_por_nombre('test_table')
+    assert mock_read_sql.call_count == 2
+
+def test_invalidar_cache_descarta_agregados_del_analisis(mock_cursor, servicio_almacenamiento):
+    mock_cursor.fetchall.side_effect = [[(1,)], [('Promotor', 2)], [(2,)], [('Promotor', 3)]]
+    analisis = servicio_almacenamiento.abrir_analisis('analisis_1')
+    analisis.conteo_por_clase()
+    servicio_almacenamiento.abrir_analisis('analisis_2').conteo_por_clase()
+    assert servicio_almacenamiento.cache.estadisticas()['entradas'] == 4 # lote y conteo de cada uno
+
+    servicio_almacenamiento.invalidar_cache('analisis_1')
+    assert servicio_almacenamiento.cache.obtener(('agregado', 'analisis_1', 'conteo')) is None
+    assert servicio_almacenamiento.cache.obtener(('agregado', 'analisis_2', 'conteo')) is not None
+
+@patch('src.main.negocio.ServicioAlmacenamiento.pd.read_sql')
+def test_cargar_analisis_filtra_por_nombre_en_el_catalogo(mock_read_sql, mock_conn, servicio_almacenamiento, sample_dataframe):
+    mock_read_sql.return_value = sample_dataframe
+    servicio_almacenamiento.cargar_analisis_por_nombre('analisis_enero')
+    sql = mock_read_sql.call_args[0][0]
+    assert 'JOIN catalogo_analisis' in sql and 'WHERE k.nombre = %s' in sql
+    assert mock_read_sql.call_args[1]['params'] == ('analisis_enero',)
+
+def test_tendencia_por_analisis(mock_cursor, servicio_almacenamiento):
+    mock_cursor.fetchall.return_value = [('analisis_enero', '2025-01-31', 'Promotor', 4, 20)]
+    tendencia = servicio_almacenamiento.tendencia_por_analisis()
+    assert tendencia.iloc[0].to_dict() == {
+        'analisis': 'analisis_enero', 'creado': '2025-01-31', 'Clasificacion': 'Promotor',
+        'cantidad': 4, 'LongitudPromedio': 20.0
+    }
+    assert 'GROUP BY k.id' in mock_cursor.execute.call_args[0][0]
+
+def test_migrar_tablas_antiguas(mock_conn, mock_cursor, servicio_almacenamiento):
+    from src.main.datos.HuellaFilas import calcular_huellas
+    copiadas = [(20, 'bueno', 5.0, None), (21, 'bueno', 5.0, None)]
+    mock_cursor.fetchall.side_effect = [
+        [('analisis_enero',), ('analisis_febrero',)],  # tablas antiguas
+        [('analisis_enero', 3)],                        # catálogo
+        [(1, 'ok', 3.0, 42)],                           # huellas de enero, ya completas
+        copiadas,                                       # filas copiadas de febrero
+    ]
+    mock_cursor.rowcount = 2
+
+    migradas = servicio_almacenamiento.migrar_tablas_antiguas(eliminar_originales=True)
+
+    assert migradas == [('analisis_febrero', 2)]
+    sentencias = [c[0][0] for c in mock_cursor.execute.call_args_list]
+    copia = next(s for s in sentencias if s.startswith('INSERT INTO comentarios_analisis'))
+    assert 'FROM `analisis_febrero`' in copia
+    assert 'DROP TABLE `analisis_febrero`' in sentencias
+    assert not any('analisis_enero' in s for s in sentencias)
+    mock_conn.commit.assert_called_once()
+    # Las filas copiadas reciben su huella antes de confirmar
+    sql, filas = mock_cursor.executemany.call_args[0]
+    assert sql.startswith('UPDATE comentarios_analisis SET huella')
+    huellas = calcular_huellas(pd.DataFrame(copiadas, columns=['id', 'comentarios', 'calificacion', 'huella']))
+    assert filas == [(int(huellas[0]), 7, 20), (int(huellas[1]), 7, 21)]
+
+def test_guardar_reintenta_errores_transitorios_desde_el_ultimo_lote(mock_pool, mock_cursor, servicio_almacenamiento, sample_dataframe):
+    from mysql.connector.errors import OperationalError
+    mock_cursor.executemany.side_effect = [None, OperationalError("Lost connection", errno=2013), None]
+    avances, reintentos = [], []
+
+    success, _ = servicio_almacenamiento.guardar_analisis_mysql(
+        sample_dataframe, 'test_table', tamano_lote=1, reintentos=2, espera_reintento=0,
+        progreso=lambda hechas, total: avances.append((hechas, total)),
+        al_reintentar=lambda intento, error: reintentos.append(intento)
+    )
+
+    assert success is True
+    comentarios = [call.args[1][0][1] for call in mock_cursor.executemany.call_args_list]
+    assert comentarios == ['bueno', 'malo', 'malo']
+    assert avances == [(1, 2), (2, 2)]
+    assert reintentos == [1]
+
+def test_guardar_no_reintenta_errores_permanentes(mock_pool, mock_cursor, servicio_almacenamiento, sample_dataframe):
+    mock_cursor.executemany.side_effect = Error("Duplicate entry", errno=1062)
+    success, msg = servicio_almacenamiento.guardar_analisis_mysql(
+        sample_dataframe, 'test_table', reintentos=3, espera_reintento=0
+    )
+    assert success is False
+    assert mock_cursor.executemany.call_count == 1
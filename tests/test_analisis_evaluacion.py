@@ -1,7 +1,10 @@
 import pytest
 from unittest.mock import patch, MagicMock
+import os
+import numpy as np
 import pandas as pd
 from src.main.negocio.ServicioAnalisisEvaluacion import ServicioAnalisisEvaluacion
+from src.main.datos.CachePredicciones import CachePredicciones
 
 @pytest.fixture
 def servicio_analisis_evaluacion():
@@ -21,8 +24,8 @@ def test_guardar_analisis(servicio_analisis_evaluacion):
     assert success is True
     assert "csv_ok" in msg
     assert "mysql_ok" in msg
-    servicio_analisis_evaluacion.servicio_almacenamiento.guardar_analisis_csv.assert_called_once_with(df, 'test_file')
-    servicio_analisis_evaluacion.servicio_almacenamiento.guardar_analisis_mysql.assert_called_once_with(df, 'test_table')
+    servicio_analisis_evaluacion.servicio_almacenamiento.guardar_analisis_csv.assert_called_once_with(df, 'test_file', modo='combinar')
+    servicio_analisis_evaluacion.servicio_almacenamiento.guardar_analisis_mysql.assert_called_once_with(df, 'test_table', modo='combinar')
 
 def test_listar_analisis_guardados(servicio_analisis_evaluacion):
     servicio_analisis_evaluacion.servicio_almacenamiento.listar_analisis_guardados.return_value = ['t1', 't2']
@@ -65,3 +68,124 @@ def test_init_exception(mock_load):
     with patch('src.main.negocio.ServicioAnalisisEvaluacion.ServicioAlmacenamiento'):
         sae = ServicioAnalisisEvaluacion('dummy_path')
         assert sae.modelo is None
+
+class ModeloLineal:
+    """Modelo mínimo con decision_function, como el LinearSVC del pipeline."""
+    classes_ = np.array([-1, 0, 1])
+
+    def __init__(self):
+        self.lotes = []
+
+    def decision_function(self, X):
+        puntajes = np.zeros((len(X), 3))
+        puntajes[np.arange(len(X)), (X['calificacion'].to_numpy() // 4).astype(int)] = 1.0
+        return puntajes
+
+    def predict(self, X):
+        self.lotes.append(len(X))
+        return self.classes_[self.decision_function(X).argmax(axis=1)]
+
+def test_realizar_analisis_sentimientos_por_lotes(servicio_analisis_evaluacion):
+    modelo = ModeloLineal()
+    servicio_analisis_evaluacion.modelo = modelo
+    datos = pd.DataFrame({
+        'comentarios': ['a', 'b', None, 'd', 'e'],
+        'calificacion': [1, 5, 9, 10, 2]
+    })
+    avances = []
+
+    resultado = servicio_analisis_evaluacion.realizar_analisis_sentimientos(
+        datos, tamano_lote=2, progreso=lambda n, total: avances.append((n, total))
+    )
+
+    assert modelo.lotes == [2, 2]
+    assert avances == [(2, 4), (4, 4)]
+    assert list(resultado.index) == [0, 1, 3, 4]
+    assert resultado['Clasificacion'].tolist() == [-1, 0, 1, -1]
+    assert resultado['Confianza'].tolist() == [1.0, 1.0, 1.0, 1.0]
+    assert 'Clasificacion' not in datos.columns
+
+def test_realizar_analisis_sentimientos_sin_confianza(servicio_analisis_evaluacion):
+    modelo = MagicMock(spec=['predict'])
+    modelo.predict.side_effect = lambda X: np.ones(len(X), dtype=int)
+    servicio_analisis_evaluacion.modelo = modelo
+    datos = pd.DataFrame({'comentarios': ['a', 'b'], 'calificacion': [1, 2]})
+
+    resultado = servicio_analisis_evaluacion.realizar_analisis_sentimientos(datos)
+
+    assert resultado['Clasificacion'].tolist() == [1, 1]
+    assert 'Confianza' not in resultado.columns
+
+class ModeloCalibrado(ModeloLineal):
+    """Con predict_proba además de decision_function, como un SVC calibrado."""
+
+    def predict_proba(self, X):
+        # Las probabilidades calibradas prefieren otra clase que `predict`
+        probabilidades = np.full((len(X), 3), 0.1)
+        probabilidades[:, 1] = 0.7
+        probabilidades[np.arange(len(X)), (X['calificacion'].to_numpy() // 4).astype(int)] = 0.2
+        return probabilidades
+
+def test_etiqueta_de_predict_y_confianza_de_probabilidades(servicio_analisis_evaluacion):
+    servicio_analisis_evaluacion.modelo = ModeloCalibrado()
+    datos = pd.DataFrame({'comentarios': ['a', 'b'], 'calificacion': [1, 10]})
+
+    resultado = servicio_analisis_evaluacion.realizar_analisis_sentimientos(datos)
+
+    assert resultado['Clasificacion'].tolist() == [-1, 1]
+    assert resultado['Confianza'].tolist() == [0.2, 0.2]
+
+RUTA_MODELO = os.path.join(os.path.dirname(__file__), '..', 'src', 'main', 'clasificador_sentimiento_final.pkl')
+
+@pytest.mark.skipif(not os.path.exists(RUTA_MODELO), reason="No se encontró el modelo entrenado")
+def test_realizar_analisis_sentimientos_en_paralelo():
+    with patch('src.main.negocio.ServicioAnalisisEvaluacion.ServicioAlmacenamiento'):
+        sae = ServicioAnalisisEvaluacion(RUTA_MODELO)
+    datos = pd.DataFrame({
+        'comentarios': ['excelente servicio', 'muy mala atencion', 'regular', 'todo bien gracias', 'tardaron mucho'] * 3,
+        'calificacion': [10, 1, 5, 9, 3] * 3
+    })
+    try:
+        serie = sae.realizar_analisis_sentimientos(datos)
+        paralelo = sae.realizar_analisis_sentimientos(datos, tamano_lote=4, n_procesos=2)
+    finally:
+        sae.cerrar_procesos()
+
+    assert paralelo.equals(serie)
+
+def test_realizar_analisis_sentimientos_con_cache(servicio_analisis_evaluacion, tmp_path):
+    modelo = ModeloLineal()
+    servicio_analisis_evaluacion.modelo = modelo
+    servicio_analisis_evaluacion.cache_predicciones = CachePredicciones(str(tmp_path / 'cache.sqlite'))
+    primeros = pd.DataFrame({'comentarios': ['a', 'b'], 'calificacion': [1, 5]})
+    segundos = pd.DataFrame({'comentarios': ['b', 'c', 'a'], 'calificacion': [5, 10, 1]})
+
+    servicio_analisis_evaluacion.realizar_analisis_sentimientos(primeros)
+    resultado = servicio_analisis_evaluacion.realizar_analisis_sentimientos(segundos)
+
+    assert modelo.lotes == [2, 1]
+    assert resultado['Clasificacion'].tolist() == [0, 1, -1]
+    assert resultado['Clasificacion'].dtype.kind == 'i'
+    assert resultado['Confianza'].tolist() == [1.0, 1.0, 1.0]
+    estadisticas = servicio_analisis_evaluacion.estadisticas_cache_predicciones()
+    assert estadisticas['aciertos'] == 2
+    assert estadisticas['fallos'] == 3
+    servicio_analisis_evaluacion.cache_predicciones.cerrar()
+
+def test_realizar_analisis_sentimientos_deduplica(servicio_analisis_evaluacion):
+    modelo = ModeloLineal()
+    servicio_analisis_evaluacion.modelo = modelo
+    datos = pd.DataFrame({
+        'comentarios': ['a', 'b', 'a', 'a', 'b', 'a'],
+        'calificacion': [1, 5, 1, 9, 5, 1]
+    }, index=[10, 11, 12, 13, 14, 15])
+
+    resultado = servicio_analisis_evaluacion.realizar_analisis_sentimientos(datos)
+
+    assert modelo.lotes == [3]
+    assert list(resultado.index) == [10, 11, 12, 13, 14, 15]
+    assert resultado['Clasificacion'].tolist() == [-1, 0, -1, 1, 0, -1]
+
+    sin_deduplicar = servicio_analisis_evaluacion.realizar_analisis_sentimientos(datos, deduplicar=False)
+    assert modelo.lotes == [3, 6]
+    assert sin_deduplicar.equals(resultado)
@@ -0,0 +1,73 @@
+import pytest
+from unittest.mock import MagicMock
+import pandas as pd
+from mysql.connector import Error
+from src.main.negocio.AnalisisGuardado import AnalisisGuardado
+from src.main.negocio.CacheLRU import CacheLRU
+from src.main.datos.AlmacenMySQL import AlmacenMySQL
+
+@pytest.fixture
+def mock_pool():
+    return MagicMock()
+
+@pytest.fixture
+def mock_cursor(mock_pool):
+    conn = MagicMock()
+    cursor = MagicMock()
+    mock_pool.conexion.return_value.__enter__.return_value = conn
+    conn.cursor.return_value.__enter__.return_value = cursor
+    return cursor
+
+@pytest.fixture
+def analisis(mock_pool):
+    return AnalisisGuardado(AlmacenMySQL(mock_pool), 'analisis_prueba', cache=CacheLRU())
+
+def con_lote(mock_cursor, *resultados):
+    """La primera consulta resuelve el lote (id 7) en el catálogo."""
+    mock_cursor.fetchall.side_effect = [[(7,)], *resultados]
+
+def test_busca_el_lote_en_el_catalogo(mock_cursor, analisis):
+    con_lote(mock_cursor)
+    assert analisis.lote_id() == 7
+    assert analisis.lote_id() == 7
+    sql, parametros = mock_cursor.execute.call_args[0]
+    assert 'FROM catalogo_analisis WHERE nombre = %s' in sql
+    assert parametros == ('analisis_prueba',)
+    mock_cursor.execute.assert_called_once()
+
+def test_conteo_por_clase_usa_group_by_y_cache(mock_cursor, analisis):
+    con_lote(mock_cursor, [('Promotor', 7), ('Detractor', 3)])
+    conteo = analisis.conteo_por_clase()
+    assert conteo.to_dict('list') == {'Clasificacion': ['Promotor', 'Detractor'], 'cantidad': [7, 3]}
+    sql, parametros = mock_cursor.execute.call_args[0]
+    assert 'WHERE lote_id = %s' in sql and 'GROUP BY Clasificacion' in sql
+    assert parametros == (7,)
+    assert analisis.total() == 10
+    assert mock_cursor.execute.call_count == 2
+
+def test_resumen_por_clase(mock_cursor, analisis):
+    con_lote(mock_cursor, [('Detractor', 1, 10.0), ('Promotor', 3, 20.0)])
+    resumen = analisis.resumen_por_clase()
+    assert resumen['Porcentaje'].tolist() == [25.0, 75.0]
+    assert resumen['LongitudPromedio'].tolist() == [10.0, 20.0]
+
+def test_histograma_rellena_contenedores_vacios(mock_cursor, analisis):
+    con_lote(mock_cursor, [('Neutro', 0, 4, 0, 150), ('Neutro', 14, 1, 0, 150), ('Promotor', 3, 2, 0, 150)])
+    histograma = analisis.histograma_longitud()
+    assert len(histograma) == 2 * AnalisisGuardado.CONTENEDORES_HISTOGRAMA
+    assert histograma['conteo'].sum() == 7
+    assert histograma['inicio'].iloc[0] == 0 and histograma['fin'].iloc[-1] == 150
+
+def test_pagina_usa_paginacion_por_llave(mock_cursor, analisis):
+    con_lote(mock_cursor, [(11, 'muy bueno', 5.0, 'Promotor', 9)])
+    pagina = analisis.pagina(tamano=10, despues_de=10, clase='Promotor')
+    sql, parametros = mock_cursor.execute.call_args[0]
+    assert 'WHERE lote_id = %s AND id > %s AND Clasificacion = %s ORDER BY id LIMIT %s' in sql
+    assert parametros == (7, 10, 'Promotor', 10)
+    assert pagina['longitud'].tolist() == [9]
+
+def test_error_devuelve_agregado_vacio_sin_guardarlo(mock_pool, analisis):
+    mock_pool.conexion.side_effect = Error("sin conexión")
+    assert analisis.conteo_por_clase().empty
+    assert analisis.pagina().empty
+    assert analisis.cache.estadisticas()['entradas'] == 0
@@ -0,0 +1,66 @@
+import pytest
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+from src.main.negocio.CacheLRU import CacheLRU
+
+def test_guardar_y_obtener():
+    cache = CacheLRU()
+    cache.guardar('a', 1)
+    assert cache.obtener('a') == 1
+    assert cache.obtener('b', 'nada') == 'nada'
+    estadisticas = cache.estadisticas()
+    assert estadisticas['aciertos'] == 1
+    assert estadisticas['fallos'] == 1
+
+def test_desaloja_la_entrada_menos_usada():
+    cache = CacheLRU(max_entradas=2)
+    cache.guardar('a', 1)
+    cache.guardar('b', 2)
+    cache.obtener('a')
+    cache.guardar('c', 3)
+    assert cache.obtener('b') is None
+    assert cache.obtener('a') == 1
+    assert cache.obtener('c') == 3
+
+def test_respeta_limite_de_memoria():
+    cache = CacheLRU(max_bytes=100)
+    cache.guardar('a', b'x' * 60)
+    cache.guardar('b', b'x' * 60)
+    assert cache.obtener('a') is None
+    assert cache.obtener('b') == b'x' * 60
+    cache.guardar('grande', b'x' * 200)
+    assert cache.obtener('grande') is None
+    assert cache.estadisticas()['bytes'] == 60
+
+def test_estimar_tamano_cuenta_los_arreglos():
+    arreglo = np.zeros(10_000, dtype=np.int64)
+    assert CacheLRU.estimar_tamano(arreglo) == 80_000
+    assert CacheLRU.estimar_tamano({'a': arreglo, 'b': arreglo[:5_000]}) > 120_000
+
+def test_expiracion_por_ttl():
+    cache = CacheLRU(ttl_segundos=10)
+    with patch('src.main.negocio.CacheLRU.time.monotonic', return_value=100.0):
+        cache.guardar('a', 1)
+    with patch('src.main.negocio.CacheLRU.time.monotonic', return_value=105.0):
+        assert cache.obtener('a') == 1
+    with patch('src.main.negocio.CacheLRU.time.monotonic', return_value=111.0):
+        assert cache.obtener('a') is None
+    assert cache.estadisticas()['entradas'] == 0
+
+def test_obtener_o_calcular():
+    cache = CacheLRU()
+    llamadas = []
+    calcular = lambda: llamadas.append(1) or pd.DataFrame({'a': [1, 2]})
+    cache.obtener_o_calcular('df', calcular)
+    cache.obtener_o_calcular('df', calcular)
+    assert len(llamadas) == 1
+
+def test_invalidar_y_limpiar():
+    cache = CacheLRU()
+    cache.guardar('a', 1)
+    cache.guardar('b', 2)
+    cache.invalidar('a')
+    assert cache.obtener('a') is None
+    cache.limpiar()
+    assert cache.estadisticas()['entradas'] == 0
@@ -0,0 +1,46 @@
+import pytest
+import numpy as np
+from src.main.datos.CachePredicciones import CachePredicciones
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = CachePredicciones(str(tmp_path / 'predicciones.sqlite'), max_entradas=3)
+    yield cache
+    cache.cerrar()
+
+def test_calcular_claves_normaliza_calificacion():
+    claves = CachePredicciones.calcular_claves(['todo bien', 'todo bien', 'todo bien'], [9, 9.0, 8], 'v1')
+    assert claves[0] == claves[1]
+    assert claves[0] != claves[2]
+    assert claves[0] != CachePredicciones.calcular_claves(['todo bien'], [9], 'v2')[0]
+
+def test_guardar_y_buscar(cache):
+    cache.guardar(['a', 'b'], np.array([1, -1]), np.array([0.5, 0.25]))
+
+    encontrados = cache.buscar(['a', 'b', 'c'])
+
+    assert encontrados == {'a': (1, 0.5), 'b': (-1, 0.25)}
+    assert isinstance(encontrados['a'][0], int)
+    estadisticas = cache.estadisticas()
+    assert estadisticas['aciertos'] == 2
+    assert estadisticas['fallos'] == 1
+
+def test_desaloja_las_menos_usadas(cache, monkeypatch):
+    instantes = iter(range(100))
+    monkeypatch.setattr('src.main.datos.CachePredicciones.time.time', lambda: next(instantes))
+    cache.guardar(['a', 'b', 'c'], ['Promotor', 'Neutro', 'Detractor'])
+    cache.buscar(['a'])
+    cache.guardar(['d'], ['Promotor'])
+
+    assert cache.estadisticas()['entradas'] == 3
+    assert set(cache.buscar(['a', 'b', 'c', 'd'])) == {'a', 'c', 'd'}
+
+def test_persiste_entre_instancias(tmp_path):
+    ruta = str(tmp_path / 'cache' / 'predicciones.sqlite')
+    primera = CachePredicciones(ruta)
+    primera.guardar(['a'], [0], [None])
+    primera.cerrar()
+
+    segunda = CachePredicciones(ruta)
+    assert segunda.buscar(['a']) == {'a': (0, None)}
+    segunda.cerrar()
@@ -0,0 +1,39 @@
+import os
+import pytest
+import pandas as pd
+from src.main.negocio.CacheResultados import CacheResultados
+
+@pytest.fixture
+def resultado():
+    df = pd.DataFrame({'comentarios': ['muy bueno'], 'Clasificacion': ['Promotor']})
+    return df, "Archivo procesado.", True
+
+def test_solo_memoria(resultado):
+    cache = CacheResultados()
+    assert cache.obtener('abc') is None
+    cache.guardar('abc', resultado)
+    assert cache.obtener('abc') is resultado
+    assert cache.estadisticas()['aciertos'] == 1
+
+def test_nivel_en_disco_sobrevive_a_una_nueva_instancia(tmp_path, resultado):
+    CacheResultados(directorio=str(tmp_path)).guardar('abc', resultado)
+    assert os.path.exists(tmp_path / 'abc.pkl')
+
+    cache = CacheResultados(directorio=str(tmp_path))
+    df, mensaje, valido = cache.obtener('abc')
+    pd.testing.assert_frame_equal(df, resultado[0])
+    assert mensaje == resultado[1] and valido
+    # Lo leído de disco se promueve a memoria
+    assert cache.memoria.obtener('abc') is not None
+
+def test_limita_archivos_en_disco(tmp_path, resultado):
+    cache = CacheResultados(directorio=str(tmp_path), max_archivos=2)
+    for i, clave in enumerate(['a', 'b', 'c']):
+        cache.guardar(clave, resultado)
+        os.utime(tmp_path / f'{clave}.pkl', (i, i))
+    cache._desalojar_disco()
+    assert sorted(os.listdir(tmp_path)) == ['b.pkl', 'c.pkl']
+
+def test_archivo_corrupto_cuenta_como_fallo(tmp_path):
+    (tmp_path / 'abc.pkl').write_bytes(b'no es pickle')
+    assert CacheResultados(directorio=str(tmp_path)).obtener('abc') is None
@@ -0,0 +1,63 @@
+import base64
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from src.main.negocio.ResumenAnalisis import ResumenAnalisis
+from src.main.presentacion.vista import charts
+
+COLORES = {'Promotor': '#35b779', 'Neutro': '#31688e', 'Detractor': '#440154'}
+
+
+def df_aleatorio(filas: int) -> pd.DataFrame:
+    rng = np.random.default_rng(filas)
+    return pd.DataFrame({
+        'Clasificacion': rng.choice(['Promotor', 'Neutro', 'Detractor'], filas),
+        'longitud': rng.integers(1, 400, filas),
+    })
+
+
+def puntos(valores) -> int:
+    """Número de valores de un arreglo de una figura (plotly los codifica en binario)."""
+    if isinstance(valores, dict):
+        return len(base64.b64decode(valores['bdata'])) // np.dtype(valores['dtype']).itemsize
+    return len(valores)
+
+
+@pytest.fixture(autouse=True)
+def cache_vacia(monkeypatch):
+    monkeypatch.setattr(charts, '_cache_figuras', charts.CacheLRU(max_entradas=8))
+
+
+def test_figuras_no_crecen_con_el_numero_de_filas():
+    tamanos = []
+    for filas in [100, 100000]:
+        resumen = ResumenAnalisis(df_aleatorio(filas))
+        figuras = charts.construir_figuras(resumen.conteo, resumen.histograma, COLORES)
+        histograma = json.loads(figuras['histograma'])
+        # Una barra por contenedor, no un valor por comentario
+        assert sum(puntos(traza['x']) for traza in histograma['data']) == \
+            3 * ResumenAnalisis.CONTENEDORES_HISTOGRAMA
+        tamanos.append(sum(len(f) for f in figuras.values()))
+    assert tamanos[1] < tamanos[0] * 1.2
+
+
+def test_figuras_se_construyen_una_vez_por_agregados(monkeypatch):
+    llamadas = []
+    original = charts.construir_figuras
+
+    def contar(conteo, histograma, colores):
+        llamadas.append(len(histograma))
+        return original(conteo, histograma, colores)
+
+    monkeypatch.setattr(charts, 'construir_figuras', contar)
+    resumen = ResumenAnalisis(df_aleatorio(500))
+
+    primero = charts.obtener_figuras(resumen.conteo, resumen.histograma, COLORES)
+    assert charts.obtener_figuras(resumen.conteo.copy(), resumen.histograma.copy(), COLORES) is primero
+    assert len(llamadas) == 1
+
+    otro = ResumenAnalisis(df_aleatorio(600))
+    charts.obtener_figuras(otro.conteo, otro.histograma, COLORES)
+    assert len(llamadas) == 2
@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+from src.main.negocio.DatasetsCompartidos import DatasetsCompartidos
+
+
+@pytest.fixture
+def df_clasificado():
+    return pd.DataFrame({
+        'comentarios': ['excelente servicio', 'malo', 'regular'],
+        'calificacion': [5, 1, 3],
+        'Clasificacion': ['Promotor', 'Detractor', 'Neutro'],
+    })
+
+
+def test_sesiones_comparten_una_copia(df_clasificado):
+    datasets = DatasetsCompartidos()
+    cargas = []
+
+    def cargar():
+        cargas.append(1)
+        return df_clasificado
+
+    sesion_1 = datasets.vista('archivo', cargar)
+    sesion_2 = datasets.vista('archivo', cargar)
+
+    assert len(cargas) == 1
+    assert sesion_1 is not sesion_2
+    assert sesion_1.attrs['clave_dataset'] == 'archivo'
+    assert sesion_1['longitud'].tolist() == [18, 4, 7]
+    # Una columna agregada por una sesión no aparece en la otra
+    sesion_1['extra'] = 1
+    assert 'extra' not in sesion_2.columns
+    with pytest.raises(ValueError):
+        sesion_2.loc[0, 'longitud'] = 0
+    # Escribir texto en la vista de una sesión no cambia la de las demás
+    sesion_1.loc[0, 'comentarios'] = 'zz'
+    assert sesion_2.loc[0, 'comentarios'] == 'excelente servicio'
+    assert datasets.vista('archivo', cargar).loc[0, 'comentarios'] == 'excelente servicio'
+
+
+def test_memoria_sesion_cuenta_lo_compartido_una_vez(df_clasificado):
+    datasets = DatasetsCompartidos()
+    vista = datasets.vista('archivo', lambda: df_clasificado)
+    compartido = datasets.compartido(vista)
+    assert compartido is not None
+
+    memoria = datasets.memoria_sesion([vista, datasets.vista('archivo', lambda: None), 'analisis_1'])
+    assert memoria['compartida'] == compartido.memory_usage(index=True, deep=True).sum()
+    assert 0 < memoria['propia'] < memoria['compartida']
+
+    # Un DataFrame propio (aunque tenga la misma clave) cuenta como de la sesión
+    propio = vista.copy()
+    assert datasets.compartido(propio) is None
+    assert datasets.memoria_sesion([propio]) == {
+        'propia': propio.memory_usage(index=True, deep=True).sum(), 'compartida': 0
+    }
@@ -0,0 +1,60 @@
+import io
+
+import numpy as np
+import openpyxl
+import pandas as pd
+import pytest
+from src.main.negocio.ResumenAnalisis import ResumenAnalisis
+from src.main.presentacion.logica import exportador_excel
+
+
+@pytest.fixture
+def df_clasificado():
+    return pd.DataFrame({
+        'comentarios': ['excelente servicio', 'malo', None, 'me encanto todo'],
+        'calificacion': [5, 1, 3, np.nan],
+        'Clasificacion': ['Promotor', 'Detractor', 'Neutro', 'Promotor'],
+        'longitud': [18, 4, np.nan, 15],
+    })
+
+
+def leer_hoja(contenido: bytes, hoja: str) -> list[list]:
+    libro = openpyxl.load_workbook(io.BytesIO(contenido))
+    return [list(fila) for fila in libro[hoja].values]
+
+
+def test_generar_excel_escribe_datos_y_resumen(df_clasificado, monkeypatch):
+    # Bloques pequeños para recorrer varios en la escritura por filas
+    monkeypatch.setattr(exportador_excel, 'FILAS_POR_BLOQUE', 3)
+    contenido = exportador_excel.generar_excel(df_clasificado, ResumenAnalisis(df_clasificado))
+
+    datos = leer_hoja(contenido, 'Datos')
+    assert datos[0] == ['comentarios', 'calificacion', 'Clasificacion', 'longitud']
+    assert datos[1] == ['excelente servicio', 5, 'Promotor', 18]
+    # Los valores faltantes quedan como celdas vacías
+    assert datos[3] == [None, 3, 'Neutro', None]
+    assert datos[4] == ['me encanto todo', None, 'Promotor', 15]
+    assert len(datos) == 5
+
+    resumen = leer_hoja(contenido, 'Resumen')
+    assert resumen[0] == ['Clasificacion', 'NumComentarios', 'LongitudPromedio', 'Porcentaje']
+    assert [fila[:2] for fila in resumen[1:]] == [['Detractor', 1], ['Neutro', 1], ['Promotor', 2]]
+
+
+def test_obtener_excel_se_genera_una_vez_por_dataset(df_clasificado, monkeypatch):
+    llamadas = []
+    original = exportador_excel.generar_excel
+
+    def contar(df, resumen):
+        llamadas.append(len(df))
+        return original(df, resumen)
+
+    monkeypatch.setattr(exportador_excel, 'generar_excel', contar)
+    monkeypatch.setattr(exportador_excel, '_cache', exportador_excel.CacheLRU(max_entradas=4))
+
+    primero = exportador_excel.obtener_excel(df_clasificado)
+    assert exportador_excel.obtener_excel(df_clasificado.copy()) is primero
+    assert llamadas == [4]
+
+    exportador_excel.obtener_excel(df_clasificado.iloc[:2])
+    assert llamadas == [4, 2]
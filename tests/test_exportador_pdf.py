@@ -0,0 +1,62 @@
+import re
+import zlib
+
+import numpy as np
+import pandas as pd
+import pytest
+from src.main.negocio.ResumenAnalisis import ResumenAnalisis
+from src.main.presentacion.logica import exportador_pdf
+
+
+@pytest.fixture
+def df_clasificado():
+    return pd.DataFrame({
+        'comentarios': ['excelente servicio (rápido)', 'malo', 'normal', 'me encantó todo 😀'],
+        'calificacion': [5, 1, np.nan, 5],
+        'Clasificacion': ['Promotor', 'Detractor', 'Neutro', 'Promotor'],
+        'longitud': [27, 4, 6, 18],
+    })
+
+
+def contenido_paginas(pdf: bytes) -> list[str]:
+    return [zlib.decompress(m.group(1)).decode('latin-1')
+            for m in re.finditer(rb'stream\n(.*?)\nendstream', pdf, re.S)]
+
+
+def test_generar_pdf_es_un_pdf_valido(df_clasificado):
+    pdf = exportador_pdf.generar_pdf(df_clasificado, ResumenAnalisis(df_clasificado))
+    assert pdf.startswith(b'%PDF-1.4') and pdf.rstrip().endswith(b'%%EOF')
+
+    # Cada entrada de la tabla xref apunta al inicio de su objeto
+    inicio_xref = int(re.search(rb'startxref\n(\d+)', pdf).group(1))
+    entradas = pdf[inicio_xref:].split(b'trailer')[0].split(b'\n')[3:]
+    posiciones = [int(e[:10]) for e in entradas if e.strip()]
+    for numero, posicion in enumerate(posiciones, start=1):
+        assert pdf[posicion:].startswith(f"{numero} 0 obj".encode())
+    assert b'/Count 2' in pdf
+
+
+def test_generar_pdf_incluye_resumen_y_comentarios(df_clasificado):
+    paginas = contenido_paginas(exportador_pdf.generar_pdf(df_clasificado, ResumenAnalisis(df_clasificado)))
+    assert len(paginas) == 2
+    assert '(Promotor) Tj' in paginas[0]
+    assert '(50.0 %) Tj' in paginas[0]
+    # Paréntesis escapados, acentos en WinAnsi y caracteres no representables sustituidos
+    assert '(excelente servicio \\(rápido\\)) Tj' in paginas[1]
+    assert '(me encantó todo ?) Tj' in paginas[1]
+
+
+def test_obtener_pdf_se_genera_una_vez_por_dataset(df_clasificado, monkeypatch):
+    llamadas = []
+    original = exportador_pdf.generar_pdf
+
+    def contar(df, resumen):
+        llamadas.append(len(df))
+        return original(df, resumen)
+
+    monkeypatch.setattr(exportador_pdf, 'generar_pdf', contar)
+    monkeypatch.setattr(exportador_pdf, '_cache', exportador_pdf.CacheLRU(max_entradas=4))
+
+    primero = exportador_pdf.obtener_pdf(df_clasificado)
+    assert exportador_pdf.obtener_pdf(df_clasificado.copy()) is primero
+    assert llamadas == [4]
@@ -0,0 +1,94 @@
+import pytest
+import pandas as pd
+from src.main.datos.FormatosArchivo import FormatoArchivo, FormatoParquet, obtener_formato, formato_por_ruta
+from src.main.datos.GuardarDatosArchivo import GuardarDatosArchivo
+
+pytest.importorskip('pyarrow')
+
+@pytest.fixture
+def datos():
+    return pd.DataFrame({
+        'comentarios': ['muy bueno', 'malo', 'regular', None],
+        'calificacion': [5.0, 1.0, None, 3.0],
+        'Clasificacion': ['Promotor', 'Detractor', 'Neutro', 'Promotor'],
+        'longitud': [9, 4, 7, 0],
+    })
+
+@pytest.fixture
+def guardado_parquet(tmp_path):
+    return GuardarDatosArchivo(directorio_base=str(tmp_path), formato='parquet')
+
+def test_formatos_registrados():
+    assert obtener_formato('CSV').extension == 'csv'
+    assert formato_por_ruta('x/enero_limpio.parquet').nombre == 'parquet'
+    with pytest.raises(ValueError):
+        obtener_formato('xml')
+
+def test_formato_incompleto_falla_al_crearse():
+    class FormatoSinValidar(FormatoArchivo):
+        def escribir(self, datos, ruta):
+            pass
+
+        def leer(self, ruta, columnas=None):
+            return pd.DataFrame()
+
+    with pytest.raises(TypeError, match='validar'):
+        FormatoSinValidar()
+
+def test_parquet_ida_y_vuelta_con_tipos_compactos(guardado_parquet, datos):
+    exito, _ = guardado_parquet.guardar_datos_limpios(datos, 'enero')
+    assert exito
+
+    leido = guardado_parquet.cargar_datos('enero')
+    assert str(leido['Clasificacion'].dtype) == 'category'
+    assert str(leido['calificacion'].dtype) == 'Int8'
+    assert leido['comentarios'].tolist()[:3] == datos['comentarios'].tolist()[:3]
+    assert leido['calificacion'].isna().tolist() == [False, False, True, False]
+
+def test_parquet_lee_solo_las_columnas_pedidas(guardado_parquet, datos):
+    guardado_parquet.guardar_datos_limpios(datos, 'enero')
+    leido = guardado_parquet.cargar_datos('enero', columnas=['Clasificacion'])
+    assert list(leido.columns) == ['Clasificacion']
+
+def test_calificacion_no_entera_se_conserva(guardado_parquet, datos):
+    datos['calificacion'] = [4.5, 1.0, 2.0, 3.0]
+    guardado_parquet.guardar_datos_limpios(datos, 'enero')
+    assert guardado_parquet.cargar_datos('enero')['calificacion'].tolist() == [4.5, 1.0, 2.0, 3.0]
+
+def test_validar_integridad_parquet(guardado_parquet, datos):
+    guardado_parquet.guardar_datos_limpios(datos, 'enero')
+    ruta = guardado_parquet.ruta_archivo('enero')
+    assert guardado_parquet.validar_integridad_datos(ruta)
+    assert guardado_parquet.validar_integridad_datos(ruta, profundo=True)
+
+    # Cambiar un byte de los datos invalida la suma de verificación de su página
+    contenido = bytearray(open(ruta, 'rb').read())
+    contenido[10] ^= 0xFF
+    open(ruta, 'wb').write(bytes(contenido))
+    assert not guardado_parquet.validar_integridad_datos(ruta)
+
+def test_validacion_profunda_compara_el_sha256(guardado_parquet, datos):
+    guardado_parquet.guardar_datos_limpios(datos, 'enero')
+    ruta = guardado_parquet.ruta_archivo('enero')
+    with open(f"{ruta}.sha256", 'w', encoding='utf-8') as archivo:
+        archivo.write('0' * 64)
+
+    # La validación normal no lee el archivo completo para calcular el SHA-256
+    assert FormatoParquet().validar(ruta)[0]
+    valido, razon = FormatoParquet().validar(ruta, profundo=True)
+    assert not valido and 'SHA-256' in razon
+
+def test_validar_integridad_pie_danado(guardado_parquet, datos):
+    guardado_parquet.guardar_datos_limpios(datos, 'enero')
+    ruta = guardado_parquet.ruta_archivo('enero')
+    contenido = open(ruta, 'rb').read()
+    open(ruta, 'wb').write(contenido[:-20])
+    valido, razon = FormatoParquet().validar(ruta)
+    assert not valido and 'Pie' in razon
+
+def test_csv_sigue_siendo_el_formato_por_defecto(tmp_path, datos):
+    guardado = GuardarDatosArchivo(directorio_base=str(tmp_path))
+    guardado.guardar_datos_limpios(datos, 'enero')
+    assert guardado.ruta_archivo('enero').endswith('enero_limpio.csv')
+    assert guardado.validar_integridad_datos(guardado.ruta_archivo('enero'))
+    assert guardado.cargar_datos('enero', columnas=['comentarios']).shape == (4, 1)
@@ -0,0 +1,115 @@
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock
+import pandas as pd
+from src.main.negocio.ServicioGuardadoSegundoPlano import ServicioGuardadoSegundoPlano
+
+@pytest.fixture
+def datos():
+    return pd.DataFrame({
+        'comentarios': ['bueno', 'malo'],
+        'calificacion': [5.0, 1.0],
+        'Clasificacion': ['Promotor', 'Detractor']
+    })
+
+@pytest.fixture
+def almacenamiento():
+    almacenamiento = MagicMock()
+    almacenamiento.guardar_analisis_csv.return_value = (True, "CSV ok")
+
+    def guardar_bd(datos, nombre, progreso=None, **kwargs):
+        progreso(len(datos), len(datos))
+        return True, "BD ok"
+    almacenamiento.guardar_analisis_mysql.side_effect = guardar_bd
+    return almacenamiento
+
+@pytest.fixture
+def guardado(almacenamiento):
+    servicio = ServicioGuardadoSegundoPlano(almacenamiento, reintentos_bd=2, espera_reintento=0)
+    yield servicio
+    servicio.cerrar()
+
+def test_guardado_completo(guardado, almacenamiento, datos):
+    id_trabajo = guardado.encolar(datos, 'enero', 'analisis_enero')
+    trabajo = guardado.esperar(id_trabajo, tiempo_maximo=5)
+
+    assert trabajo['estado'] == 'completado'
+    assert trabajo['bd']['filas'] == 2
+    assert trabajo['archivo']['mensaje'] == "CSV ok"
+    assert not guardado.en_curso([id_trabajo])
+    almacenamiento.guardar_analisis_csv.assert_called_once_with(datos, 'enero', modo='combinar')
+    kwargs = almacenamiento.guardar_analisis_mysql.call_args.kwargs
+    assert kwargs['reintentos'] == 2
+    assert kwargs['modo'] == 'combinar'
+
+def test_encolar_no_espera_al_guardado(guardado, almacenamiento, datos):
+    liberar = threading.Event()
+    almacenamiento.guardar_analisis_mysql.side_effect = lambda *a, **k: (liberar.wait(5), "BD ok")
+
+    id_trabajo = guardado.encolar(datos, 'enero', 'analisis_enero')
+    assert guardado.en_curso([id_trabajo])
+    # El archivo se escribe mientras la base de datos sigue ocupada
+    assert guardado.esperar(id_trabajo, tiempo_maximo=0.2)['estado'] == 'guardando'
+    assert guardado.estado(id_trabajo)['archivo']['estado'] == 'completado'
+
+    liberar.set()
+    assert guardado.esperar(id_trabajo, tiempo_maximo=5)['estado'] == 'completado'
+
+def test_error_en_una_parte_marca_el_trabajo(guardado, almacenamiento, datos):
+    almacenamiento.guardar_analisis_csv.side_effect = OSError("disco lleno")
+    trabajo = guardado.esperar(guardado.encolar(datos, 'enero', 'analisis_enero'), tiempo_maximo=5)
+
+    assert trabajo['estado'] == 'error'
+    assert "disco lleno" in trabajo['archivo']['mensaje']
+    assert trabajo['bd']['estado'] == 'completado'
+
+def test_trabajo_desconocido(guardado):
+    assert guardado.estado('guardado-999') is None
+    assert not guardado.en_curso(['guardado-999'])
+
+def test_mismo_analisis_no_se_encola_dos_veces(guardado, almacenamiento, datos):
+    liberar = threading.Event()
+    almacenamiento.guardar_analisis_mysql.side_effect = lambda *a, **k: (liberar.wait(5), "BD ok")
+
+    primero = guardado.encolar(datos, 'enero', 'analisis_enero')
+    assert guardado.encolar(datos, 'enero', 'analisis_enero') == primero
+    liberar.set()
+    guardado.esperar(primero, tiempo_maximo=5)
+
+    assert almacenamiento.guardar_analisis_mysql.call_count == 1
+    assert almacenamiento.guardar_analisis_csv.call_count == 1
+
+class AlmacenamientoSinTransacciones:
+    """Combina leyendo lo guardado y escribiendo después, como dos conexiones del pool."""
+
+    def __init__(self):
+        self.tablas = {}
+        self.archivos = {}
+
+    @staticmethod
+    def _combinar(destino, datos):
+        existentes = set(destino)
+        time.sleep(0.05)
+        destino.extend(c for c in datos['comentarios'] if c not in existentes)
+
+    def guardar_analisis_csv(self, datos, nombre, modo):
+        self._combinar(self.archivos.setdefault(nombre, []), datos)
+        return True, "CSV ok"
+
+    def guardar_analisis_mysql(self, datos, nombre, **kwargs):
+        self._combinar(self.tablas.setdefault(nombre, []), datos)
+        return True, "BD ok"
+
+def test_guardar_dos_veces_el_mismo_analisis_no_duplica_filas(datos):
+    almacenamiento = AlmacenamientoSinTransacciones()
+    guardado = ServicioGuardadoSegundoPlano(almacenamiento, max_hilos=4)
+    try:
+        ids = [guardado.encolar(datos, 'enero', 'analisis_enero') for _ in range(2)]
+        ids.append(guardado.encolar(datos.copy(), 'enero', 'analisis_enero'))
+        for id_trabajo in ids:
+            assert guardado.esperar(id_trabajo, tiempo_maximo=5)['estado'] == 'completado'
+    finally:
+        guardado.cerrar()
+    assert len(almacenamiento.tablas['analisis_enero']) == len(datos)
+    assert len(almacenamiento.archivos['enero']) == len(datos)
@@ -0,0 +1,90 @@
+import pytest
+import numpy as np
+import pandas as pd
+from src.main.datos.HuellaFilas import calcular_huellas, calcular_delta
+from src.main.datos.GuardarDatosArchivo import GuardarDatosArchivo
+
+@pytest.fixture
+def datos():
+    return pd.DataFrame({
+        'comentarios': ['bueno', 'malo', 'bueno', None],
+        'calificacion': [9.0, 2.0, 9.0, 5.0],
+        'Clasificacion': ['Promotor', 'Detractor', 'Promotor', 'Neutro'],
+    })
+
+def test_huellas_distinguen_filas_repetidas(datos):
+    huellas = calcular_huellas(datos)
+    assert huellas.dtype == np.int64
+    assert len(set(huellas)) == 4
+
+def test_huellas_no_dependen_del_tipo_ni_de_la_clase(datos):
+    otro = datos.astype({'calificacion': 'Int8', 'Clasificacion': 'category'})
+    otro['Clasificacion'] = otro['Clasificacion'].cat.rename_categories(lambda c: c.upper())
+    assert (calcular_huellas(otro) == calcular_huellas(datos)).all()
+
+def test_delta(datos):
+    huellas = calcular_huellas(datos)
+    existentes = pd.DataFrame({
+        'id': [10, 11, 12, 13],
+        'huella': [int(huellas[0]), int(huellas[1]), 999, None],
+        'Clasificacion': ['Promotor', 'Neutro', 'Neutro', 'Neutro'],
+    }, dtype=object)
+
+    delta = calcular_delta(existentes, datos, huellas)
+
+    assert sorted(delta['eliminar']) == [12, 13]
+    assert delta['actualizar'] == [('Detractor', 11)]
+    assert delta['insertar'].tolist() == [2, 3]
+    assert delta['sin_cambios'] == 1
+
+@pytest.fixture
+def guardado_csv(tmp_path):
+    return GuardarDatosArchivo(directorio_base=str(tmp_path))
+
+def test_combinar_archivo_agrega_solo_filas_nuevas(guardado_csv, datos):
+    guardado_csv.combinar_datos(datos.iloc[:2], 'enero')
+    ruta = guardado_csv.ruta_archivo('enero')
+
+    exito, msg = guardado_csv.combinar_datos(datos, 'enero')
+
+    assert exito and '2 nuevas, 0 actualizadas, 0 eliminadas, 2 sin cambios' in msg
+    leido = guardado_csv.cargar_datos('enero')
+    assert leido['comentarios'].tolist()[:3] == ['bueno', 'malo', 'bueno']
+    assert len(leido) == 4
+    assert open(ruta, encoding='utf-8').read().count('﻿') == 1
+
+def test_combinar_archivo_sin_cambios_no_lo_reescribe(guardado_csv, datos):
+    guardado_csv.combinar_datos(datos, 'enero')
+    ruta = guardado_csv.ruta_archivo('enero')
+    antes = open(ruta, 'rb').read()
+    exito, msg = guardado_csv.combinar_datos(datos.copy(), 'enero')
+    assert exito and '4 sin cambios' in msg
+    assert open(ruta, 'rb').read() == antes
+
+def test_combinar_archivo_reescribe_si_hay_eliminadas(guardado_csv, datos):
+    guardado_csv.combinar_datos(datos, 'enero')
+    exito, msg = guardado_csv.combinar_datos(datos.iloc[1:], 'enero')
+    assert exito
+    assert len(guardado_csv.cargar_datos('enero')) == 3
+
+def test_archivo_conserva_sus_columnas_y_las_huellas_van_aparte(guardado_csv, datos):
+    datos = datos.assign(longitud=datos['comentarios'].str.len(), palabras=1, Confianza=0.9)
+    guardado_csv.combinar_datos(datos.iloc[:2], 'enero')
+    guardado_csv.combinar_datos(datos, 'enero')
+    ruta = guardado_csv.ruta_archivo('enero')
+
+    encabezado = open(ruta, encoding='utf-8-sig').readline().strip()
+    assert encabezado == 'comentarios,calificacion,Clasificacion,longitud'
+    assert (np.load(ruta + '.huellas.npy') == calcular_huellas(datos)).all()
+
+def test_archivo_sin_huellas_aparte_se_reescribe(guardado_csv, datos):
+    ruta = guardado_csv.ruta_archivo('enero')
+    # Archivo escrito con la columna 'huella' y sin `<archivo>.huellas.npy`
+    datos.assign(huella=calcular_huellas(datos)).to_csv(ruta, index=False, encoding='utf-8-sig')
+
+    exito, msg = guardado_csv.combinar_datos(datos, 'enero')
+
+    assert exito
+    assert 'huella' not in guardado_csv.cargar_datos('enero').columns
+    assert (np.load(ruta + '.huellas.npy') == calcular_huellas(datos)).all()
+    assert '4 sin cambios' in guardado_csv.combinar_datos(datos, 'enero')[1]
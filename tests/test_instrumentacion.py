@@ -0,0 +1,130 @@
+import json
+import pstats
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+from src.main.negocio.Instrumentacion import Instrumentacion
+from src.main.negocio.MarcoAnalisis import MarcoAnalisis
+from src.main.negocio import ServicioLimpiarDatos as modulo_limpiar
+from src.main.presentacion.logica import exportador_excel
+
+
+@pytest.fixture
+def sin_tracemalloc():
+    yield
+    tracemalloc.stop()
+
+
+def test_etapa_registra_tiempo_filas_y_nivel():
+    instrumentacion = Instrumentacion()
+    with instrumentacion.etapa('clasificacion', filas_entrada=10) as externa:
+        with instrumentacion.etapa('prediccion', filas_entrada=4) as interna:
+            interna.filas_salida = 4
+        externa.filas_salida = 9
+
+    interna, externa = instrumentacion.registros()
+    assert (interna['etapa'], interna['nivel'], interna['filas_salida']) == ('prediccion', 1, 4)
+    assert (externa['etapa'], externa['nivel']) == ('clasificacion', 0)
+    assert (externa['filas_entrada'], externa['filas_salida']) == (10, 9)
+    assert externa['segundos'] >= interna['segundos'] >= 0
+    assert externa['memoria_pico_mb'] is None and externa['error'] is None
+
+
+def test_memoria_pico_incluye_etapas_internas(sin_tracemalloc):
+    instrumentacion = Instrumentacion(medir_memoria=True)
+    with instrumentacion.etapa('externa'):
+        with instrumentacion.etapa('interna'):
+            arreglo = np.ones(2 * 1024 * 1024)  # 16 MB
+            del arreglo
+        pequeno = np.ones(1024)
+        del pequeno
+
+    interna, externa = instrumentacion.registros()
+    assert interna['memoria_pico_mb'] >= 15
+    assert externa['memoria_pico_mb'] >= interna['memoria_pico_mb']
+
+
+def test_error_se_registra_y_se_propaga():
+    instrumentacion = Instrumentacion()
+    with pytest.raises(KeyError):
+        with instrumentacion.etapa('carga_analisis'):
+            raise KeyError('x')
+    assert instrumentacion.registros()[0]['error'] == 'KeyError'
+
+
+def test_metricas_se_agregan_al_archivo(tmp_path):
+    ruta = tmp_path / 'metricas' / 'etapas.jsonl'
+    instrumentacion = Instrumentacion(ruta_metricas=str(ruta), max_registros=1)
+    for filas in [3, 5]:
+        with instrumentacion.etapa('limpieza', filas_entrada=filas):
+            pass
+
+    lineas = [json.loads(linea) for linea in ruta.read_text(encoding='utf-8').splitlines()]
+    assert [linea['filas_entrada'] for linea in lineas] == [3, 5]
+    # En memoria solo se conservan las más recientes
+    assert len(instrumentacion.registros()) == 1
+
+
+def test_resumen_agrega_por_etapa():
+    instrumentacion = Instrumentacion()
+    for filas in [10, 20]:
+        with instrumentacion.etapa('limpieza', filas_entrada=filas) as etapa:
+            etapa.filas_salida = filas // 2
+    with instrumentacion.etapa('validacion'):
+        pass
+
+    resumen = instrumentacion.resumen().set_index('etapa')
+    assert resumen.loc['limpieza', 'veces'] == 2
+    assert resumen.loc['limpieza', 'filas_entrada'] == 30
+    assert resumen.loc['limpieza', 'filas_salida'] == 15
+    assert pd.isna(resumen.loc['validacion', 'filas_entrada'])
+
+    instrumentacion.limpiar()
+    assert instrumentacion.resumen().empty
+
+
+def test_perfil_solo_de_etapas_de_primer_nivel(tmp_path):
+    instrumentacion = Instrumentacion(perfilador='cprofile', directorio_perfiles=str(tmp_path))
+    with instrumentacion.etapa('exportar_excel'):
+        with instrumentacion.etapa('interna'):
+            sorted(range(1000), reverse=True)
+
+    interna, externa = instrumentacion.registros()
+    assert interna['perfil'] is None
+    assert externa['perfil'].endswith('.prof')
+    funciones = {funcion for _, _, funcion in pstats.Stats(externa['perfil']).stats}
+    assert 'sorted' in ' '.join(funciones)
+
+
+def test_desde_entorno(monkeypatch, tmp_path):
+    monkeypatch.setenv('GSSP_METRICAS', str(tmp_path / 'm.jsonl'))
+    monkeypatch.setenv('GSSP_PERFIL', 'cProfile')
+    monkeypatch.delenv('GSSP_MEMORIA', raising=False)
+    instrumentacion = Instrumentacion.desde_entorno()
+    assert instrumentacion.ruta_metricas == str(tmp_path / 'm.jsonl')
+    assert instrumentacion.perfilador == 'cprofile'
+    assert not instrumentacion.medir_memoria
+
+    with pytest.raises(ValueError):
+        Instrumentacion(perfilador='perf')
+
+
+def test_servicios_registran_sus_etapas(monkeypatch):
+    instrumentacion = Instrumentacion()
+    monkeypatch.setattr(modulo_limpiar.Instrumentacion, '_compartida', instrumentacion)
+    monkeypatch.setattr(exportador_excel.Instrumentacion, '_compartida', instrumentacion)
+
+    bloques = [
+        pd.DataFrame({'Calificacion': ['5', '1'], 'Comentarios': ['muy buen servicio', 'ok']}),
+        pd.DataFrame({'Calificacion': ['4'], 'Comentarios': ['atención rápida']}, index=[2]),
+    ]
+    limpios = modulo_limpiar.ServicioLimpiarDatos().procesar_bloques(bloques)
+    limpios['Clasificacion'] = ['Promotor', 'Neutro']
+    marco = MarcoAnalisis.construir(limpios)
+    exportador_excel.generar_excel(marco, exportador_excel.ResumenAnalisis(marco))
+
+    limpieza, exportacion = instrumentacion.registros()
+    assert (limpieza['etapa'], limpieza['filas_entrada'], limpieza['filas_salida']) == ('limpieza', 3, 2)
+    assert (exportacion['etapa'], exportacion['filas_entrada']) == ('exportar_excel', 2)
@@ -0,0 +1,56 @@
+import pytest
+import numpy as np
+import pandas as pd
+from src.main.negocio.ServicioLimpiarDatos import ServicioLimpiarDatos
+
+@pytest.fixture
+def servicio_limpiar_datos():
+    return ServicioLimpiarDatos()
+
+@pytest.fixture
+def comentarios():
+    return pd.Series([
+        'Excelente SERVICIO, muy satisfecho!!',
+        'Pésima atención...\n\nnunca vuelvo',
+        'Atención   rápida; ¿volvería? Sí',
+        'Excelente SERVICIO, muy satisfecho!!',
+        '   ',
+        '',
+        '.,;',
+        None,
+        np.nan,
+        5,
+        'Niño, pingüino y canción',
+    ], index=range(10, 21), name='comentarios')
+
+def _iguales(a, b):
+    if isinstance(a, float) and isinstance(b, float):
+        return np.isnan(a) and np.isnan(b)
+    return a == b
+
+def test_limpiar_textos_igual_a_limpieza_individual(servicio_limpiar_datos, comentarios):
+    esperado = comentarios.apply(servicio_limpiar_datos._limpiar_texto_individual)
+    resultado = servicio_limpiar_datos._limpiar_textos(comentarios)
+
+    assert resultado.index.equals(comentarios.index)
+    assert resultado.name == 'comentarios'
+    assert all(_iguales(a, b) for a, b in zip(esperado, resultado))
+
+def test_limpiar_textos_elimina_acentos_y_puntuacion(servicio_limpiar_datos):
+    resultado = servicio_limpiar_datos._limpiar_textos(pd.Series(['Niño, ATENCIÓN!']))
+    assert resultado.iloc[0] == 'nino atencion'
+
+def test_limpiar_textos_sin_textos(servicio_limpiar_datos):
+    resultado = servicio_limpiar_datos._limpiar_textos(pd.Series([np.nan, 3.0]))
+    assert resultado.isna().all()
+
+@pytest.mark.filterwarnings('error::FutureWarning')
+@pytest.mark.parametrize('calificaciones, esperadas', [
+    ([10, 5, 3], [10, 5, 3]),
+    (['9 puntos', 7, 'sin nota', None], [9, 7]),
+])
+def test_limpiar_calificaciones(servicio_limpiar_datos, calificaciones, esperadas):
+    df = pd.DataFrame({'calificacion': calificaciones})
+    resultado = servicio_limpiar_datos._limpiar_calificaciones(df)
+    assert resultado['calificacion'].tolist() == esperadas
+    assert resultado['calificacion'].dtype == 'Int8'
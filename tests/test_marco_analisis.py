@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.main.negocio.MarcoAnalisis import MarcoAnalisis
+
+
+@pytest.fixture
+def df_clasificado():
+    df = pd.DataFrame({
+        'comentarios': ['muy buen  servicio', 'malo', None, 'regular'],
+        'calificacion': [5, 1, 3, 4],
+        'Clasificacion': ['Promotor', 'Detractor', np.nan, 'Neutro'],
+    }, index=[3, 5, 8, 9])
+    df.attrs['clave_dataset'] = 'abc'
+    return df
+
+
+def test_construir_calcula_longitudes_y_tipos(df_clasificado):
+    marco = MarcoAnalisis.construir(df_clasificado)
+
+    assert marco['longitud'].tolist() == [18, 4, 0, 7]
+    assert marco['palabras'].tolist() == [3, 1, 0, 1]
+    assert marco['longitud'].dtype == 'int32' and marco['palabras'].dtype == 'int32'
+    assert list(marco['Clasificacion'].cat.categories) == MarcoAnalisis.CLASES
+    assert marco['Clasificacion'].isna().tolist() == [False, False, True, False]
+    assert marco.index.tolist() == [3, 5, 8, 9]
+    assert marco.attrs['clave_dataset'] == 'abc'
+    # Los datos originales no cambian
+    assert 'longitud' not in df_clasificado.columns
+    assert df_clasificado['Clasificacion'].dtype == object
+
+
+def test_conserva_clases_desconocidas(df_clasificado):
+    df_clasificado.loc[8, 'Clasificacion'] = 'Otra'
+    marco = MarcoAnalisis.construir(df_clasificado)
+    assert list(marco['Clasificacion'].cat.categories) == MarcoAnalisis.CLASES + ['Otra']
+    assert marco.loc[8, 'Clasificacion'] == 'Otra'
+
+
+def test_vista_es_de_solo_lectura(df_clasificado):
+    marco = MarcoAnalisis.construir(df_clasificado)
+    vista = MarcoAnalisis.vista(marco)
+
+    with pytest.raises(ValueError):
+        vista.loc[3, 'longitud'] = 1
+    with pytest.raises(ValueError):
+        vista.loc[3, 'Clasificacion'] = 'Neutro'
+    with pytest.raises(ValueError):
+        vista['palabras'].to_numpy()[0] = 1
+
+    vista['extra'] = 1
+    assert 'extra' not in marco.columns
+    assert marco.loc[3, 'longitud'] == 18
+
+
+def test_escribir_texto_en_una_vista_no_cambia_el_marco(df_clasificado):
+    df_clasificado['origen'] = ['ATC', 'ATC', 'Encuesta', None]
+    marco = MarcoAnalisis.construir(df_clasificado)
+    vista = MarcoAnalisis.vista(marco)
+
+    vista.loc[3, 'comentarios'] = 'zz'
+    vista.loc[5, 'origen'] = 'otro'
+
+    assert vista.loc[3, 'comentarios'] == 'zz' and vista.loc[5, 'origen'] == 'otro'
+    assert marco.loc[3, 'comentarios'] == 'muy buen  servicio'
+    assert marco.loc[5, 'origen'] == 'ATC'
+    assert MarcoAnalisis.vista(marco).loc[3, 'comentarios'] == 'muy buen  servicio'
+    # Las columnas de solo lectura se siguen compartiendo sin copiar
+    assert np.shares_memory(vista['longitud'].to_numpy(), marco['longitud'].to_numpy())
+
+
+def test_asegurar_no_reconstruye_un_marco(df_clasificado):
+    marco = MarcoAnalisis.construir(df_clasificado)
+    assert MarcoAnalisis.asegurar(marco) is marco
+    assert MarcoAnalisis.es_marco(MarcoAnalisis.asegurar(df_clasificado))
+    assert not MarcoAnalisis.es_marco(df_clasificado)
+
+
+def test_tipos_compactos(df_clasificado):
+    pytest.importorskip('pyarrow')
+    marco = MarcoAnalisis.construir(df_clasificado)
+    assert str(marco['calificacion'].dtype) == 'Int8'
+    assert marco['comentarios'].dtype == pd.StringDtype('pyarrow')
+    assert marco['comentarios'].isna().tolist() == [False, False, True, False]
+    with pytest.raises(ValueError):
+        marco.loc[3, 'calificacion'] = 1
+
+
+def test_calificaciones_no_enteras_se_conservan(df_clasificado):
+    df_clasificado['calificacion'] = [4.5, 1, 3, 4]
+    assert MarcoAnalisis.construir(df_clasificado)['calificacion'].dtype == 'float64'
+    df_clasificado['calificacion'] = ['5', 'n/a', '3', '4']
+    assert MarcoAnalisis.construir(df_clasificado)['calificacion'].tolist() == ['5', 'n/a', '3', '4']
+
+
+def test_compactar_no_agrega_columnas():
+    datos = pd.DataFrame({'Clasificacion': ['Neutro', 'Promotor'], 'huella': [1, 2]})
+    compacto = MarcoAnalisis.compactar(datos)
+    assert list(compacto.columns) == ['Clasificacion', 'huella']
+    assert compacto['Clasificacion'].dtype == 'category'
+    assert not MarcoAnalisis.es_marco(compacto)
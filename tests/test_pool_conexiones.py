@@ -0,0 +1,80 @@
+import json
+import pytest
+from unittest.mock import patch, MagicMock
+from mysql.connector import Error
+from src.main.datos.PoolConexiones import PoolConexiones
+from src.main.datos.ConfiguracionBD import cargar_configuracion_bd
+
+@pytest.fixture
+def db_config():
+    return {
+        'host': 'localhost',
+        'user': 'test_user',
+        'password': 'test_password',
+        'database': 'test_db',
+        'pool_size': 3
+    }
+
+@patch('src.main.datos.PoolConexiones.pooling.MySQLConnectionPool')
+def test_pool_se_crea_en_el_primer_uso(mock_pool_cls, db_config):
+    pool = PoolConexiones(db_config)
+    mock_pool_cls.assert_not_called()
+
+    with pool.conexion():
+        pass
+    with pool.conexion():
+        pass
+
+    mock_pool_cls.assert_called_once()
+    kwargs = mock_pool_cls.call_args.kwargs
+    assert kwargs['pool_size'] == 3
+    assert 'pool_size' not in pool.db_config
+    assert mock_pool_cls.return_value.get_connection.return_value.close.call_count == 2
+
+def test_tamano_pool_acotado(db_config):
+    assert PoolConexiones(db_config, tamano_pool=1000).tamano_pool == 32
+    assert PoolConexiones(db_config, tamano_pool=-4).tamano_pool == 1
+
+@patch('src.main.datos.PoolConexiones.pooling.MySQLConnectionPool')
+def test_conexion_caida_se_reconecta(mock_pool_cls, db_config):
+    conn = MagicMock()
+    conn.is_connected.return_value = False
+    mock_pool_cls.return_value.get_connection.return_value = conn
+
+    with PoolConexiones(db_config).conexion() as c:
+        assert c is conn
+
+    conn.reconnect.assert_called_once()
+    conn.close.assert_called_once()
+
+@patch('src.main.datos.PoolConexiones.pooling.MySQLConnectionPool')
+def test_no_reintenta_inmediatamente_tras_fallo(mock_pool_cls, db_config):
+    mock_pool_cls.side_effect = Error("sin servidor")
+    pool = PoolConexiones(db_config, reintento_segundos=60)
+
+    for _ in range(3):
+        with pytest.raises(Error):
+            with pool.conexion():
+                pass
+
+    mock_pool_cls.assert_called_once()
+
+@patch('src.main.datos.PoolConexiones.pooling.MySQLConnectionPool')
+def test_verificar_salud(mock_pool_cls, db_config):
+    assert PoolConexiones(db_config).verificar_salud() is True
+    mock_pool_cls.side_effect = Error("sin servidor")
+    assert PoolConexiones(db_config).verificar_salud() is False
+
+def test_cargar_configuracion_bd(tmp_path, monkeypatch):
+    ruta = tmp_path / 'db.json'
+    ruta.write_text(json.dumps({'host': 'db.interno', 'user': 'desde_archivo'}))
+    monkeypatch.setenv('GSSP_DB_CONFIG', str(ruta))
+    monkeypatch.setenv('GSSP_DB_USER', 'desde_entorno')
+    monkeypatch.setenv('GSSP_DB_POOL_SIZE', '8')
+
+    config = cargar_configuracion_bd()
+
+    assert config['host'] == 'db.interno'
+    assert config['user'] == 'desde_entorno'
+    assert config['pool_size'] == 8
+    assert config['database'] == 'cosmitos_imperiales_db'
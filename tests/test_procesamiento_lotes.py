@@ -0,0 +1,84 @@
+import os
+import pytest
+import openpyxl
+import pandas as pd
+from src.main.negocio.ServicioProcesamientoLotes import ServicioProcesamientoLotes
+
+RUTA_MODELO = os.path.join(os.path.dirname(__file__), '..', 'src', 'main', 'clasificador_sentimiento_final.pkl')
+
+pytestmark = pytest.mark.skipif(not os.path.exists(RUTA_MODELO), reason="No se encontró el modelo entrenado")
+
+def _crear_xlsx(ruta, comentarios):
+    libro = openpyxl.Workbook()
+    libro.remove(libro.active)
+    for nombre in ['ATC', 'Encuesta salida']:
+        hoja = libro.create_sheet(nombre)
+        hoja.append(['Calificacion', 'Comentarios'])
+        for calificacion, comentario in comentarios:
+            hoja.append([calificacion, comentario])
+    libro.save(ruta)
+    return str(ruta)
+
+@pytest.fixture
+def archivos(tmp_path):
+    return [
+        _crear_xlsx(tmp_path / 'c_Enero.xlsx', [(10, 'Excelente servicio, muy amables'), (2, 'Pésima atención del asesor')]),
+        _crear_xlsx(tmp_path / 'c_Febrero.xlsx', [(9, 'Todo muy bien, gracias'), (5, 'Tardaron demasiado')]),
+        _crear_xlsx(tmp_path / 'c_Copia.xlsx', [(10, 'Excelente servicio, muy amables'), (2, 'Pésima atención del asesor')]),
+    ]
+
+def test_procesar_archivos(tmp_path, archivos):
+    salida = str(tmp_path / 'salida')
+    servicio = ServicioProcesamientoLotes(RUTA_MODELO, directorio_salida=salida)
+
+    resultados = servicio.procesar(archivos)
+
+    assert [r['exito'] for r in resultados] == [True, True, True]
+    assert [r.get('omitido', False) for r in resultados] == [False, False, True]
+    assert resultados[0]['filas_clasificadas'] == 4
+    assert set(resultados[0]['tiempos']) == set(ServicioProcesamientoLotes.ETAPAS)
+
+    df = pd.read_csv(os.path.join(salida, 'c_Enero_limpio.csv'))
+    assert len(df) == 4
+    assert set(df['Clasificacion']) <= {'Detractor', 'Neutro', 'Promotor'}
+    assert 'total' in ServicioProcesamientoLotes.resumen_tiempos(resultados)
+
+def test_omitir_archivos_ya_procesados(tmp_path, archivos):
+    salida = str(tmp_path / 'salida')
+    ServicioProcesamientoLotes(RUTA_MODELO, directorio_salida=salida).procesar(archivos[:1])
+
+    servicio = ServicioProcesamientoLotes(RUTA_MODELO, directorio_salida=salida)
+    resultados = servicio.procesar(archivos[:2])
+    assert [r.get('omitido', False) for r in resultados] == [True, False]
+
+    resultados = servicio.procesar(archivos[:1], forzar=True)
+    assert resultados[0].get('omitido', False) is False
+
+def test_archivo_invalido(tmp_path):
+    ruta = tmp_path / 'invalido.xlsx'
+    libro = openpyxl.Workbook()
+    libro.active.title = 'Otra'
+    libro.save(ruta)
+    servicio = ServicioProcesamientoLotes(RUTA_MODELO, directorio_salida=str(tmp_path / 'salida'))
+
+    resultado = servicio.procesar([str(ruta)])[0]
+
+    assert resultado['exito'] is False
+    assert servicio.cargar_registro() == {}
+
+def test_un_archivo_que_falla_no_detiene_el_lote(tmp_path, archivos, monkeypatch):
+    servicio = ServicioProcesamientoLotes(RUTA_MODELO, directorio_salida=str(tmp_path / 'salida'))
+    procesar_archivo = servicio.procesar_archivo
+
+    def fallar_en_enero(ruta, hash_archivo=None):
+        if ruta.endswith('c_Enero.xlsx'):
+            raise RuntimeError("libro dañado")
+        return procesar_archivo(ruta, hash_archivo)
+    monkeypatch.setattr(servicio, 'procesar_archivo', fallar_en_enero)
+
+    resultados = servicio.procesar(archivos[:2] + [str(tmp_path / 'no_existe.xlsx')])
+
+    assert [r['exito'] for r in resultados] == [False, True, False]
+    assert 'libro dañado' in resultados[0]['mensaje']
+    assert [r['archivo'] for r in servicio.cargar_registro().values()] == [archivos[1]]
+    assert 'total' in ServicioProcesamientoLotes.resumen_tiempos(resultados)
@@ -0,0 +1,95 @@
+import pytest
+import pandas as pd
+from src.main.negocio.ResumenAnalisis import ResumenAnalisis
+from src.main.negocio.CacheLRU import CacheLRU
+
+@pytest.fixture
+def df_clasificado():
+    return pd.DataFrame({
+        'Clasificacion': ['Promotor', 'Detractor', 'Neutro', 'Promotor', 'Detractor', None],
+        'comentarios': ['excelente servicio', 'malo', 'normal', 'me encanto todo', 'pesima atencion', 'x'],
+        'calificacion': [5, 1, 3, 5, 1, 4],
+        'longitud': [18, 4, 6, 120, 15, 1],
+    }, index=[10, 11, 12, 13, 14, 15])
+
+def test_agregados_por_clase(df_clasificado):
+    resumen = ResumenAnalisis(df_clasificado)
+    assert resumen.total == 5
+    assert resumen.clases == ['Detractor', 'Neutro', 'Promotor']
+
+    esperado = df_clasificado.groupby('Clasificacion').agg(
+        NumComentarios=('comentarios', 'count'), LongitudPromedio=('longitud', 'mean')
+    ).reset_index()
+    esperado['Porcentaje'] = esperado['NumComentarios'] / esperado['NumComentarios'].sum() * 100
+    pd.testing.assert_frame_equal(resumen.por_clase, esperado, check_dtype=False)
+
+    assert dict(zip(resumen.conteo['Clasificacion'], resumen.conteo['cantidad'])) == \
+        {'Promotor': 2, 'Detractor': 2, 'Neutro': 1}
+
+def test_distribucion_por_rangos_de_longitud(df_clasificado):
+    distribucion = ResumenAnalisis(df_clasificado).distribucion
+    assert list(distribucion.columns) == ['Clasificacion', 'conteo', 'min', 'max']
+    # 3 clases x 3 rangos ([0, 50), [50, 100), [100, 150))
+    assert len(distribucion) == 9
+    promotor = distribucion[distribucion['Clasificacion'] == 'Promotor']
+    assert promotor['conteo'].tolist() == [1, 0, 1]
+    assert promotor['min'].tolist() == [0.0, 50.0, 100.0]
+
+def test_histograma_suma_todos_los_comentarios(df_clasificado):
+    histograma = ResumenAnalisis(df_clasificado).histograma
+    assert histograma['conteo'].sum() == 5
+    assert histograma.groupby('Clasificacion').size().eq(ResumenAnalisis.CONTENEDORES_HISTOGRAMA).all()
+
+def test_indices_ordenados_son_posiciones_por_longitud(df_clasificado):
+    indices = ResumenAnalisis(df_clasificado).indices_ordenados
+    assert df_clasificado.iloc[indices['Todas']]['longitud'].tolist() == [120, 18, 15, 6, 4]
+    assert df_clasificado.iloc[indices['Detractor']]['longitud'].tolist() == [15, 4]
+    assert df_clasificado.iloc[indices['Promotor'][:1]]['longitud'].tolist() == [120]
+    assert sum(len(indices[c]) for c in ['Detractor', 'Neutro', 'Promotor']) == len(indices['Todas'])
+
+def test_orden_estable_con_longitudes_iguales():
+    df = pd.DataFrame({'Clasificacion': ['Neutro'] * 3, 'longitud': [5, 7, 5]})
+    assert ResumenAnalisis(df).indices_ordenados['Neutro'].tolist() == [1, 0, 2]
+
+def test_obtener_reutiliza_el_resumen(df_clasificado):
+    df_clasificado.attrs['clave_dataset'] = 'abc'
+    primero = ResumenAnalisis.obtener(df_clasificado)
+    assert ResumenAnalisis.obtener(df_clasificado.copy(deep=False)) is primero
+    # Un subconjunto con la misma clave no comparte el resumen
+    assert ResumenAnalisis.obtener(df_clasificado.head(3)) is not primero
+
+def test_subconjuntos_del_mismo_tamano_no_comparten_clave(df_clasificado):
+    df_clasificado.attrs['clave_dataset'] = 'abc'
+    primeros, ultimos = df_clasificado.head(3), df_clasificado.tail(3)
+    assert ResumenAnalisis.clave_dataset(primeros) != ResumenAnalisis.clave_dataset(ultimos)
+    assert ResumenAnalisis.obtener(primeros) is not ResumenAnalisis.obtener(ultimos)
+    # Los índices ordenados son posicionales: el orden de las filas también cuenta
+    invertido = df_clasificado.iloc[::-1]
+    assert ResumenAnalisis.clave_dataset(invertido) != ResumenAnalisis.clave_dataset(df_clasificado)
+    assert ResumenAnalisis.clave_dataset(invertido.drop(columns=[])) == ResumenAnalisis.clave_dataset(invertido)
+
+def test_clave_por_contenido_sin_attrs(df_clasificado):
+    otro = df_clasificado.copy()
+    assert ResumenAnalisis.clave_dataset(df_clasificado) == ResumenAnalisis.clave_dataset(otro)
+    otro.loc[10, 'Clasificacion'] = 'Neutro'
+    assert ResumenAnalisis.clave_dataset(df_clasificado) != ResumenAnalisis.clave_dataset(otro)
+
+def test_cache_acotada_por_el_tamano_de_los_resumenes(monkeypatch):
+    filas = 50_000
+    grandes = [pd.DataFrame({
+        'Clasificacion': ['Promotor', 'Neutro'] * (filas // 2),
+        'longitud': range(filas),
+    }).assign(comentarios='x', calificacion=5) for _ in range(2)]
+    grandes[1].attrs['clave_dataset'] = 'otro'
+
+    resumen = ResumenAnalisis(grandes[0])
+    posiciones = sum(arreglo.nbytes for arreglo in resumen.indices_ordenados.values())
+    assert resumen.tamano_bytes() >= posiciones >= 2 * filas * 4
+
+    cache = CacheLRU(max_entradas=32, max_bytes=int(resumen.tamano_bytes() * 1.5))
+    monkeypatch.setattr(ResumenAnalisis, '_cache', cache)
+    primero = ResumenAnalisis.obtener(grandes[0])
+    ResumenAnalisis.obtener(grandes[1])
+    # El segundo resumen desaloja al primero aunque sobren entradas
+    assert cache.estadisticas()['entradas'] == 1
+    assert ResumenAnalisis.obtener(grandes[0]) is not primero
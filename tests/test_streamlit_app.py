@@ -168,8 +168,8 @@ class TestStreamlitApp:
         # Verificar que no hay excepciones al ejecutar
         assert not app.exception, "Hubo una excepción al verificar session_state"
         
-        # La app usa session_state para 'df_actual' y 'analisis_actual'
-        # Si no hay datos cargados, estas claves no deberían existir
+        # La app usa session_state para 'analisis_actual'
+        # Si no hay datos cargados, esta clave no debería existir
         # Esta prueba verifica que la app maneja correctamente el caso inicial
 
 
@@ -177,10 +177,14 @@ class TestAppWithMockedData:
     """Pruebas de la aplicación con datos simulados en session_state"""
     
     @pytest.fixture
-    def app_with_data(self):
+    def app_with_data(self, tmp_path, monkeypatch):
         """
-        Fixture que inicializa la app con datos en session_state.
+        Fixture que inicializa la app con un análisis guardado en un almacén
+        SQLite temporal y seleccionado en session_state.
         """
+        import streamlit as st
+        from datos.AlmacenSQLite import AlmacenSQLite
+
         app_path = os.path.join(
             os.path.dirname(__file__), 
             '..', 
@@ -188,9 +192,12 @@ class TestAppWithMockedData:
             'main', 
             'app.py'
         )
-        at = AppTest.from_file(app_path, default_timeout=10)
-        
-        # Crear datos de ejemplo
+        ruta_sqlite = str(tmp_path / 'analisis.sqlite')
+        monkeypatch.setenv('GSSP_ALMACEN', 'sqlite')
+        monkeypatch.setenv('GSSP_SQLITE', ruta_sqlite)
+        monkeypatch.setenv('GSSP_CACHE_PREDICCIONES', str(tmp_path / 'predicciones.sqlite'))
+
+        # Crear datos de ejemplo y guardarlos como un análisis
         sample_data = pd.DataFrame({
             'comentarios': [
                 'Excelente servicio',
@@ -198,15 +205,19 @@ class TestAppWithMockedData:
                 'Normal'
             ],
             'calificacion': [5, 1, 3],
-            'Clasificacion': ['Promotor', 'Detractor', 'Neutro'],
-            'longitud': [18, 8, 6]
+            'Clasificacion': ['Promotor', 'Detractor', 'Neutro']
         })
-        
-        # Configurar session_state antes de ejecutar
-        at.session_state['df_actual'] = sample_data
+        almacen = AlmacenSQLite(ruta_sqlite)
+        almacen.guardar(sample_data, 'test_analisis', tamano_lote=100)
+        almacen.cerrar()
+
+        # Los servicios se crean de nuevo con el almacén temporal
+        st.cache_resource.clear()
+        at = AppTest.from_file(app_path, default_timeout=10)
         at.session_state['analisis_actual'] = 'test_analisis'
-        
-        return at
+
+        yield at
+        st.cache_resource.clear()
     
     def test_app_displays_loaded_data(self, app_with_data):
         """
@@ -111,6 +111,30 @@ class TestLoaderFunctions:
             pytest.skip(f"Error al ejecutar la prueba: {e}")
 
 
+    def test_process_uploaded_file_memoiza_por_contenido(self):
+        """
+        Verifica que un mismo archivo (mismo contenido y modelo) solo se procesa una vez.
+        """
+        from unittest.mock import MagicMock, patch
+        from presentacion.controlador import loader
+        from negocio.CacheResultados import CacheResultados
+
+        sae = MagicMock(version_modelo='v1')
+        df = pd.DataFrame({'comentarios': ['muy bueno'], 'Clasificacion': ['Promotor']})
+        archivo = BytesIO(b"Calificacion,Comentarios\n5,muy bueno\n")
+        archivo.name = 'datos.csv'
+
+        with patch.object(loader, 'get_cache_resultados', return_value=CacheResultados()), \
+             patch.object(loader, '_procesar_archivo', return_value=(df, 'ok', True)) as procesar:
+            primero = loader.process_uploaded_file(archivo, None, sae)
+            segundo = loader.process_uploaded_file(archivo, None, sae)
+            assert procesar.call_count == 1
+            assert segundo[0].equals(primero[0]) and segundo[1:] == ('ok', True)
+
+            sae.version_modelo = 'v2'
+            loader.process_uploaded_file(archivo, None, sae)
+            assert procesar.call_count == 2
+
 class TestAppWithFileUpload:
     """Pruebas de la app simulando carga de archivos"""
     
@@ -0,0 +1,88 @@
+import pytest
+from io import BytesIO
+import openpyxl
+import pandas as pd
+from src.main.negocio.ServicioValidarArchivo import ServicioValidarArchivo
+
+def _crear_xlsx(hojas: dict) -> BytesIO:
+    libro = openpyxl.Workbook()
+    libro.remove(libro.active)
+    for nombre, filas in hojas.items():
+        hoja = libro.create_sheet(nombre)
+        for fila in filas:
+            hoja.append(fila)
+    stream = BytesIO()
+    libro.save(stream)
+    stream.seek(0)
+    return stream
+
+@pytest.fixture
+def archivo_valido():
+    return _crear_xlsx({
+        'ATC': [
+            ['Calificacion', 'Comentarios', 'Extra'],
+            [10, 'Excelente servicio', 'x'],
+            [1, 'Muy mala atencion', 'y'],
+            [None, None, 'z'],
+            [5, 'Regular', None],
+        ],
+        'Encuesta salida': [
+            ['Comentarios', 'Calificacion'],
+            ['Todo bien', 9],
+            ['Tardaron mucho', 3],
+        ],
+    })
+
+def test_leer_archivo_valido(archivo_valido):
+    sva = ServicioValidarArchivo()
+    valido, mensaje = sva.leer_archivo(archivo_valido, 'archivo.xlsx')
+    assert valido is True
+    assert mensaje is None
+
+def test_iterar_bloques(archivo_valido):
+    sva = ServicioValidarArchivo()
+    sva.leer_archivo(archivo_valido, 'archivo.xlsx')
+
+    bloques = list(sva.iterar_bloques(tamano_bloque=2))
+
+    assert [len(b) for b in bloques] == [2, 1, 2]
+    df = pd.concat(bloques)
+    assert list(df.columns) == ['Calificacion', 'Comentarios']
+    assert list(df.index) == [0, 1, 2, 3, 4]
+    assert df['Comentarios'].tolist() == [
+        'Excelente servicio', 'Muy mala atencion', 'Regular', 'Todo bien', 'Tardaron mucho'
+    ]
+    assert df['Calificacion'].tolist() == [10, 1, 5, 9, 3]
+
+def test_obtener_datos_archivo(archivo_valido):
+    sva = ServicioValidarArchivo()
+    sva.leer_archivo(archivo_valido, 'archivo.xlsx')
+
+    datos = sva.obtener_datos_archivo()
+
+    assert set(datos) == {'ATC', 'Encuesta salida'}
+    assert len(datos['ATC']) == 3
+    assert len(datos['Encuesta salida']) == 2
+
+def test_leer_archivo_sin_hoja_requerida():
+    archivo = _crear_xlsx({
+        'ATC': [['Calificacion', 'Comentarios']],
+        'Otra': [['Calificacion', 'Comentarios']],
+    })
+    valido, mensaje = ServicioValidarArchivo().leer_archivo(archivo, 'archivo.xlsx')
+    assert valido is False
+    assert 'Encuesta salida' in mensaje
+
+def test_leer_archivo_sin_columna_requerida():
+    archivo = _crear_xlsx({
+        'ATC': [['Calificacion', 'Comentarios']],
+        'Encuesta salida': [['Calificacion']],
+    })
+    valido, mensaje = ServicioValidarArchivo().leer_archivo(archivo, 'archivo.xlsx')
+    assert valido is False
+    assert "'Comentarios'" in mensaje
+
+def test_leer_archivo_extension_invalida():
+    valido, mensaje = ServicioValidarArchivo().leer_archivo(BytesIO(b''), 'archivo.txt')
+    assert valido is False
+    assert 'Extensión inválida' in mensaje